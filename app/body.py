@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import Literal, Optional
-from datetime import datetime
+from datetime import datetime, date
 from .models import ClassEnum, FlightStatus
 
 class Account(BaseModel):
@@ -30,6 +30,12 @@ class Flight(BaseModel):
     flight_number: str
     seat_number: str
     status: FlightStatus
+    #defaults to the day of the booking's departure_date
+    departure_date: Optional[date] = None
+
+#one line of a flight import file
+class FlightImport(Flight):
+    booking_id: int
 
 #Token
 class Token(BaseModel):
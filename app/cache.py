@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from .config import settings
+from .queries import get_airport_query, get_class_type_query
+from .response import AirportResponse, ClassTypeResponse
+from .status_codes import validate_airport_exists, validate_class_exists
+from .timing import outside_budget
+
+#in-process read-through cache for reference data (airports, classes)
+#values are the finished JSON bodies, so a hit skips the query and pydantic
+#each worker has its own copy - writes clear the local one, the TTL bounds how stale the others can be
+class ReferenceCache:
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+
+        #bumped by invalidate() so a load that raced with a write is not stored
+        self._generation = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+    #loader runs on a miss and returns the JSON body, exceptions (e.g. 404) pass through uncached
+    def get_or_load(self, key, loader):
+        body = self.get(key)
+        if body is not None:
+            return body
+
+        generation = self._generation
+        body = loader()
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (body, time.monotonic() + self.ttl_seconds)
+        return body
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+airports_cache = ReferenceCache(settings.reference_cache_seconds)
+classes_cache = ReferenceCache(settings.reference_cache_seconds)
+
+ALL = "all"
+
+#same JSON the response_model would have produced
+#from_attributes is passed here, pydantic 2 does not read the schemas' v1 orm_mode config
+def serialize(response_model, data, many: bool = False):
+    if many:
+        content = [response_model.model_validate(row, from_attributes=True) for row in data]
+    else:
+        content = response_model.model_validate(data, from_attributes=True)
+
+    return json.dumps(jsonable_encoder(content), separators=(",", ":")).encode()
+
+def json_response(body: bytes):
+    return Response(content=body, media_type="application/json")
+
+#cached body of one airport/class - the GET /{id} routes and the references nested in booking write responses
+#a miss reads the row once for every later request, so that SELECT is not charged to the statement budget
+def airport_body(db, airport_id: int):
+    def load():
+        airport = get_airport_query(db, airport_id).first()
+        validate_airport_exists(airport, airport_id)
+        return serialize(AirportResponse, airport)
+
+    with outside_budget():
+        return airports_cache.get_or_load(airport_id, load)
+
+def class_body(db, class_id: int):
+    def load():
+        class_type = get_class_type_query(db, class_id).first()
+        validate_class_exists(class_type, class_id)
+        return serialize(ClassTypeResponse, class_type)
+
+    with outside_budget():
+        return classes_cache.get_or_load(class_id, load)
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import List
 
 class Settings(BaseSettings):
     database_hostname: str  
@@ -9,6 +10,85 @@ class Settings(BaseSettings):
     secret_key: str         
     algorithm: str          
     token_minutes: int      
+
+    #full SQLAlchemy URLs, override the mysql URLs built from the fields above (e.g. sqlite for local runs)
+    database_url: str = ""
+    async_database_url: str = ""
+
+    #serve the read routes from an AsyncSession on an aiomysql engine instead of the threadpool
+    database_async: bool = False
+
+    #compare the database's migration revision with migrations/ at startup and refuse to start on a mismatch
+    schema_check: bool = False
+
+    #connection pool of every engine (primary, replicas and the async engine), the defaults are SQLAlchemy's own
+    #pool_size + pool_max_overflow is the most connections one worker opens, size it against the 40 threadpool threads
+    pool_size: int = 5
+    pool_max_overflow: int = 10
+    pool_timeout: int = 30
+    #seconds before a connection is replaced, keep it under MySQL's wait_timeout (-1 = never)
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+
+    #read replica URLs for the GET routes, e.g. REPLICA_URLS=["mysql+pymysql://...replica1/db", "mysql+pymysql://...replica2/db"]
+    replica_urls: List[str] = []
+    #the same replicas for the async read routes (aiomysql URLs, same order), required with DATABASE_ASYNC and REPLICA_URLS
+    async_replica_urls: List[str] = []
+    #after a write the client reads from the primary for this long, keep it above the replication lag
+    read_your_writes_seconds: int = 5
+
+    #answer PUT/PATCH without an If-Match header with 428 instead of applying them unconditionally
+    require_if_match: bool = False
+
+    #share of requests that get a Server-Timing header and a timing log line (0 = off, 1 = every request)
+    timing_sample_rate: float = 0.1
+
+    #pagination
+    page_size: int = 50
+    max_page_size: int = 200
+
+    #raise on any relationship lazy load that a query did not plan for
+    strict_loading: bool = False
+    #fail write routes that run more SQL statements than their @statement_budget
+    strict_statements: bool = False
+
+    #password hashing - bcrypt cost, hashing processes, and how many hashes may wait before returning 503
+    bcrypt_rounds: int = 12
+    hash_workers: int = 2
+    hash_queue_depth: int = 32
+
+    #verified bearer tokens kept in memory, 0 disables the cache
+    token_cache_size: int = 10000
+
+    #airports/classes responses are cached in memory for this long, writes clear them right away
+    reference_cache_seconds: int = 300
+
+    #seat layout of every flight (rows 1..seat_rows, one letter per seat across) and the in-memory seat maps:
+    #reloaded from the database after seat_map_seconds, at most seat_map_flights flight days kept per worker
+    seat_rows: int = 60
+    seat_letters: str = "ABCDEF"
+    seat_map_seconds: int = 30
+    seat_map_flights: int = 10000
+
+    #most items accepted by one bulk request
+    bulk_max_items: int = 500
+
+    #flight imports - rows per INSERT/commit, rejected lines reported back, longest accepted line
+    import_chunk_size: int = 1000
+    import_max_errors: int = 100
+    import_max_line_bytes: int = 65536
+
+    #bookings per keyset page of the streaming exports
+    export_batch_size: int = 500
+
+    #flight status event streams - frames buffered per stream before the oldest are dropped,
+    #seconds between keepalive comments, most open streams per worker
+    flight_events_buffer: int = 100
+    flight_events_keepalive_seconds: int = 15
+    flight_events_max_streams: int = 20000
+
+    #accounts allowed on the /operations routes, e.g. OPERATOR_ACCOUNT_IDS=[1,2]
+    operator_account_ids: List[int] = []
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,77 @@
+from fastapi import Depends
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import get_db
+from .body import TokenData
+from .oauth2 import get_current_user
+from .queries import ownership_statement, get_ownership_async
+from .config import settings
+from .status_codes import validate_operator, validate_account_ownership, validate_account_exists, validate_account_info_exists, validate_booking_exists, validate_flight_exists
+
+#account -> account_info -> booking -> flight resolved for a nested route
+class Ownership:
+    def __init__(self, account_id: int, account_info=None, booking=None, flight=None):
+        self.account_id = account_id
+        self.account_info = account_info
+        self.booking = booking
+        self.flight = flight
+
+#one joined SELECT instead of one .first() per level
+#the 403/404s are raised in the same order the routers always checked them
+def resolve_ownership(db: Session, current_user: TokenData, account_id: int, booking_id: int = None, flight_id: int = None,
+                      options=(), require_account_info: bool = False):
+    validate_account_ownership(account_id, current_user.id)
+
+    row = db.execute(ownership_statement(account_id, booking_id, flight_id).options(*options)).first()
+    return ownership_from_row(row, account_id, booking_id, flight_id, require_account_info)
+
+async def resolve_ownership_async(db: AsyncSession, current_user: TokenData, account_id: int, booking_id: int = None, flight_id: int = None,
+                                  options=(), require_account_info: bool = False):
+    validate_account_ownership(account_id, current_user.id)
+
+    row = await get_ownership_async(db, account_id, booking_id, flight_id, options)
+    return ownership_from_row(row, account_id, booking_id, flight_id, require_account_info)
+
+def ownership_from_row(row, account_id: int, booking_id: int = None, flight_id: int = None, require_account_info: bool = False):
+    validate_account_exists(row, account_id)
+
+    _, account_info, booking, flight = list(row) + [None] * (4 - len(row))
+
+    if require_account_info:
+        validate_account_info_exists(account_info)
+
+    if booking_id is not None:
+        validate_booking_exists(booking, booking_id)
+
+    if flight_id is not None:
+        validate_flight_exists(flight, flight_id)
+
+    return Ownership(account_id, account_info, booking, flight)
+
+
+#route dependencies - options are loader options for the entities in the lookup
+#e.g. Depends(OwnedBooking(*booking_loader_options()))
+class OwnedAccount:
+    def __init__(self, *options, require_account_info: bool = False):
+        self.options = options
+        self.require_account_info = require_account_info
+
+    def __call__(self, account_id: int, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+        return resolve_ownership(db, current_user, account_id,
+                                 options=self.options, require_account_info=self.require_account_info)
+
+class OwnedBooking(OwnedAccount):
+    def __call__(self, account_id: int, booking_id: int, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+        return resolve_ownership(db, current_user, account_id, booking_id,
+                                 options=self.options, require_account_info=self.require_account_info)
+
+class OwnedFlight(OwnedAccount):
+    def __call__(self, account_id: int, booking_id: int, flight_id: int, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+        return resolve_ownership(db, current_user, account_id, booking_id, flight_id,
+                                 options=self.options, require_account_info=self.require_account_info)
+
+
+#guards the /operations routes, which work across every account
+def require_operator(current_user: TokenData = Depends(get_current_user)):
+    validate_operator(current_user.id, settings.operator_account_ids)
+    return current_user
@@ -0,0 +1,68 @@
+from fastapi import HTTPException, Request, Response, status
+from .config import settings
+
+#weak ETags built from (id, version) of the row that owns the response
+#weak because nested airports/classes can change without a version bump
+def make_etag(kind: str, *parts):
+    return 'W/"%s-%s"' % (kind, ".".join(str(part) for part in parts))
+
+#page = the PageParams of a list response, every page of a list is tagged apart (cursor 0 = the first page)
+def set_etag(response: Response, kind: str, *parts, page=None):
+    response.headers["ETag"] = make_etag(kind, *parts, *page_parts(page))
+
+def page_parts(page):
+    return () if page is None else (page.cursor or 0, page.limit)
+
+#only then is the version-only query worth running
+def wants_revalidation(request: Request):
+    return "if-none-match" in request.headers
+
+def etag_matches(if_none_match: str, etag: str):
+    if if_none_match.strip() == "*":
+        return True
+    #weak comparison - W/ prefixes are ignored on both sides
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+#row is the version-only row, None when the resource is missing so the full lookup raises the 404
+def raise_if_not_modified(request: Request, kind: str, row, page=None):
+    if row is None:
+        return
+
+    etag = make_etag(kind, *row, *page_parts(page))
+    if etag_matches(request.headers["if-none-match"], etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+#If-Match on a PUT/PATCH -> the versions of the row the client accepts, None = no version condition
+#a flight's ETag also carries its booking's version, only the row's own version (the first one) is compared
+def if_match_versions(request: Request, kind: str, id: int):
+    if_match = request.headers.get("if-match")
+    if if_match is None:
+        if settings.require_if_match:
+            raise HTTPException(
+                status_code=status.HTTP_428_PRECONDITION_REQUIRED,
+                detail="Send the ETag of the row in If-Match"
+            )
+        return None
+
+    if if_match.strip() == "*":
+        return None
+
+    prefix = f"{kind}-{id}."
+    versions = []
+    for candidate in if_match.split(","):
+        tag = candidate.strip().removeprefix("W/").strip('"')
+        if tag.startswith(prefix):
+            version = tag[len(prefix):].split(".")[0]
+            if version.isdigit():
+                versions.append(int(version))
+
+    if not versions:
+        raise_precondition_failed()
+    return versions
+
+def raise_precondition_failed():
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="The row was changed since it was read, GET it again for the current ETag"
+    )
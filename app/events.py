@@ -0,0 +1,121 @@
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+from fastapi import HTTPException, status
+from .config import settings
+
+#in-process pub/sub of flight status writes, feeding the Server-Sent Events streams
+#each worker only sees the writes it made itself, there is no broker between workers
+#an idle stream is one suspended coroutine and a small deque, it holds no session and no connection
+
+#one open stream - events are kept as finished SSE frames, the oldest dropped once buffer_size are waiting
+#a stream that dropped frames is sent a resync event so its client reloads the flights list
+class Subscription:
+    __slots__ = ("account_id", "frames", "lost", "loop", "wake")
+
+    def __init__(self, account_id: int, buffer_size: int, loop):
+        self.account_id = account_id
+        self.frames = deque(maxlen=buffer_size)
+        self.lost = False
+        self.loop = loop
+        self.wake = asyncio.Event()
+
+#handlers publish from threadpool threads, the frames are handed over under the lock
+#and the stream's event loop is woken with call_soon_threadsafe
+class FlightEvents:
+    def __init__(self, buffer_size: int, keepalive_seconds: int, max_streams: int):
+        self.buffer_size = buffer_size
+        self.keepalive_seconds = keepalive_seconds
+        self.max_streams = max_streams
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+        self._streams = 0
+        self._ids = itertools.count(1)
+
+    #called on the event loop of the request, 503 once this worker has max_streams open
+    def subscribe(self, account_id: int):
+        subscription = Subscription(account_id, self.buffer_size, asyncio.get_running_loop())
+        with self._lock:
+            if self._streams >= self.max_streams:
+                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many open event streams")
+
+            self._subscriptions.setdefault(account_id, set()).add(subscription)
+            self._streams += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.account_id)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.account_id]
+            self._streams -= 1
+
+    #after the commit - events of an account nobody is listening to cost one dict lookup
+    def publish(self, account_id: int, event: dict):
+        with self._lock:
+            subscriptions = self._subscriptions.get(account_id)
+            if not subscriptions:
+                return
+
+            #encoded once, every stream of the account gets the same frame
+            frame = f"id: {next(self._ids)}\nevent: flight_status\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+            for subscription in subscriptions:
+                if len(subscription.frames) == subscription.frames.maxlen:
+                    subscription.lost = True
+                subscription.frames.append(frame)
+
+            subscriptions = list(subscriptions)
+
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.wake.set)
+            except RuntimeError:
+                #the stream's loop is already closed (worker shutting down)
+                continue
+
+    def _drain(self, subscription: Subscription):
+        with self._lock:
+            frames = list(subscription.frames)
+            subscription.frames.clear()
+            lost, subscription.lost = subscription.lost, False
+        return frames, lost
+
+    #body of the StreamingResponse, a comment line every keepalive_seconds keeps proxies from closing an idle stream
+    #the subscription is dropped when the client disconnects and the generator is closed
+    async def stream(self, subscription: Subscription):
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(subscription.wake.wait(), self.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                subscription.wake.clear()
+                frames, lost = self._drain(subscription)
+                if lost:
+                    yield "event: resync\ndata: {}\n\n"
+                for frame in frames:
+                    yield frame
+        finally:
+            self.unsubscribe(subscription)
+
+
+#payload of one status write, row = a Flight or any row with its id, booking_id, flight_number and departure_date
+def flight_status_event(row, flight_status):
+    return {
+        "flight_id": row.id,
+        "booking_id": row.booking_id,
+        "flight_number": row.flight_number,
+        "departure_date": row.departure_date.isoformat(),
+        "status": flight_status.value
+    }
+
+
+flight_events = FlightEvents(settings.flight_events_buffer, settings.flight_events_keepalive_seconds, settings.flight_events_max_streams)
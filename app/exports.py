@@ -0,0 +1,29 @@
+from sqlalchemy import select
+from . import models
+from .queries import booking_loader_options
+from .response import BookingResponse
+from .cache import serialize
+
+#one NDJSON line per booking, with the class, both airports and the flights nested like BookingResponse
+#runs in sessions from session_factory - export_bookings closes the request session before the body streams
+#keyset pages of batch_size bookings (id > last id sent), each a plain buffered SELECT with no server-side cursor,
+#the flights of a page come with one selectin IN query, so memory is one page however long the history is
+#every page has its own short session, a slow client holds no connection while it reads the previous one
+def iter_booking_export(session_factory, account_info_id: int, batch_size: int):
+    last_id = 0
+    while True:
+        with session_factory() as db:
+            statement = select(models.Booking).where(
+                models.Booking.account_info_id == account_info_id,
+                models.Booking.id > last_id
+            ).order_by(models.Booking.id).limit(batch_size).options(*booking_loader_options())
+
+            bookings = db.scalars(statement).all()
+            if not bookings:
+                return
+            body = b"".join(serialize(BookingResponse, booking) + b"\n" for booking in bookings)
+
+        yield body
+        if len(bookings) < batch_size:
+            return
+        last_id = bookings[-1].id
@@ -0,0 +1,23 @@
+from fastapi import Query
+from datetime import datetime
+from typing import Optional
+from .models import FlightStatus
+
+#filters of the operator booking search, every one is optional and they are ANDed
+#departure_from/departure_to bound departure_date inclusively
+class BookingSearchParams:
+    def __init__(
+        self,
+        from_id: Optional[int] = Query(None, description="Departure airport id"),
+        to_id: Optional[int] = Query(None, description="Arrival airport id"),
+        class_id: Optional[int] = Query(None),
+        departure_from: Optional[datetime] = Query(None),
+        departure_to: Optional[datetime] = Query(None),
+        status: Optional[FlightStatus] = Query(None, description="Bookings with at least one flight in this status")
+    ):
+        self.from_id = from_id
+        self.to_id = to_id
+        self.class_id = class_id
+        self.departure_from = departure_from
+        self.departure_to = departure_to
+        self.status = status
@@ -0,0 +1,242 @@
+import argparse
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select
+from .database import engine
+from .seats import seat_inventory
+from .utils import pwd_context
+from . import models
+
+#synthetic accounts, bookings and flights written with Core executemany INSERTs, no ORM unit of work
+#usage: python -m app.generate --accounts 1000000 [--bookings-per-account 4] [--airports 500] [--seed 1] [--batch-size 20000]
+#the same seed on the same starting database writes the same rows
+#ids continue after the current max of each table, so it can be run on top of existing data
+#seats are handed out in order per flight number and day, skipping the seats already taken in the database
+#(wherever the API put them), a full flight continues as flight_number-1, -2, ... so uq_flights_seat holds
+
+#share of flights per status
+STATUS_WEIGHTS = {
+    models.FlightStatus.pending: 50,
+    models.FlightStatus.on_time: 25,
+    models.FlightStatus.boarding: 8,
+    models.FlightStatus.delayed: 12,
+    models.FlightStatus.cancelled: 5,
+}
+
+#share of bookings per class
+CLASS_WEIGHTS = {
+    models.ClassEnum.economy: 70,
+    models.ClassEnum.premium: 15,
+    models.ClassEnum.business: 12,
+    models.ClassEnum.first: 3,
+}
+
+#most bookings one account may get
+MAX_BOOKINGS = 1000
+
+#alpha of the pareto distribution whose floor, capped at cap, has the requested mean
+#E[min(floor(X), cap)] = sum of P(X >= k) for k = 1..cap = sum of k^-alpha, decreasing in alpha, so bisect
+def pareto_alpha(mean: float, cap: int):
+    def expected(alpha):
+        return sum(k ** -alpha for k in range(1, cap + 1))
+
+    low, high = 0.01, 50.0
+    for _ in range(60):
+        middle = (low + high) / 2
+        if expected(middle) > mean:
+            low = middle
+        else:
+            high = middle
+    return high
+
+class Generator:
+    def __init__(self, rng: random.Random, airport_ids, bookings_per_account: float, password_hash: str, start: datetime, taken_seats=None):
+        self.rng = rng
+        self.bookings_per_account = bookings_per_account
+        self.booking_alpha = pareto_alpha(bookings_per_account, MAX_BOOKINGS)
+        self.password_hash = password_hash
+        self.start = start
+
+        #airport popularity follows a zipf curve, so a few hubs carry most routes
+        self.airport_ids = list(airport_ids)
+        self.airport_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(self.airport_ids) + 1)))
+
+        self.statuses = list(STATUS_WEIGHTS)
+        self.status_weights = list(itertools.accumulate(STATUS_WEIGHTS.values()))
+
+        #(flight_number, day) -> next seat position to try, (flight_number-N, day) -> bitmap of the seats already in the database
+        self.seats_sold = {}
+        self.taken_seats = taken_seats if taken_seats is not None else {}
+
+    #bookings per account is pareto distributed around the requested mean - most book once or twice, a few book hundreds
+    def booking_count(self):
+        return min(int(self.rng.paretovariate(self.booking_alpha)), MAX_BOOKINGS)
+
+    def route(self):
+        from_id, to_id = self.rng.choices(self.airport_ids, cum_weights=self.airport_weights, k=2)
+        while to_id == from_id:
+            to_id = self.rng.choices(self.airport_ids, cum_weights=self.airport_weights)[0]
+        return from_id, to_id
+
+    #(from, to, departure) of every flight of one leg, a connection goes out to a hub and leaves it 2-12 hours later
+    #on the hub's own flight number, so the passenger never holds two seats on one flight
+    def hops(self, from_id: int, to_id: int, departure: datetime):
+        if len(self.airport_ids) < 3 or self.rng.random() >= 0.15:
+            return [(from_id, to_id, departure)]
+
+        hub = from_id
+        while hub in (from_id, to_id):
+            hub = self.rng.choices(self.airport_ids, cum_weights=self.airport_weights)[0]
+        return [(from_id, hub, departure), (hub, to_id, departure + timedelta(hours=self.rng.randint(2, 12)))]
+
+    #same route both ways gets two flight numbers
+    def flight_number(self, from_id: int, to_id: int):
+        return f"PR{(from_id * 31 + to_id) % 9000 + 100}"
+
+    def seat(self, flight_number: str, day):
+        position = self.seats_sold.get((flight_number, day), 0)
+        while True:
+            extra_flight, index = divmod(position, seat_inventory.layout.capacity)
+            position += 1
+            numbered = f"{flight_number}-{extra_flight}" if extra_flight else flight_number
+            if not self.taken_seats.get((numbered, day), 0) >> index & 1:
+                break
+
+        self.seats_sold[(flight_number, day)] = position
+        return numbered, seat_inventory.layout.label(index)
+
+    #account_info ids run alongside account ids, shifted by info_offset
+    def rows_for_accounts(self, first_account_id: int, count: int, info_offset: int, next_booking_id, next_flight_id, class_ids, class_weights):
+        rng = self.rng
+        accounts, infos, bookings, flights = [], [], [], []
+
+        for account_id in range(first_account_id, first_account_id + count):
+            account_info_id = account_id + info_offset
+            created_at = self.start + timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+            accounts.append({"id": account_id, "email": f"gen{account_id}@example.com", "password": self.password_hash, "created_at": created_at})
+            infos.append({"id": account_info_id, "account_id": account_id, "first_name": f"First{account_id % 5000}", "last_name": f"Last{account_id % 20000}", "created_at": created_at})
+
+            for _ in range(self.booking_count()):
+                booking_id = next(next_booking_id)
+                from_id, to_id = self.route()
+                departure = created_at + timedelta(days=rng.randint(1, 300), minutes=rng.randrange(0, 24 * 60, 5))
+                round_trip = rng.random() < 0.4
+
+                bookings.append({
+                    "id": booking_id, "account_info_id": account_info_id,
+                    "class_id": rng.choices(class_ids, cum_weights=class_weights)[0],
+                    "from_id": from_id, "to_id": to_id,
+                    "departure_date": departure,
+                    "return_date": departure + timedelta(days=rng.randint(2, 21)) if round_trip else None,
+                    "created_at": created_at,
+                })
+
+                #one flight per leg, some legs connect through a hub on two flights
+                legs = [(from_id, to_id, departure)]
+                if round_trip:
+                    legs.append((to_id, from_id, bookings[-1]["return_date"]))
+
+                for origin, destination, departs in legs:
+                    for hop_from, hop_to, hop_departs in self.hops(origin, destination, departs):
+                        flight_number, seat_number = self.seat(self.flight_number(hop_from, hop_to), hop_departs.date())
+                        flights.append({
+                            "id": next(next_flight_id), "booking_id": booking_id, "account_info_id": account_info_id,
+                            "flight_number": flight_number, "seat_number": seat_number, "departure_date": hop_departs.date(),
+                            "status": rng.choices(self.statuses, cum_weights=self.status_weights)[0],
+                            "created_at": created_at,
+                        })
+
+        return accounts, infos, bookings, flights
+
+
+def next_id(connection, model):
+    return (connection.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+#airports and classes are reference data, only the missing ones are added
+def ensure_reference_data(connection, airports: int):
+    existing_airports = connection.execute(select(func.count()).select_from(models.Airport)).scalar()
+    if existing_airports < airports:
+        first = next_id(connection, models.Airport)
+        connection.execute(insert(models.Airport), [
+            {"id": i, "name": f"Airport {i}", "country": f"Country {i % 150}", "city": f"City {i}"}
+            for i in range(first, first + airports - existing_airports)
+        ])
+
+    existing_classes = {row.type: row.id for row in connection.execute(select(models.ClassType.id, models.ClassType.type))}
+    missing = [class_type for class_type in models.ClassEnum if class_type not in existing_classes]
+    if missing:
+        connection.execute(insert(models.ClassType), [{"type": class_type} for class_type in missing])
+        existing_classes = {row.type: row.id for row in connection.execute(select(models.ClassType.id, models.ClassType.type))}
+
+    class_ids = [existing_classes[class_type] for class_type in CLASS_WEIGHTS]
+    return class_ids, list(itertools.accumulate(CLASS_WEIGHTS.values()))
+
+#seats already taken per flight number (flight_number-N rows included) and day, as seat bitmaps
+#streamed, so a large flights table is not held as rows
+def load_taken_seats(connection):
+    taken_seats = {}
+    statement = select(models.Flight.flight_number, models.Flight.departure_date, models.Flight.seat_number)
+    for flight_number, day, seat_number in connection.execution_options(yield_per=50000).execute(statement):
+        try:
+            index = seat_inventory.layout.index(seat_number)
+        except ValueError:
+            continue
+        taken_seats[(flight_number, day)] = taken_seats.get((flight_number, day), 0) | 1 << index
+    return taken_seats
+
+def insert_batches(connection, model, rows, batch_size: int):
+    for i in range(0, len(rows), batch_size):
+        connection.execute(insert(model), rows[i:i + batch_size])
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.generate")
+    parser.add_argument("--accounts", type=int, required=True)
+    parser.add_argument("--bookings-per-account", type=float, default=4.0, help="mean of the skewed distribution")
+    parser.add_argument("--airports", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=20000, help="rows per INSERT executemany")
+    parser.add_argument("--accounts-per-commit", type=int, default=50000)
+    parser.add_argument("--password", default="password", help="every generated account gets this password")
+    args = parser.parse_args()
+
+    #hashed once, bcrypt per account would take longer than all the inserts together
+    password_hash = pwd_context.hash(args.password)
+
+    with engine.begin() as connection:
+        class_ids, class_weights = ensure_reference_data(connection, args.airports)
+        airport_ids = connection.execute(select(models.Airport.id).order_by(models.Airport.id)).scalars().all()
+        first_account_id = next_id(connection, models.Account)
+        info_offset = next_id(connection, models.AccountInfo) - first_account_id
+        next_booking_id = itertools.count(next_id(connection, models.Booking))
+        next_flight_id = itertools.count(next_id(connection, models.Flight))
+        taken_seats = load_taken_seats(connection)
+
+    generator = Generator(random.Random(args.seed), airport_ids, args.bookings_per_account, password_hash, datetime(2024, 1, 1), taken_seats)
+    totals = {"accounts": 0, "bookings": 0, "flights": 0}
+    started = time.perf_counter()
+
+    for chunk_start in range(0, args.accounts, args.accounts_per_commit):
+        count = min(args.accounts_per_commit, args.accounts - chunk_start)
+        accounts, infos, bookings, flights = generator.rows_for_accounts(
+            first_account_id + chunk_start, count, info_offset, next_booking_id, next_flight_id, class_ids, class_weights
+        )
+
+        #one transaction per chunk, parents before children for the foreign keys
+        with engine.begin() as connection:
+            insert_batches(connection, models.Account, accounts, args.batch_size)
+            insert_batches(connection, models.AccountInfo, infos, args.batch_size)
+            insert_batches(connection, models.Booking, bookings, args.batch_size)
+            insert_batches(connection, models.Flight, flights, args.batch_size)
+
+        totals["accounts"] += len(accounts)
+        totals["bookings"] += len(bookings)
+        totals["flights"] += len(flights)
+        elapsed = time.perf_counter() - started
+        print(f"{totals['accounts']:>10} accounts {totals['bookings']:>11} bookings {totals['flights']:>11} flights "
+              f"{elapsed:8.1f}s ({totals['flights'] / elapsed:,.0f} flights/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import csv
+import json
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from .body import FlightImport
+
+FLIGHT_IMPORT_COLUMNS = ["booking_id", "flight_number", "seat_number", "status"]
+
+#splits an async byte stream into lines without holding more than one partial line
+async def iter_lines(stream, max_line_bytes: int):
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+
+        if len(buffer) > max_line_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Lines longer than {max_line_bytes} bytes are not accepted"
+            )
+
+    if buffer:
+        yield buffer
+
+#one NDJSON object or CSV row -> FlightImport, a bad row raises ValueError with a readable message
+#CSV files start with a header naming FLIGHT_IMPORT_COLUMNS (departure_date is an optional extra column), quoted fields may not span lines
+class FlightLineParser:
+    def __init__(self, format: str):
+        self.format = format
+        self.columns = None
+
+    #returns None for lines that carry no row (blank lines, the CSV header)
+    def parse(self, line: bytes):
+        text = line.decode("utf-8").strip()
+        if not text:
+            return None
+
+        if self.format == "csv":
+            values = next(csv.reader([text]))
+            if self.columns is None:
+                self.columns = [value.strip() for value in values]
+                missing = set(FLIGHT_IMPORT_COLUMNS) - set(self.columns)
+                if missing:
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail=f"CSV header is missing {', '.join(sorted(missing))}"
+                    )
+                return None
+            #an empty cell is a missing value, so departure_date may be left blank
+            data = {column: value for column, value in zip(self.columns, values) if value.strip()}
+        else:
+            data = json.loads(text)
+            if not isinstance(data, dict):
+                raise ValueError("Each line must be a JSON object")
+
+        try:
+            return FlightImport(**data)
+        except ValidationError as e:
+            error = e.errors()[0]
+            raise ValueError(f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}")
@@ -1,14 +1,36 @@
 from fastapi import FastAPI
-from .database import engine
-from .models import Base
-from .routers import accounts, airports, classes, info, bookings, flights, login
-
-Base.metadata.create_all(bind=engine)
-print("Tables successfully created")
-print("Database connected successfully")
+from .config import settings
+from .database import engine, pin_primary_after_write
+from .migrate import check_schema_version
+from .timing import TimingMiddleware
+from .metrics import MetricsMiddleware
+from .routers import accounts, airports, classes, info, bookings, flights, account_flights, seats, operations, health, metrics, login
+from .routers.aio import accounts as aio_accounts, info as aio_info, bookings as aio_bookings, flights as aio_flights
 
+#the schema is managed by python -m app.migrate, starting a worker runs no DDL
 app = FastAPI()
 
+if settings.schema_check:
+    @app.on_event("startup")
+    def verify_schema_version():
+        check_schema_version(engine)
+
+if settings.replica_urls:
+    app.middleware("http")(pin_primary_after_write)
+
+app.add_middleware(MetricsMiddleware)
+
+#added last so it is the outermost middleware and its total covers the others
+if settings.timing_sample_rate > 0:
+    app.add_middleware(TimingMiddleware)
+
+#async read routes are registered first so they match before the sync GET routes on the same paths
+if settings.database_async:
+    app.include_router(aio_accounts.router)
+    app.include_router(aio_info.router)
+    app.include_router(aio_bookings.router)
+    app.include_router(aio_flights.router)
+
 app.include_router(login.router)
 app.include_router(accounts.router)
 app.include_router(info.router)
@@ -16,4 +38,9 @@ app.include_router(airports.router)
 app.include_router(classes.router)
 app.include_router(bookings.router)
 app.include_router(flights.router)
+app.include_router(account_flights.router)
+app.include_router(seats.router)
+app.include_router(operations.router)
+app.include_router(health.router)
+app.include_router(metrics.router)
 
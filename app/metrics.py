@@ -0,0 +1,155 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from .timing import route_template
+
+#prometheus text format collectors
+#every thread writes only to its own shard (threading.local), so recording takes no lock,
+#the lock is only taken once per thread to register its shard and when /metrics sums them up
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HASH_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JWT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+
+#requests that matched no route share one label, raw paths would make a series per URL
+UNMATCHED_ROUTE = "unmatched"
+
+class ShardedMetric:
+    kind = None
+
+    def __init__(self, name: str, description: str, labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _shard(self):
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            shard = {}
+            self._local.values = shard
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    #list() of a dict is one C call under the GIL, so a shard can be copied while its thread writes to it
+    def _shard_items(self):
+        with self._lock:
+            shards = list(self._shards)
+        return [item for shard in shards for item in list(shard.items())]
+
+    def _labels(self, labels, extra=()):
+        pairs = list(zip(self.labelnames, labels)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self):
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"] + self._render_samples()
+
+class Counter(ShardedMetric):
+    kind = "counter"
+
+    def inc(self, labels=(), amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def _render_samples(self):
+        totals = {}
+        for labels, value in self._shard_items():
+            totals[labels] = totals.get(labels, 0) + value
+        return [f"{self.name}{self._labels(labels)} {value}" for labels, value in sorted(totals.items())]
+
+class Histogram(ShardedMetric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(buckets)
+
+    #entry = per-bucket counts (the last one is +Inf), then sum, then count
+    def observe(self, labels, seconds: float):
+        shard = self._shard()
+        entry = shard.get(labels)
+        if entry is None:
+            entry = shard[labels] = [0] * (len(self.buckets) + 3)
+        entry[bisect.bisect_left(self.buckets, seconds)] += 1
+        entry[-2] += seconds
+        entry[-1] += 1
+
+    @contextmanager
+    def time(self, labels=()):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(labels, time.perf_counter() - start)
+
+    def _render_samples(self):
+        totals = {}
+        for labels, entry in self._shard_items():
+            entry = list(entry)
+            total = totals.setdefault(labels, [0] * len(entry))
+            for i, value in enumerate(entry):
+                total[i] += value
+
+        lines = []
+        for labels, total in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), total):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {total[-2]}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {total[-1]}")
+        return lines
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REGISTRY = []
+
+requests_total = Counter("http_requests_total", "Requests by route template, method and status", ("route", "method", "status"))
+request_errors_total = Counter("http_request_errors_total", "Requests answered with a 5xx or an unhandled exception", ("route", "method"))
+request_duration = Histogram("http_request_duration_seconds", "Request latency by route template and method", ("route", "method"))
+password_hash_duration = Histogram("password_hash_duration_seconds", "bcrypt hash/verify time including the wait for a hashing process", ("operation",), HASH_BUCKETS)
+jwt_verify_duration = Histogram("jwt_verify_duration_seconds", "JWT signature checks on token cache misses", (), JWT_BUCKETS)
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return lines
+
+
+#plain ASGI middleware, one clock read at each end and three shard updates per request
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = route_template(scope) if "route" in scope else UNMATCHED_ROUTE
+            method = scope["method"]
+            requests_total.inc((route, method, str(status_code)))
+            request_duration.observe((route, method), time.perf_counter() - start)
+            if status_code >= 500:
+                request_errors_total.inc((route, method))
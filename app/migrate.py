@@ -0,0 +1,57 @@
+import argparse
+import os
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#schema changes are versioned scripts in migrations/versions, the app itself never runs DDL
+#usage:
+#python -m app.migrate                 upgrade to the latest revision
+#python -m app.migrate 0002            upgrade to a given revision
+#python -m app.migrate 0002 --downgrade go back to a given revision
+#python -m app.migrate --sql           print the DDL instead of running it
+#python -m app.migrate --stamp 0001    mark a database created by create_all as migrated, without running DDL
+#python -m app.migrate --current       show the revision the database is at
+def alembic_config():
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    return config
+
+def head_revision():
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+#cheap startup check - one SELECT on alembic_version, the scripts are read from disk
+def check_schema_version(engine):
+    with engine.connect() as connection:
+        current = MigrationContext.configure(connection).get_current_revision()
+
+    head = head_revision()
+    if current != head:
+        raise RuntimeError(f"Database schema is at revision {current}, this code needs {head} - run python -m app.migrate")
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.migrate")
+    parser.add_argument("revision", nargs="?", default="head")
+    parser.add_argument("--downgrade", action="store_true", help="go back to the given revision")
+    parser.add_argument("--sql", action="store_true", help="print the DDL instead of running it")
+    parser.add_argument("--stamp", metavar="REVISION", help="record REVISION without running DDL")
+    parser.add_argument("--current", action="store_true", help="show the revision the database is at")
+    args = parser.parse_args()
+
+    config = alembic_config()
+
+    if args.current:
+        command.current(config, verbose=True)
+    elif args.stamp:
+        command.stamp(config, args.stamp)
+    elif args.downgrade:
+        command.downgrade(config, args.revision, sql=args.sql)
+    else:
+        command.upgrade(config, args.revision, sql=args.sql)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from .database import Base
-from sqlalchemy import TIMESTAMP, Column, ForeignKey, Integer, String, Enum, Float, CheckConstraint, UniqueConstraint, null
-from sqlalchemy.sql.expression import text
+from .config import settings
+from sqlalchemy import TIMESTAMP, Column, ForeignKey, Integer, String, Enum, Float, Date, CheckConstraint, UniqueConstraint, Index, null
+from sqlalchemy.sql.expression import text, func
 import enum
 from sqlalchemy.orm import relationship
 
@@ -15,6 +16,16 @@ from sqlalchemy.orm import relationship
 
 #accounts/{account_id}/info/bookings
 #select * from bookings JOIN accounts_info ON accounts_info.id = bookings.account_info_id JOIN accounts ON accounts.id = accounts_info.account_id WHERE accounts.id == account_id
+
+#relationships are loaded by the loader plans in queries.py
+#with strict_loading on, anything a plan missed raises instead of issuing one SELECT per row
+LAZY = "raise_on_sql" if settings.strict_loading else "select"
+
+#server defaults (created_at, version) of an INSERT come back in the same statement through RETURNING where the backend
+#has it (SQLAlchemy's eager_defaults="auto"), on MySQL they are read on first access
+
+#created_at defaults use func.now() - now() on MySQL, CURRENT_TIMESTAMP on the SQLite files the benchmarks run on
+
 class ClassEnum(enum.Enum):
     economy = "economy"
     premium = "premium"
@@ -28,15 +39,29 @@ class FlightStatus(enum.Enum):
     delayed = "delayed"
     cancelled = "cancelled"
 
+#statuses a flight may move to from each status, cancelled is final
+#checked by the operator's bulk status update, single flight writes may set any status
+FLIGHT_STATUS_TRANSITIONS = {
+    FlightStatus.pending: {FlightStatus.boarding, FlightStatus.on_time, FlightStatus.delayed, FlightStatus.cancelled},
+    FlightStatus.on_time: {FlightStatus.boarding, FlightStatus.delayed, FlightStatus.cancelled},
+    FlightStatus.delayed: {FlightStatus.boarding, FlightStatus.on_time, FlightStatus.cancelled},
+    FlightStatus.boarding: {FlightStatus.delayed, FlightStatus.cancelled},
+    FlightStatus.cancelled: set()
+}
+
+#statuses a flight may be in to move to new_status
+def statuses_before(new_status: FlightStatus):
+    return [status for status, targets in FLIGHT_STATUS_TRANSITIONS.items() if new_status in targets]
+
 class Account(Base):
     __tablename__ = "accounts"
 
     id = Column(Integer, primary_key=True, nullable=False)
     email = Column(String(64), nullable=False, unique=True)
     password = Column(String(120), nullable=False)
-    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
     
-    account_info = relationship("AccountInfo", back_populates="account", uselist=False, cascade="all, delete")
+    account_info = relationship("AccountInfo", back_populates="account", uselist=False, cascade="all, delete", lazy=LAZY)
 
 class AccountInfo(Base):
     __tablename__ = "accounts_info"
@@ -45,11 +70,13 @@ class AccountInfo(Base):
     account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False, unique=True)
     first_name = Column(String(32), nullable=False)
     last_name = Column(String(32), nullable=False)
-    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    #bumped on every write to the account, its bookings or its flights - used for ETags
+    version = Column(Integer, nullable=False, server_default=text('1'))
 
-    account = relationship("Account", back_populates="account_info")
-    bookings = relationship("Booking", back_populates="account_info", cascade="all, delete")
-    flights = relationship("Flight", back_populates="account_info", cascade="all, delete")
+    account = relationship("Account", back_populates="account_info", lazy=LAZY)
+    bookings = relationship("Booking", back_populates="account_info", cascade="all, delete", lazy=LAZY)
+    flights = relationship("Flight", back_populates="account_info", cascade="all, delete", lazy=LAZY)
 
 class Airport(Base):
     __tablename__ = "airports"
@@ -59,8 +86,8 @@ class Airport(Base):
     country = Column(String(32), nullable=False)
     city = Column(String(32), nullable=False)
 
-    departures = relationship("Booking", back_populates="from_airport", foreign_keys="Booking.from_id")
-    arrivals = relationship("Booking", back_populates="to_airport", foreign_keys="Booking.to_id")
+    departures = relationship("Booking", back_populates="from_airport", foreign_keys="Booking.from_id", lazy=LAZY)
+    arrivals = relationship("Booking", back_populates="to_airport", foreign_keys="Booking.to_id", lazy=LAZY)
 
 
 class ClassType(Base):
@@ -69,7 +96,7 @@ class ClassType(Base):
     id = Column(Integer, primary_key=True, nullable=False)
     type = Column(Enum(ClassEnum, name="type_name", create_constraint=True), nullable=False, unique=True)
 
-    bookings = relationship("Booking", back_populates="class_type")
+    bookings = relationship("Booking", back_populates="class_type", lazy=LAZY)
 
 class Booking(Base):
     __tablename__ = "bookings"
@@ -81,17 +108,23 @@ class Booking(Base):
     to_id = Column(ForeignKey("airports.id"), nullable=False)
     departure_date = Column(TIMESTAMP(timezone=True), nullable=False)
     return_date = Column(TIMESTAMP(timezone=True), nullable=True)
-    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    #bumped on every write to the booking or its flights
+    version = Column(Integer, nullable=False, server_default=text('1'))
 
+    #booking search: route + date range, class + date range, date range alone
     __table_args__ = (
         CheckConstraint('from_id <> to_id', name='different_locations'),
+        Index('ix_bookings_route_departure', 'from_id', 'to_id', 'departure_date'),
+        Index('ix_bookings_class_departure', 'class_id', 'departure_date'),
+        Index('ix_bookings_departure', 'departure_date'),
     )
 
-    account_info = relationship("AccountInfo", back_populates="bookings")
-    class_type = relationship("ClassType", back_populates="bookings")
-    from_airport = relationship("Airport", foreign_keys=[from_id], back_populates="departures")
-    to_airport = relationship("Airport", foreign_keys=[to_id], back_populates="arrivals")
-    flights = relationship("Flight", back_populates="booking", cascade="all, delete")
+    account_info = relationship("AccountInfo", back_populates="bookings", lazy=LAZY)
+    class_type = relationship("ClassType", back_populates="bookings", lazy=LAZY)
+    from_airport = relationship("Airport", foreign_keys=[from_id], back_populates="departures", lazy=LAZY)
+    to_airport = relationship("Airport", foreign_keys=[to_id], back_populates="arrivals", lazy=LAZY)
+    flights = relationship("Flight", back_populates="booking", cascade="all, delete", lazy=LAZY)
 
 class Flight(Base):
     __tablename__ = "flights"
@@ -101,8 +134,18 @@ class Flight(Base):
     account_info_id = Column(ForeignKey("accounts_info.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
     flight_number = Column(String(32), nullable=False)
     seat_number = Column(String(32), nullable=False)
+    #day the flight leaves, a seat is sold once per flight number and day
+    departure_date = Column(Date, nullable=False)
     status = Column(Enum(FlightStatus, name="flight_status", create_constraint=True), nullable=False)
-    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    version = Column(Integer, nullable=False, server_default=text('1'))
+
+    #the flight status filter of the booking search is an EXISTS on (booking_id, status)
+    #uq_flights_seat also serves the seat map loads in seats.py
+    __table_args__ = (
+        Index('ix_flights_booking_status', 'booking_id', 'status'),
+        UniqueConstraint('flight_number', 'departure_date', 'seat_number', name='uq_flights_seat'),
+    )
 
-    booking = relationship("Booking", back_populates="flights")
-    account_info = relationship("AccountInfo", back_populates="flights")
+    booking = relationship("Booking", back_populates="flights", lazy=LAZY)
+    account_info = relationship("AccountInfo", back_populates="flights", lazy=LAZY)
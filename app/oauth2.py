@@ -1,9 +1,14 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from jose import JWTError, jwt
 from fastapi import Depends, status, HTTPException
 from datetime import datetime, timedelta
 from .body import TokenData
 from fastapi.security import OAuth2PasswordBearer
 from .config import settings
+from .metrics import jwt_verify_duration
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
@@ -13,6 +18,15 @@ ALGORITHM = settings.algorithm
 
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.token_minutes
 
+TOKEN_CACHE_SIZE = settings.token_cache_size
+
+#LRU of verified tokens - sha256(token) -> (TokenData, exp)
+#clients reuse one bearer token for many requests, so most requests skip the signature check
+#an entry is never served past the token's own exp claim
+_token_cache = OrderedDict()
+_token_cache_lock = threading.Lock()
+_token_cache_stats = {"hits": 0, "misses": 0}
+
 def create_token(data: dict):
     #create a copy of data
     to_encode = data.copy()
@@ -25,8 +39,15 @@ def create_token(data: dict):
     return encoded_jwt
 
 def verify_token(token, credentials_exception):
+    key = hashlib.sha256(token.encode()).digest()
+
+    token_data = _get_cached_token(key)
+    if token_data:
+        return token_data
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with jwt_verify_duration.time():
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         #user_id from login.py access toekn
         id = payload.get("user_id")
         if not id:
@@ -35,11 +56,69 @@ def verify_token(token, credentials_exception):
     except JWTError as e:
         raise credentials_exception
     
-    return TokenData(id=id)
+    token_data = TokenData(id=id)
+    _cache_token(key, token_data, payload.get("exp"))
+
+    return token_data
 
 def get_current_user(token = Depends(oauth2_scheme)):
     credentias_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                          detail="Could not validate credentials",
                                          headers={"WWW-Authenticate": "Bearer"})
 
-    return verify_token(token, credentias_exception)
\ No newline at end of file
+    return verify_token(token, credentias_exception)
+
+#same check for the async routes, run on the event loop instead of a threadpool thread
+#a cached token is a dict lookup, a miss one HMAC check, neither blocks the loop for long
+async def get_current_user_async(token = Depends(oauth2_scheme)):
+    return get_current_user(token)
+
+
+#TOKEN CACHE
+def _get_cached_token(key: bytes):
+    with _token_cache_lock:
+        entry = _token_cache.get(key)
+        if entry:
+            token_data, expires_at = entry
+            if expires_at > time.time():
+                _token_cache.move_to_end(key)
+                _token_cache_stats["hits"] += 1
+                return token_data
+
+            del _token_cache[key]
+
+        _token_cache_stats["misses"] += 1
+        return None
+
+def _cache_token(key: bytes, token_data: TokenData, expires_at):
+    #tokens without exp are verified every time
+    if TOKEN_CACHE_SIZE <= 0 or not expires_at:
+        return
+
+    with _token_cache_lock:
+        _token_cache[key] = (token_data, expires_at)
+        _token_cache.move_to_end(key)
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
+def token_cache_info():
+    with _token_cache_lock:
+        return {**_token_cache_stats, "size": len(_token_cache), "max_size": TOKEN_CACHE_SIZE}
+
+#prometheus lines for /metrics, the counters restart with the worker (and with clear_token_cache)
+def render_token_cache_metrics():
+    info = token_cache_info()
+    return [
+        "# HELP token_cache_hits_total Bearer tokens answered from the verified-token cache", "# TYPE token_cache_hits_total counter",
+        f"token_cache_hits_total {info['hits']}",
+        "# HELP token_cache_misses_total Bearer tokens that needed a JWT signature check", "# TYPE token_cache_misses_total counter",
+        f"token_cache_misses_total {info['misses']}",
+        "# HELP token_cache_size Verified tokens held in the cache", "# TYPE token_cache_size gauge",
+        f"token_cache_size {info['size']}",
+    ]
+
+def clear_token_cache():
+    with _token_cache_lock:
+        _token_cache.clear()
+        _token_cache_stats["hits"] = 0
+        _token_cache_stats["misses"] = 0
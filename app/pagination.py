@@ -0,0 +1,28 @@
+from fastapi import Query, Response
+from typing import Optional
+from .config import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+#query params shared by every list endpoint
+#cursor is the last id the client received, limit is capped server-side by max_page_size
+class PageParams:
+    def __init__(
+        self,
+        cursor: Optional[int] = Query(None, ge=0, description="Last id from the previous page"),
+        limit: int = Query(settings.page_size, ge=1, le=settings.max_page_size)
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+#PageParams for the async routes - a class dependency is called in the threadpool, an async def on the event loop
+async def get_page_params_async(
+    cursor: Optional[int] = Query(None, ge=0, description="Last id from the previous page"),
+    limit: int = Query(settings.page_size, ge=1, le=settings.max_page_size)
+):
+    return PageParams(cursor, limit)
+
+#clients keep requesting with ?cursor=<X-Next-Cursor> until the header is missing
+def set_next_cursor(response: Response, next_cursor: Optional[int]):
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(next_cursor)
@@ -0,0 +1,103 @@
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+#upper bounds in seconds of the checkout wait histogram, the last bucket is everything slower
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+#checkout counters of one pool, read by /health/pool
+#buckets are cumulative like a prometheus histogram (a 3ms wait counts in <=5ms and every bucket above)
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_sum = 0.0
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)
+
+    def record_wait(self, seconds: float, timed_out: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_seconds_sum += seconds
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.wait_buckets[i] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_sum": self.wait_seconds_sum,
+                "wait_buckets": {("+Inf" if bound == float("inf") else str(bound)): count for bound, count in zip(WAIT_BUCKETS, self.wait_buckets)},
+            }
+
+#times every checkout of a QueuePool, including the wait for a free connection and opening an overflow one
+class InstrumentedPool:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.stats.record_wait(time.perf_counter() - start, timed_out)
+
+    #stats survive engine.dispose(), which swaps in a fresh pool
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+class InstrumentedQueuePool(InstrumentedPool, QueuePool):
+    pass
+
+#the pool of the async engines, same queue with the waits run through the greenlet adapter
+class InstrumentedAsyncQueuePool(InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+def pool_status(pool):
+    status = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        #overflow() starts at -size and counts up as connections are opened, only the positive part is in use
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout_seconds": pool.timeout(),
+    }
+    status.update(pool.stats.snapshot())
+    return status
+
+#prometheus lines for /metrics, pools is [(engine label, pool)]
+def render_pool_metrics(pools):
+    gauges = [
+        ("db_pool_size", "Connections the pool keeps open", lambda status: status["size"]),
+        ("db_pool_checked_out", "Connections in use", lambda status: status["checked_out"]),
+        ("db_pool_overflow", "Overflow connections in use", lambda status: status["overflow"]),
+    ]
+    statuses = [(label, pool_status(pool)) for label, pool in pools]
+
+    lines = []
+    for name, description, value in gauges:
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} gauge"]
+        lines += [f'{name}{{engine="{label}"}} {value(status)}' for label, status in statuses]
+
+    lines += ["# HELP db_pool_checkout_timeouts_total Checkouts that gave up after pool_timeout", "# TYPE db_pool_checkout_timeouts_total counter"]
+    lines += [f'db_pool_checkout_timeouts_total{{engine="{label}"}} {status["timeouts"]}' for label, status in statuses]
+
+    lines += ["# HELP db_pool_checkout_wait_seconds Time to get a connection from the pool", "# TYPE db_pool_checkout_wait_seconds histogram"]
+    for label, status in statuses:
+        for bound, count in status["wait_buckets"].items():
+            lines.append(f'db_pool_checkout_wait_seconds_bucket{{engine="{label}",le="{bound}"}} {count}')
+        lines.append(f'db_pool_checkout_wait_seconds_sum{{engine="{label}"}} {status["wait_seconds_sum"]}')
+        lines.append(f'db_pool_checkout_wait_seconds_count{{engine="{label}"}} {status["checkouts"]}')
+    return lines
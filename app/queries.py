@@ -1,9 +1,67 @@
 from . import models
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, select, insert, update, literal, union_all
+from sqlalchemy.orm import Session, Query, joinedload, selectinload, contains_eager
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+
+#LOADER PLANS
+#every relationship a response model reads is loaded up front, so serializing a page costs
+#a fixed number of SELECTs instead of one per relationship per row
+#many-to-one -> joinedload (same statement), collections -> selectinload (one IN query per level)
+
+#BookingResponse
+def booking_loader_options():
+    return (*booking_reference_options(), selectinload(models.Booking.flights))
+
+def booking_reference_options():
+    return (
+        joinedload(models.Booking.class_type),
+        joinedload(models.Booking.from_airport),
+        joinedload(models.Booking.to_airport)
+    )
+
+#FlightResponse
+def flight_loader_options():
+    return (joinedload(models.Flight.booking),)
+
+#AccountInfoResponse
+def account_info_loader_options():
+    return (
+        selectinload(models.AccountInfo.bookings).options(*booking_loader_options()),
+        selectinload(models.AccountInfo.flights)
+    )
+
+#AccountResponse
+def account_loader_options():
+    return (
+        selectinload(models.Account.account_info).options(*account_info_loader_options()),
+    )
+
 
 def get_account_query(db: Session, account_id: int):
     return db.query(models.Account).filter(models.Account.id == account_id)
 
+#AccountResponse for the account PUT/PATCH in three SELECTs - the info joined onto the account, its bookings, its flights
+#a flight belongs to its booking's account info, so each booking's flights are picked out of the info's flights
+#instead of a second flights IN query
+def get_account_tree(db: Session, account_id: int):
+    account = get_account_query(db, account_id).options(
+        joinedload(models.Account.account_info).options(
+            selectinload(models.AccountInfo.bookings).options(*booking_reference_options()),
+            selectinload(models.AccountInfo.flights)
+        )
+    ).first()
+
+    if account is not None and account.account_info is not None:
+        booking_flights = {booking.id: [] for booking in account.account_info.bookings}
+        for flight in account.account_info.flights:
+            booking_flights[flight.booking_id].append(flight)
+        for booking in account.account_info.bookings:
+            set_committed_value(booking, "flights", booking_flights[booking.id])
+    return account
+
 def get_account_info_query(db: Session, account_id: int):
     return db.query(models.AccountInfo).filter(models.AccountInfo.account_id == account_id)
 
@@ -57,4 +115,317 @@ def get_flight_for_booking(db: Session, account_id: int, booking_id: int, flight
             models.Flight.booking_id == booking_id
         )
 
-#db.query(models.AccountInfo).filter(models.AccountInfo.id == info_id, models.AccountInfo.account_id == account_id) - 2 info.py
\ No newline at end of file
+#resolves every level of a nested route in one round trip, a missing level comes back as NULL
+#SELECT accounts.id, accounts_info.*, bookings.*, flights.* FROM accounts
+#LEFT JOIN accounts_info ON accounts_info.account_id = accounts.id
+#LEFT JOIN bookings ON bookings.account_info_id = accounts_info.id AND bookings.id = booking_id
+#LEFT JOIN flights ON flights.booking_id = bookings.id AND flights.account_info_id = accounts_info.id AND flights.id = flight_id
+#WHERE accounts.id = account_id
+#the booking columns of the row also fill flight.booking, so a FlightResponse needs no further load
+#built with select() so the sync and async sessions run the same statement
+def ownership_statement(account_id: int, booking_id: int = None, flight_id: int = None):
+    entities = [models.Account.id, models.AccountInfo]
+    if booking_id is not None:
+        entities.append(models.Booking)
+    if flight_id is not None:
+        entities.append(models.Flight)
+
+    statement = select(*entities).select_from(models.Account).outerjoin(
+        models.AccountInfo, models.AccountInfo.account_id == models.Account.id
+    )
+
+    if booking_id is not None:
+        statement = statement.outerjoin(models.Booking, and_(
+            models.Booking.account_info_id == models.AccountInfo.id,
+            models.Booking.id == booking_id
+        ))
+
+    if flight_id is not None:
+        statement = statement.outerjoin(models.Flight, and_(
+            models.Flight.booking_id == models.Booking.id,
+            models.Flight.account_info_id == models.AccountInfo.id,
+            models.Flight.id == flight_id
+        )).options(contains_eager(models.Flight.booking))
+
+    return statement.where(models.Account.id == account_id)
+
+
+#SEARCH
+#operator booking search, each filter lines up with one of the composite indexes on bookings
+#SELECT * FROM bookings WHERE from_id = ? AND to_id = ? AND departure_date BETWEEN ? AND ?
+#AND EXISTS (SELECT 1 FROM flights WHERE flights.booking_id = bookings.id AND flights.status = ?)
+def search_bookings_query(db: Session, filters):
+    query = db.query(models.Booking)
+
+    if filters.from_id is not None:
+        query = query.filter(models.Booking.from_id == filters.from_id)
+    if filters.to_id is not None:
+        query = query.filter(models.Booking.to_id == filters.to_id)
+    if filters.class_id is not None:
+        query = query.filter(models.Booking.class_id == filters.class_id)
+    if filters.departure_from is not None:
+        query = query.filter(models.Booking.departure_date >= filters.departure_from)
+    if filters.departure_to is not None:
+        query = query.filter(models.Booking.departure_date <= filters.departure_to)
+    if filters.status is not None:
+        query = query.filter(models.Booking.flights.any(models.Flight.status == filters.status))
+
+    return query
+#BULK
+#existence of every referenced airport and class in one statement
+#SELECT 'airport', id FROM airports WHERE id IN (...) UNION ALL SELECT 'class', id FROM classes WHERE id IN (...)
+def get_existing_reference_ids(db: Session, airport_ids, class_ids):
+    statement = union_all(
+        select(literal("airport"), models.Airport.id).where(models.Airport.id.in_(airport_ids)),
+        select(literal("class"), models.ClassType.id).where(models.ClassType.id.in_(class_ids))
+    )
+
+    found = {"airport": set(), "class": set()}
+    for kind, id in db.execute(statement):
+        found[kind].add(id)
+
+    return found["airport"], found["class"]
+
+#which of booking_ids belong to the account info, with their departure dates - one IN query per import chunk
+def get_owned_booking_departures(db: Session, account_info_id: int, booking_ids):
+    return dict(db.execute(
+        select(models.Booking.id, models.Booking.departure_date).where(
+            models.Booking.account_info_id == account_info_id,
+            models.Booking.id.in_(booking_ids)
+        )
+    ).all())
+
+#one multi-row INSERT ... VALUES (...), (...) and the new ids in input order
+#with RETURNING where the backend has it, otherwise from LAST_INSERT_ID() - InnoDB gives
+#the rows of a single simple INSERT consecutive ids
+def bulk_insert(db: Session, model, rows):
+    statement = insert(model).values(rows)
+
+    if db.get_bind().dialect.insert_returning:
+        result = db.execute(statement.returning(model.id))
+        return [row.id for row in result]
+
+    first_id = db.execute(statement).lastrowid
+    return list(range(first_id, first_id + len(rows)))
+
+#every flight of one flight number and day that is in one of previous_statuses, a prefix of uq_flights_seat
+def flight_day_condition(flight_number: str, departure_date, previous_statuses):
+    return and_(
+        models.Flight.flight_number == flight_number,
+        models.Flight.departure_date == departure_date,
+        models.Flight.status.in_(previous_statuses)
+    )
+
+#one status change for every passenger of a flight - the same four statements however many rows match
+#UPDATE accounts_info SET version = version + 1 WHERE id IN (SELECT account_info_id FROM flights WHERE ...)
+#UPDATE bookings SET version = version + 1 WHERE id IN (SELECT booking_id FROM flights WHERE ...)
+#SELECT flights.id, ..., accounts_info.account_id FROM flights JOIN accounts_info ... WHERE ... FOR UPDATE
+#UPDATE flights SET status = ?, version = version + 1 WHERE id IN (...)
+#the flights are locked after their infos and bookings, the usual order, and the UPDATE changes exactly the rows read
+#returns the changed flights with their account ids, for the status events
+def update_flight_day_status(db: Session, flight_number: str, departure_date, new_status, previous_statuses):
+    condition = flight_day_condition(flight_number, departure_date, previous_statuses)
+
+    db.execute(
+        update(models.AccountInfo).where(
+            models.AccountInfo.id.in_(select(models.Flight.account_info_id).where(condition))
+        ).values(version=models.AccountInfo.version + 1).execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(models.Booking).where(
+            models.Booking.id.in_(select(models.Flight.booking_id).where(condition))
+        ).values(version=models.Booking.version + 1).execution_options(synchronize_session=False)
+    )
+    flights = db.execute(
+        select(
+            models.Flight.id, models.Flight.booking_id, models.Flight.flight_number, models.Flight.departure_date,
+            models.AccountInfo.account_id
+        ).join(
+            models.AccountInfo, models.AccountInfo.id == models.Flight.account_info_id
+        ).where(condition).with_for_update(of=models.Flight)
+    ).all()
+
+    if flights:
+        db.execute(
+            update(models.Flight).where(models.Flight.id.in_([flight.id for flight in flights])).values(
+                status=new_status, version=models.Flight.version + 1
+            ).execution_options(synchronize_session=False)
+        )
+    return flights
+
+
+#VERSIONS
+#responses embed their children (AccountInfoResponse.bookings, BookingResponse.flights),
+#so a write bumps the version of every row above the one it changed
+#always info -> booking -> flight, the same order the row locks are taken in
+def bump_versions(db: Session, account_id: int, booking_id: int = None):
+    db.query(models.AccountInfo).filter(models.AccountInfo.account_id == account_id).update(
+        {models.AccountInfo.version: models.AccountInfo.version + 1}, synchronize_session=False
+    )
+
+    if booking_id is not None:
+        bump_booking_versions(db, [booking_id])
+
+def bump_booking_versions(db: Session, booking_ids):
+    db.query(models.Booking).filter(models.Booking.id.in_(booking_ids)).update(
+        {models.Booking.version: models.Booking.version + 1}, synchronize_session=False
+    )
+
+def bump_booking_statement(booking_id: int):
+    return update(models.Booking).where(models.Booking.id == booking_id).values(
+        version=models.Booking.version + 1
+    ).execution_options(synchronize_session=False)
+
+#conditional UPDATEs for PUT/PATCH - ownership, the If-Match versions and the version bump in one statement
+#no row updated = missing, not owned, or changed since the client read it
+def owned_account_info_id(account_id: int):
+    return select(models.AccountInfo.id).where(models.AccountInfo.account_id == account_id).scalar_subquery()
+
+def update_booking_statement(account_id: int, booking_id: int, values: dict, versions=None):
+    statement = update(models.Booking).where(
+        models.Booking.id == booking_id,
+        models.Booking.account_info_id == owned_account_info_id(account_id)
+    ).values(**values, version=models.Booking.version + 1)
+
+    if versions is not None:
+        statement = statement.where(models.Booking.version.in_(versions))
+    return statement.execution_options(synchronize_session=False)
+
+def update_flight_statement(account_id: int, booking_id: int, flight_id: int, values: dict, versions=None):
+    statement = update(models.Flight).where(
+        models.Flight.id == flight_id,
+        models.Flight.booking_id == booking_id,
+        models.Flight.account_info_id == owned_account_info_id(account_id)
+    ).values(**values, version=models.Flight.version + 1)
+
+    if versions is not None:
+        statement = statement.where(models.Flight.version.in_(versions))
+    return statement.execution_options(synchronize_session=False)
+
+#WRITES
+#a write route answers with the row it wrote, never with a SELECT after the commit
+def supports_returning(db: Session):
+    return db.get_bind().dialect.update_returning
+
+#the row an UPDATE changed, as it is after the write - from RETURNING in the same statement where the backend
+#has it, otherwise one SELECT by id in the same transaction (options = loader plan for that SELECT)
+#None when the UPDATE matched no row
+def update_returning(db: Session, statement, model, id: int, options=()):
+    if supports_returning(db):
+        return db.scalars(statement.returning(model).execution_options(populate_existing=True)).first()
+
+    if db.execute(statement).rowcount == 0:
+        return None
+    return db.scalars(
+        select(model).where(model.id == id).options(*options).execution_options(populate_existing=True)
+    ).first()
+
+#UPDATE ... WHERE id = ? of a row with no owner (airports, classes), an empty PATCH only reads the row
+def update_by_id(db: Session, model, id: int, values: dict):
+    if not values:
+        return db.get(model, id)
+    return update_returning(db, update(model).where(model.id == id).values(**values), model, id)
+
+#the flight's booking rides along with the booking version bump where RETURNING is available,
+#otherwise bump_booking_versions + one SELECT of the flight joined to its booking
+def update_flight_returning(db: Session, account_id: int, booking_id: int, flight_id: int, values: dict, versions=None):
+    bump_versions(db, account_id)
+    if not supports_returning(db):
+        bump_booking_versions(db, [booking_id])
+        return update_returning(db, update_flight_statement(account_id, booking_id, flight_id, values, versions),
+                                models.Flight, flight_id, flight_loader_options())
+
+    booking = update_returning(db, bump_booking_statement(booking_id), models.Booking, booking_id)
+    flight = update_returning(db, update_flight_statement(account_id, booking_id, flight_id, values, versions), models.Flight, flight_id)
+    if flight is not None:
+        set_committed_value(flight, "booking", booking)
+    return flight
+
+def get_booking_flights(db: Session, booking_id: int):
+    return db.scalars(select(models.Flight).where(models.Flight.booking_id == booking_id)).all()
+
+#version-only lookups for conditional GETs, same columns as the ETag set from a loaded row
+def account_info_version_statement(account_id: int):
+    return select(models.AccountInfo.id, models.AccountInfo.version).where(models.AccountInfo.account_id == account_id)
+
+def booking_version_statement(account_id: int, booking_id: int):
+    return select(models.Booking.id, models.Booking.version).join(
+        models.AccountInfo, models.AccountInfo.id == models.Booking.account_info_id
+    ).where(
+        models.AccountInfo.account_id == account_id,
+        models.Booking.id == booking_id
+    )
+
+def flight_version_statement(account_id: int, booking_id: int, flight_id: int):
+    return select(models.Flight.id, models.Flight.version, models.Booking.version).join(
+        models.Booking, models.Booking.id == models.Flight.booking_id
+    ).join(
+        models.AccountInfo, models.AccountInfo.id == models.Flight.account_info_id
+    ).where(
+        models.AccountInfo.account_id == account_id,
+        models.Flight.booking_id == booking_id,
+        models.Flight.id == flight_id
+    )
+
+
+#keyset pagination - SELECT ... WHERE id > cursor ORDER BY id LIMIT limit + 1
+#the extra row only tells us whether there is a next page, so no COUNT(*) is needed
+def paginate(query: Query, column, cursor: Optional[int], limit: int):
+    if cursor is not None:
+        query = query.filter(column > cursor)
+
+    rows = query.order_by(column).limit(limit + 1).all()
+    return split_page(rows, column, limit)
+
+def split_page(rows, column, limit: int):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = getattr(rows[-1], column.key)
+
+    return rows, next_cursor
+
+
+#ASYNC VERSIONS
+#same queries as above for AsyncSession, which has no legacy db.query() API
+
+def select_account(account_id: int):
+    return select(models.Account).where(models.Account.id == account_id)
+
+def select_booking_for_account(account_id: int, booking_id: int = None):
+    statement = select(models.Booking).join(
+        models.AccountInfo, models.AccountInfo.id == models.Booking.account_info_id
+    ).where(models.AccountInfo.account_id == account_id)
+
+    if booking_id:
+        statement = statement.where(models.Booking.id == booking_id)
+
+    return statement
+
+def select_flight_for_booking(account_id: int, booking_id: int, flight_id: int = None):
+    statement = select(models.Flight).join(
+        models.AccountInfo, models.AccountInfo.id == models.Flight.account_info_id
+    ).where(
+        models.AccountInfo.account_id == account_id,
+        models.Flight.booking_id == booking_id
+    )
+
+    if flight_id:
+        statement = statement.where(models.Flight.id == flight_id)
+
+    return statement
+
+async def get_account_async(db: AsyncSession, account_id: int, options=()):
+    result = await db.execute(select_account(account_id).options(*options))
+    return result.scalars().first()
+
+async def get_ownership_async(db: AsyncSession, account_id: int, booking_id: int = None, flight_id: int = None, options=()):
+    result = await db.execute(ownership_statement(account_id, booking_id, flight_id).options(*options))
+    return result.first()
+
+async def paginate_async(db: AsyncSession, statement, column, cursor: Optional[int], limit: int):
+    if cursor is not None:
+        statement = statement.where(column > cursor)
+
+    result = await db.execute(statement.order_by(column).limit(limit + 1))
+    return split_page(result.scalars().all(), column, limit)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
-from datetime import datetime
+from typing import Optional, List, Dict
+from datetime import datetime, date
 from .models import ClassEnum, FlightStatus
 
 
@@ -28,6 +28,7 @@ class FlightNested(BaseModel):
     id: int
     flight_number: str
     seat_number: str
+    departure_date: date
     status: FlightStatus
     created_at: datetime
 
@@ -51,6 +52,7 @@ class FlightResponse(BaseModel):
     id: int
     flight_number: str
     seat_number: str
+    departure_date: date
     status: FlightStatus
     created_at: datetime
 
@@ -107,4 +109,81 @@ class AccountResponse(BaseModel):
     account_info: Optional[AccountInfoResponse]
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+# BULK RESPONSES
+
+class BulkItemResult(BaseModel):
+    index: int
+    status: int
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class BulkBookingResponse(BaseModel):
+    created: int
+    rejected: int
+    results: List[BulkItemResult]
+
+
+class ImportLineError(BaseModel):
+    line: int
+    detail: str
+
+
+class ImportSummary(BaseModel):
+    accepted: int
+    rejected: int
+    #first import_max_errors rejected lines only
+    errors: List[ImportLineError] = []
+
+
+# SEAT RESPONSES
+
+class SeatMapResponse(BaseModel):
+    flight_number: str
+    departure_date: date
+    capacity: int
+    available: int
+    taken: List[str]
+
+
+class SeatAvailabilityResponse(BaseModel):
+    flight_number: str
+    departure_date: date
+    seat_number: str
+    available: bool
+
+
+# OPERATIONS RESPONSES
+
+class FlightStatusUpdateResponse(BaseModel):
+    flight_number: str
+    departure_date: date
+    status: FlightStatus
+    #flights that were in a status allowed to change to this one, the others are left as they are
+    updated: int
+
+
+# HEALTH RESPONSES
+
+class PoolStatus(BaseModel):
+    size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    max_overflow: int
+    timeout_seconds: float
+
+    # Since the worker started
+    checkouts: int
+    timeouts: int
+    wait_seconds_sum: float
+    #cumulative counts of checkouts that waited at most <key> seconds
+    wait_buckets: Dict[str, int]
+
+
+#the primary's sync pool, with the async engine's pool next to it when DATABASE_ASYNC is on
+class PoolStatusResponse(PoolStatus):
+    async_pool: Optional[PoolStatus] = None
@@ -0,0 +1,171 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from typing import Literal
+from types import SimpleNamespace
+from ..database import get_db
+from .. import models
+from ..body import TokenData
+from ..response import ImportSummary
+from ..oauth2 import get_current_user
+from ..status_codes import validate_account_ownership
+from ..dependencies import Ownership, OwnedAccount
+from ..queries import get_owned_booking_departures, bump_versions, bump_booking_versions, bulk_insert
+from ..imports import iter_lines, FlightLineParser
+from ..seats import seat_inventory, is_seat_conflict
+from ..events import flight_events, flight_status_event
+from ..config import settings
+from ..timing import TimedRoute
+
+#flight routes that span every booking of an account
+router = APIRouter(
+    prefix="/accounts/{account_id}/flights",
+    tags=["Flights"],
+    route_class=TimedRoute
+)
+
+#Server-Sent Events of the account's flight status writes, a flight_status event per created flight or status write
+#and a resync event when the stream fell more than FLIGHT_EVENTS_BUFFER events behind
+#the token is the only check, so an open stream holds no database session
+@router.get("/events", response_class=StreamingResponse)
+async def flight_status_events(account_id: int, current_user: TokenData = Depends(get_current_user)):
+    validate_account_ownership(account_id, current_user.id)
+    subscription = flight_events.subscribe(account_id)
+
+    return StreamingResponse(
+        flight_events.stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+#streams the upload line by line, memory stays at one chunk of rows whatever the file size
+#body is NDJSON (one Flight + booking_id object per line) or CSV with a header row
+#every chunk is ownership-checked with one query, inserted with one multi-row INSERT and committed
+#seats are held in the seat bitmaps line by line, a taken seat rejects only its line
+#a line over IMPORT_MAX_LINE_BYTES stops the upload with 413, the lines before it are still saved
+#and the detail carries the summary of what was, with the line the client can resume from
+@router.post("/import", response_model=ImportSummary)
+async def import_flights(account_id: int, request: Request, format: Literal["ndjson", "csv"] = Query("ndjson"), 
+                         db: Session = Depends(get_db), owned: Ownership = Depends(OwnedAccount(require_account_info=True))):
+    account_info_id = owned.account_info.id
+    #the ownership check is done, its connection goes back to the pool while the body is read
+    #every chunk takes one for its own transaction
+    db.close()
+
+    summary = {"accepted": 0, "rejected": 0, "errors": []}
+    parser = FlightLineParser(format)
+    chunk = []
+
+    def reject(line_number: int, detail: str):
+        summary["rejected"] += 1
+        if len(summary["errors"]) < settings.import_max_errors:
+            summary["errors"].append({"line": line_number, "detail": detail})
+
+    line_number = 0
+    try:
+        async for line in iter_lines(request.stream(), settings.import_max_line_bytes):
+            line_number += 1
+            try:
+                flight = parser.parse(line)
+            except ValueError as e:
+                reject(line_number, str(e))
+                continue
+
+            if flight is None:
+                continue
+
+            chunk.append((line_number, flight))
+            if len(chunk) >= settings.import_chunk_size:
+                await run_in_threadpool(insert_flight_chunk, db, account_id, account_info_id, chunk, summary, reject)
+                chunk = []
+
+    except HTTPException as http_error:
+        if http_error.status_code != status.HTTP_413_REQUEST_ENTITY_TOO_LARGE:
+            raise http_error
+
+        if chunk:
+            await run_in_threadpool(insert_flight_chunk, db, account_id, account_info_id, chunk, summary, reject)
+        raise HTTPException(status_code=http_error.status_code,
+                            detail={"message": http_error.detail, "resume_at_line": line_number + 1, **summary})
+
+    if chunk:
+        await run_in_threadpool(insert_flight_chunk, db, account_id, account_info_id, chunk, summary, reject)
+
+    return summary
+
+#saves made of one chunk when seats conflict with other workers' writes, see insert_flight_chunk
+SEAT_CONFLICT_ATTEMPTS = 3
+
+#the session is closed after every chunk, so no connection is held between chunks while the body is read
+#a seat another worker sold since the bitmap was loaded fails the INSERT of the whole chunk: the bitmaps of the
+#chunk are reloaded and it is saved again, the sold seats are now rejected line by line and the others go in
+def insert_flight_chunk(db: Session, account_id: int, account_info_id: int, chunk, summary, reject):
+    rejected = {}
+    try:
+        for attempt in range(1, SEAT_CONFLICT_ATTEMPTS + 1):
+            rejected = {}
+            try:
+                summary["accepted"] += save_flight_chunk(db, account_id, account_info_id, chunk, rejected)
+                break
+            except IntegrityError as e:
+                if not is_seat_conflict(e) or attempt == SEAT_CONFLICT_ATTEMPTS:
+                    raise
+
+    except Exception as e:
+        print(f"{e}")
+        for line_number, _ in chunk:
+            rejected.setdefault(line_number, "Chunk could not be saved")
+
+    finally:
+        db.close()
+
+    for line_number, detail in sorted(rejected.items()):
+        reject(line_number, detail)
+
+#one attempt at a chunk, returns the rows saved and fills rejected with line number -> detail
+#rolled back on any error, with the chunk's seat bitmaps marked for a reload
+def save_flight_chunk(db: Session, account_id: int, account_info_id: int, chunk, rejected: dict):
+    rows, holds = [], []
+    try:
+        departures = get_owned_booking_departures(db, account_info_id, {flight.booking_id for _, flight in chunk})
+
+        for line_number, flight in chunk:
+            if flight.booking_id not in departures:
+                rejected[line_number] = f"Booking with id {flight.booking_id} was not found"
+                continue
+
+            flight_data = flight.dict()
+            flight_data["account_info_id"] = account_info_id
+            flight_data["departure_date"] = flight.departure_date or departures[flight.booking_id].date()
+
+            try:
+                hold = seat_inventory.hold(db, flight_data["flight_number"], flight_data["departure_date"], flight.seat_number)
+            except ValueError as e:
+                rejected[line_number] = str(e)
+                continue
+
+            flight_data["seat_number"] = seat_inventory.layout.label(hold[1])
+            rows.append(flight_data)
+            holds.append(hold)
+
+        if not rows:
+            return 0
+
+        flight_ids = bulk_insert(db, models.Flight, rows)
+        bump_versions(db, account_id)
+        bump_booking_versions(db, {row["booking_id"] for row in rows})
+        db.commit()
+
+    except Exception:
+        db.rollback()
+        seat_inventory.cancel(holds, stale=True)
+        raise
+
+    seat_inventory.confirm(holds)
+
+    #announced like a single create, one flight_status event per imported flight
+    for flight_id, row in zip(flight_ids, rows):
+        flight_events.publish(account_id, flight_status_event(SimpleNamespace(id=flight_id, **row), row["status"]))
+    return len(rows)
@@ -1,35 +1,43 @@
-from fastapi import APIRouter, status, HTTPException, Depends
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response
 from ..body import Account, TokenData
 from ..response import AccountResponse
 from ..updates import AccountPatch, AccountPut
 from sqlalchemy.orm import Session
-from ..database import get_db
+from ..database import get_db, get_read_db
 from .. import models
 from ..utils import hash
 from typing import List
 from ..oauth2 import get_current_user
 from ..status_codes import validate_account_exists, validate_account_ownership
-from ..queries import get_account_query
+from ..queries import get_account_query, get_account_tree, paginate, account_loader_options, bump_versions, account_info_version_statement
+from ..pagination import PageParams, set_next_cursor
+from ..etags import wants_revalidation, raise_if_not_modified, set_etag
+from ..timing import TimedRoute, statement_budget
 
 router = APIRouter(
     prefix="/accounts",
-    tags=["Accounts"]
+    tags=["Accounts"],
+    route_class=TimedRoute
 )
 
 @router.get("/", response_model=List[AccountResponse])
-def get_all_accounts(db: Session = Depends(get_db)):
-    accounts = db.query(models.Account).all()
+def get_all_accounts(response: Response, page: PageParams = Depends(), db: Session = Depends(get_read_db)):
+    accounts_query = db.query(models.Account).options(*account_loader_options())
+    accounts, next_cursor = paginate(accounts_query, models.Account.id, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
     return accounts
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=AccountResponse)
+@statement_budget(2, returning=1)
 def create_account(account: Account, db: Session = Depends(get_db)):
     try:
         account.password = hash(account.password)
 
-        created_account = models.Account(**account.dict())
+        #a new account has no info yet, the response needs nothing but the INSERT
+        created_account = models.Account(**account.dict(), account_info=None)
         db.add(created_account)
         db.commit()
-        db.refresh(created_account)
+
         return created_account
     
     except HTTPException as http_error:
@@ -40,15 +48,23 @@ def create_account(account: Account, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @router.get("/{account_id}", response_model=AccountResponse)
-def get_account(account_id: int, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+def get_account(account_id: int, request: Request, response: Response, db: Session = Depends(get_read_db), current_user: TokenData = Depends(get_current_user)):
     validate_account_ownership(account_id, current_user.id)
 
-    account = get_account_query(db, account_id).first()
+    #the account info version covers the whole account tree, accounts without info get no ETag
+    if wants_revalidation(request):
+        raise_if_not_modified(request, "account", db.execute(account_info_version_statement(account_id)).first())
+
+    account = get_account_query(db, account_id).options(*account_loader_options()).first()
     validate_account_exists(account, account_id)
+
+    if account.account_info:
+        set_etag(response, "account", account.account_info.id, account.account_info.version)
     
     return account
 
 @router.delete("/{account_id}", status_code=status.HTTP_204_NO_CONTENT)
+@statement_budget(2)
 def delete_account(account_id: int, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
     try:
         validate_account_ownership(account_id, current_user.id)
@@ -69,20 +85,23 @@ def delete_account(account_id: int, db: Session = Depends(get_db), current_user:
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @router.put("/{account_id}", response_model=AccountResponse)
+@statement_budget(5)
 def put_account(account_id: int, account: AccountPut, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
     try:
         validate_account_ownership(account_id, current_user.id)
         
-        account_query = get_account_query(db, account_id)
-        existing_account = account_query.first()
+        #the tree the response needs is loaded once up front, the changed columns are written from it at commit
+        existing_account = get_account_tree(db, account_id)
         validate_account_exists(existing_account, account_id)
 
         account.password = hash(account.password)
 
-        account_query.update(account.dict(), synchronize_session=False)
+        for field, value in account.dict().items():
+            setattr(existing_account, field, value)
+        bump_versions(db, account_id)
         db.commit()
 
-        return account_query.first()
+        return existing_account
     
     except HTTPException as http_error:
         raise http_error
@@ -92,21 +111,24 @@ def put_account(account_id: int, account: AccountPut, db: Session = Depends(get_
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @router.patch("/{account_id}", response_model=AccountResponse)
+@statement_budget(5)
 def patch_account(account_id: int, account: AccountPatch, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
     try:
         validate_account_ownership(account_id, current_user.id)
         
-        account_query = get_account_query(db, account_id)
-        existing_account = account_query.first()
+        #the tree the response needs is loaded once up front, the changed columns are written from it at commit
+        existing_account = get_account_tree(db, account_id)
         validate_account_exists(existing_account, account_id)
 
         if account.password:
             account.password = hash(account.password)
-            
-        account_query.update(account.dict(exclude_unset=True), synchronize_session=False)
+
+        for field, value in account.dict(exclude_unset=True).items():
+            setattr(existing_account, field, value)
+        bump_versions(db, account_id)
         db.commit()
 
-        return account_query.first()
+        return existing_account
     
     except HTTPException as http_error:
         raise http_error
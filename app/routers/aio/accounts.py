@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...body import TokenData
+from ...response import AccountResponse
+from ...database import get_async_read_db
+from ... import models
+from typing import List
+from ...oauth2 import get_current_user_async
+from ...status_codes import validate_account_exists, validate_account_ownership
+from ...queries import get_account_async, paginate_async, account_loader_options, account_info_version_statement
+from ...pagination import PageParams, get_page_params_async, set_next_cursor
+from ...etags import wants_revalidation, raise_if_not_modified, set_etag
+from ...timing import TimedRoute
+
+#read routes served from AsyncSession, writes stay on routers/accounts.py
+router = APIRouter(
+    prefix="/accounts",
+    tags=["Accounts"],
+    route_class=TimedRoute
+)
+
+@router.get("/", response_model=List[AccountResponse])
+async def get_all_accounts(response: Response, page: PageParams = Depends(get_page_params_async), db: AsyncSession = Depends(get_async_read_db)):
+    accounts_statement = select(models.Account).options(*account_loader_options())
+    accounts, next_cursor = await paginate_async(db, accounts_statement, models.Account.id, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    return accounts
+
+@router.get("/{account_id}", response_model=AccountResponse)
+async def get_account(account_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db), current_user: TokenData = Depends(get_current_user_async)):
+    validate_account_ownership(account_id, current_user.id)
+
+    if wants_revalidation(request):
+        raise_if_not_modified(request, "account", (await db.execute(account_info_version_statement(account_id))).first())
+
+    account = await get_account_async(db, account_id, account_loader_options())
+    validate_account_exists(account, account_id)
+
+    if account.account_info:
+        set_etag(response, "account", account.account_info.id, account.account_info.version)
+
+    return account
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...database import get_async_read_db
+from ...body import TokenData
+from ... import models
+from ...response import BookingResponse
+from typing import List
+from ...oauth2 import get_current_user_async
+from ...status_codes import validate_account_ownership
+from ...dependencies import resolve_ownership_async
+from ...queries import select_booking_for_account, paginate_async, booking_loader_options, account_info_version_statement, booking_version_statement
+from ...pagination import PageParams, get_page_params_async, set_next_cursor
+from ...etags import wants_revalidation, raise_if_not_modified, set_etag
+from ...timing import TimedRoute
+
+#read routes served from AsyncSession, writes stay on routers/bookings.py
+router = APIRouter(
+    prefix="/accounts/{account_id}/bookings",
+    tags=["Bookings"],
+    route_class=TimedRoute
+)
+
+@router.get("/", response_model=List[BookingResponse])
+async def get_bookings(account_id: int, request: Request, response: Response, page: PageParams = Depends(get_page_params_async), db: AsyncSession = Depends(get_async_read_db), current_user: TokenData = Depends(get_current_user_async)):
+    validate_account_ownership(account_id, current_user.id)
+
+    if wants_revalidation(request):
+        raise_if_not_modified(request, "bookings", (await db.execute(account_info_version_statement(account_id))).first(), page=page)
+
+    owned = await resolve_ownership_async(db, current_user, account_id)
+
+    bookings_statement = select_booking_for_account(account_id).options(*booking_loader_options())
+    bookings, next_cursor = await paginate_async(db, bookings_statement, models.Booking.id, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+
+    if owned.account_info:
+        set_etag(response, "bookings", owned.account_info.id, owned.account_info.version, page=page)
+
+    return bookings
+
+@router.get("/{booking_id}", response_model=BookingResponse)
+async def get_one_booking(account_id: int, booking_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db), current_user: TokenData = Depends(get_current_user_async)):
+    validate_account_ownership(account_id, current_user.id)
+
+    if wants_revalidation(request):
+        raise_if_not_modified(request, "booking", (await db.execute(booking_version_statement(account_id, booking_id))).first())
+
+    owned = await resolve_ownership_async(db, current_user, account_id, booking_id, options=booking_loader_options())
+    set_etag(response, "booking", owned.booking.id, owned.booking.version)
+
+    return owned.booking
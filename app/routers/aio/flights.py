@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...body import TokenData
+from ...response import FlightResponse
+from ...database import get_async_read_db
+from ... import models
+from typing import List
+from ...oauth2 import get_current_user_async
+from ...status_codes import validate_account_ownership
+from ...dependencies import resolve_ownership_async
+from ...queries import select_flight_for_booking, paginate_async, flight_loader_options, booking_version_statement, flight_version_statement
+from ...pagination import PageParams, get_page_params_async, set_next_cursor
+from ...etags import wants_revalidation, raise_if_not_modified, set_etag
+from ...timing import TimedRoute
+
+#read routes served from AsyncSession, writes stay on routers/flights.py
+router = APIRouter(
+    prefix="/accounts/{account_id}/bookings/{booking_id}/flights",
+    tags=["Flights"],
+    route_class=TimedRoute
+)
+
+@router.get("/", response_model=List[FlightResponse])
+async def get_flights(account_id: int, booking_id: int, request: Request, response: Response, page: PageParams = Depends(get_page_params_async), db: AsyncSession = Depends(get_async_read_db), current_user: TokenData = Depends(get_current_user_async)):
+    validate_account_ownership(account_id, current_user.id)
+
+    if wants_revalidation(request):
+        raise_if_not_modified(request, "flights", (await db.execute(booking_version_statement(account_id, booking_id))).first(), page=page)
+
+    booking = (await resolve_ownership_async(db, current_user, account_id, booking_id)).booking
+
+    flights_statement = select_flight_for_booking(account_id, booking_id).options(*flight_loader_options())
+    flights, next_cursor = await paginate_async(db, flights_statement, models.Flight.id, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    set_etag(response, "flights", booking.id, booking.version, page=page)
+
+    return flights
+
+@router.get("/{flight_id}", response_model=FlightResponse)
+async def get_flight_by_id(account_id: int, booking_id: int, flight_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db), current_user: TokenData = Depends(get_current_user_async)):
+    validate_account_ownership(account_id, current_user.id)
+
+    if wants_revalidation(request):
+        raise_if_not_modified(request, "flight", (await db.execute(flight_version_statement(account_id, booking_id, flight_id))).first())
+
+    #flight.booking is filled from the booking columns of the same statement (contains_eager in ownership_statement)
+    owned = await resolve_ownership_async(db, current_user, account_id, booking_id, flight_id)
+    set_etag(response, "flight", owned.flight.id, owned.flight.version, owned.booking.version)
+
+    return owned.flight
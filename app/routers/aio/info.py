@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...body import TokenData
+from ...response import AccountInfoResponse
+from ...database import get_async_read_db
+from ...oauth2 import get_current_user_async
+from ...status_codes import validate_account_ownership
+from ...dependencies import resolve_ownership_async
+from ...queries import account_info_loader_options, account_info_version_statement
+from ...etags import wants_revalidation, raise_if_not_modified, set_etag
+from ...timing import TimedRoute
+
+#read routes served from AsyncSession, writes stay on routers/info.py
+router = APIRouter(
+    prefix="/accounts/{account_id}/info",
+    tags=["Accounts Information"],
+    route_class=TimedRoute
+)
+
+@router.get("/", response_model=AccountInfoResponse)
+async def get_account_info(account_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db), current_user: TokenData = Depends(get_current_user_async)):
+    validate_account_ownership(account_id, current_user.id)
+
+    if wants_revalidation(request):
+        raise_if_not_modified(request, "info", (await db.execute(account_info_version_statement(account_id))).first())
+
+    owned = await resolve_ownership_async(db, current_user, account_id, options=account_info_loader_options())
+    if owned.account_info:
+        set_etag(response, "info", owned.account_info.id, owned.account_info.version)
+
+    return owned.account_info
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, status, HTTPException, Depends
+from fastapi import APIRouter, status, HTTPException, Depends, Query
 from ..body import Airport
 from ..response import AirportResponse
 from ..updates import AirportPatch, AirportPut
@@ -7,27 +7,37 @@ from ..database import get_db
 from .. import models
 from typing import List
 from ..status_codes import validate_airport_exists
-from ..queries import get_airport_query
+from ..queries import get_airport_query, update_by_id
+from ..cache import airports_cache, ALL, serialize, json_response, airport_body
+from ..search import airport_index
+from ..timing import TimedRoute, statement_budget
 
 router = APIRouter(
     prefix="/airports",
-    tags=["Airports"]
+    tags=["Airports"],
+    route_class=TimedRoute
 )
 
 
+#every GET here reads from the primary: a cache miss right after a write must not cache a lagging replica's rows
 @router.get("/", response_model=List[AirportResponse])
 def get_all_airports(db: Session = Depends(get_db)):
-    airports = db.query(models.Airport).all()
-    return airports
+    def load():
+        airports = db.query(models.Airport).all()
+        return serialize(AirportResponse, airports, many=True)
+
+    return json_response(airports_cache.get_or_load(ALL, load))
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=AirportResponse)
+@statement_budget(1)
 def create_airport(airport: Airport, db: Session = Depends(get_db)):
     try:
         created_airport = models.Airport(**airport.dict())
 
         db.add(created_airport)
         db.commit()
-        db.refresh(created_airport)
+        airports_cache.invalidate()
+        airport_index.add(created_airport)
         return created_airport
     
     except HTTPException as http_error:
@@ -37,14 +47,22 @@ def create_airport(airport: Airport, db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
+#prefix and typo-tolerant search over name, city and country, best matches first
+#answered from the in-memory index, the table is only read to build it
+#declared before /{airport_id} so "search" is not parsed as an id
+@router.get("/search", response_model=List[AirportResponse])
+def search_airports(q: str = Query(..., min_length=1, max_length=64), limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_db)):
+    airport_index.ensure_built(
+        lambda: db.query(models.Airport.id, models.Airport.name, models.Airport.country, models.Airport.city).all()
+    )
+    return airport_index.search(q, limit)
+
 @router.get("/{airport_id}", response_model=AirportResponse)
 def get_airport(airport_id: int, db: Session = Depends(get_db)):
-    airport = get_airport_query(db, airport_id).first()
-    validate_airport_exists(airport, airport_id)
-
-    return airport
+    return json_response(airport_body(db, airport_id))
 
 @router.delete("/{airport_id}", status_code=status.HTTP_204_NO_CONTENT)
+@statement_budget(2)
 def delete_airport(airport_id: int, db: Session = Depends(get_db)):
     try:
         airport_query = get_airport_query(db, airport_id)
@@ -53,6 +71,8 @@ def delete_airport(airport_id: int, db: Session = Depends(get_db)):
 
         airport_query.delete(synchronize_session=False)
         db.commit()
+        airports_cache.invalidate()
+        airport_index.remove(airport_id)
         return
 
     except HTTPException as http_error:
@@ -64,16 +84,16 @@ def delete_airport(airport_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @router.put("/{airport_id}", response_model=AirportResponse)
+@statement_budget(2, returning=1)
 def put_airport(airport_id: int, airport: AirportPut, db: Session = Depends(get_db)):
     try:
-        airport_query = get_airport_query(db, airport_id)
-        existing_airport = airport_query.first()
-        validate_airport_exists(existing_airport, airport_id)
+        updated_airport = update_by_id(db, models.Airport, airport_id, airport.dict())
+        validate_airport_exists(updated_airport, airport_id)
 
-        airport_query.update(airport.dict(), synchronize_session=False)
         db.commit()
-
-        return airport_query.first()
+        airports_cache.invalidate()
+        airport_index.update(updated_airport)
+        return updated_airport
     
     except HTTPException as http_error:
         raise http_error
@@ -83,16 +103,16 @@ def put_airport(airport_id: int, airport: AirportPut, db: Session = Depends(get_
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @router.patch("/{airport_id}", response_model=AirportResponse)
+@statement_budget(2, returning=1)
 def patch_airport(airport_id: int, airport: AirportPatch, db: Session = Depends(get_db)):
     try:
-        airport_query = get_airport_query(db, airport_id)
-        existing_airport = airport_query.first()
-        validate_airport_exists(existing_airport, airport_id)
+        updated_airport = update_by_id(db, models.Airport, airport_id, airport.dict(exclude_unset=True))
+        validate_airport_exists(updated_airport, airport_id)
 
-        airport_query.update(airport.dict(exclude_unset=True), synchronize_session=False)
         db.commit()
-
-        return airport_query.first()
+        airports_cache.invalidate()
+        airport_index.update(updated_airport)
+        return updated_airport
     
     except HTTPException as http_error:
         raise http_error
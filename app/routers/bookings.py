@@ -1,57 +1,121 @@
-from fastapi import APIRouter, status, HTTPException, Depends
-from sqlalchemy.orm import Session
-from ..database import get_db
+import json
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, selectinload
+from ..database import get_db, get_read_db, read_sessionmaker
 from ..body import Booking, TokenData
 from .. import models
-from ..response import BookingResponse
+from ..response import BookingResponse, BulkBookingResponse
 from ..updates import BookingPatch, BookingPut
 from typing import List
 from ..oauth2 import get_current_user
-from ..status_codes import validate_account_exists, validate_account_ownership, validate_account_info_exists, validate_booking_exists
-from ..queries import get_account_query, get_booking_for_account
+from ..status_codes import validate_account_ownership, validate_bulk_size
+from ..dependencies import Ownership, OwnedAccount, OwnedBooking, resolve_ownership
+from ..queries import get_booking_for_account, paginate, booking_loader_options, bump_versions, account_info_version_statement, booking_version_statement, update_booking_statement, get_existing_reference_ids, bulk_insert, update_returning, get_booking_flights
+from ..pagination import PageParams, set_next_cursor
+from ..etags import wants_revalidation, raise_if_not_modified, set_etag, if_match_versions, raise_precondition_failed
+from ..config import settings
+from ..exports import iter_booking_export
+from ..cache import airport_body, class_body
+from ..seats import seat_inventory, flight_seat
+from ..timing import TimedRoute, statement_budget
 
 router = APIRouter(
     prefix="/accounts/{account_id}/bookings",
-    tags=["Bookings"]
+    tags=["Bookings"],
+    route_class=TimedRoute
 )
 
 @router.get("/", response_model=List[BookingResponse])
-def get_bookings(account_id: int, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+def get_bookings(account_id: int, request: Request, response: Response, page: PageParams = Depends(), db: Session = Depends(get_read_db), current_user: TokenData = Depends(get_current_user)):
     validate_account_ownership(account_id, current_user.id)
-    
-    account = get_account_query(db, account_id).first()
-    validate_account_exists(account, account_id)
-    
+
+    #booking and flight writes bump the account info version, so it versions the whole list
+    if wants_revalidation(request):
+        raise_if_not_modified(request, "bookings", db.execute(account_info_version_statement(account_id)).first(), page=page)
+
+    owned = resolve_ownership(db, current_user, account_id)
+
     #select * from bookings 
     #JOIN accounts_info ON accounts_info.id = bookings.account_info_id 
     #JOIN accounts ON accounts.id = accounts_info.account_id 
     #WHERE accounts.id == account_id
-    bookings = get_booking_for_account(db, account_id).all()
+    bookings_query = get_booking_for_account(db, account_id).options(*booking_loader_options())
+    bookings, next_cursor = paginate(bookings_query, models.Booking.id, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+
+    if owned.account_info:
+        set_etag(response, "bookings", owned.account_info.id, owned.account_info.version, page=page)
 
     return bookings
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=BookingResponse)
-def create_booking(account_id: int, booking: Booking, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+@statement_budget(4, returning=3)
+def create_booking(account_id: int, booking: Booking, db: Session = Depends(get_db), owned: Ownership = Depends(OwnedAccount(require_account_info=True))):
     try:
-        validate_account_ownership(account_id, current_user.id)
-        
-        account = get_account_query(db, account_id).first()
-        validate_account_exists(account, account_id)
-
-        #scalar - returns the first column on the first row
-        #select id from accounts_info WHERE accounts_info.account_id = account_id
-        account_info = db.query(models.AccountInfo.id).filter(models.AccountInfo.account_id == account_id).scalar()
-        validate_account_info_exists(account_info)
-        
         booking_data = booking.dict()
-        booking_data["account_info_id"] = account_info
+        booking_data["account_info_id"] = owned.account_info.id
 
-        created_booking = models.Booking(**booking_data)
+        created_booking = models.Booking(**booking_data, flights=[])
+        references = booking_references(db, created_booking)
         db.add(created_booking)
+        bump_versions(db, account_id)
         db.commit()
-        db.refresh(created_booking)
 
-        return created_booking
+        return booking_response(created_booking, references)
+
+    except HTTPException as http_error:
+        raise http_error
+    
+    except Exception as e:
+        db.rollback()
+        print(f"{e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+#all-or-nothing per item, one transaction for the request
+#ownership lookup, one reference check, one multi-row INSERT and one version bump regardless of size
+@router.post("/bulk", status_code=status.HTTP_207_MULTI_STATUS, response_model=BulkBookingResponse)
+@statement_budget(4)
+def create_bookings_bulk(account_id: int, bookings: List[Booking], db: Session = Depends(get_db), owned: Ownership = Depends(OwnedAccount(require_account_info=True))):
+    validate_bulk_size(bookings, settings.bulk_max_items)
+
+    try:
+        airport_ids = {booking.from_id for booking in bookings} | {booking.to_id for booking in bookings}
+        class_ids = {booking.class_id for booking in bookings}
+        existing_airports, existing_classes = get_existing_reference_ids(db, airport_ids, class_ids)
+
+        results = []
+        rows = []
+        for index, booking in enumerate(bookings):
+            if booking.class_id not in existing_classes:
+                results.append({"index": index, "status": status.HTTP_404_NOT_FOUND, "detail": f"Flight class with id {booking.class_id} was not found"})
+                continue
+
+            missing_airport = next((id for id in (booking.from_id, booking.to_id) if id not in existing_airports), None)
+            if missing_airport is not None:
+                results.append({"index": index, "status": status.HTTP_404_NOT_FOUND, "detail": f"Airport with id {missing_airport} was not found"})
+                continue
+
+            #same rule as the different_locations CHECK constraint
+            if booking.from_id == booking.to_id:
+                results.append({"index": index, "status": status.HTTP_422_UNPROCESSABLE_ENTITY, "detail": "Departure and arrival airports must be different"})
+                continue
+
+            booking_data = booking.dict()
+            booking_data["account_info_id"] = owned.account_info.id
+            rows.append(booking_data)
+            results.append({"index": index, "status": status.HTTP_201_CREATED})
+
+        if rows:
+            created_ids = iter(bulk_insert(db, models.Booking, rows))
+            for result in results:
+                if result["status"] == status.HTTP_201_CREATED:
+                    result["id"] = next(created_ids)
+
+            bump_versions(db, account_id)
+            db.commit()
+
+        return {"created": len(rows), "rejected": len(bookings) - len(rows), "results": results}
 
     except HTTPException as http_error:
         raise http_error
@@ -61,31 +125,47 @@ def create_booking(account_id: int, booking: Booking, db: Session = Depends(get_
         print(f"{e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
+#declared before /{booking_id} so "export" is not parsed as an id
+@router.get("/export", response_class=StreamingResponse)
+def export_bookings(account_id: int, request: Request, db: Session = Depends(get_read_db), current_user: TokenData = Depends(get_current_user)):
+    owned = resolve_ownership(db, current_user, account_id)
+    #the ownership check is done, its connection goes back to the pool before the body streams
+    #(a yield dependency is only closed once the whole response is sent)
+    db.close()
+    if owned.account_info is None:
+        return StreamingResponse(iter(()), media_type="application/x-ndjson")
+
+    return StreamingResponse(
+        iter_booking_export(read_sessionmaker(request), owned.account_info.id, settings.export_batch_size),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="account-{account_id}-bookings.ndjson"'}
+    )
+
 @router.get("/{booking_id}", response_model=BookingResponse)
-def get_one_booking(account_id: int, booking_id: int, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+def get_one_booking(account_id: int, booking_id: int, request: Request, response: Response, db: Session = Depends(get_read_db), current_user: TokenData = Depends(get_current_user)):
     validate_account_ownership(account_id, current_user.id)
-    
-    account = get_account_query(db, account_id).first()
-    validate_account_exists(account, account_id)
-    
-    booking = get_booking_for_account(db, account_id, booking_id).first()
-    validate_booking_exists(booking, booking_id)
+
+    #version-only query first, a match skips the joined load and serialization
+    if wants_revalidation(request):
+        raise_if_not_modified(request, "booking", db.execute(booking_version_statement(account_id, booking_id)).first())
+
+    booking = resolve_ownership(db, current_user, account_id, booking_id, options=booking_loader_options()).booking
+    set_etag(response, "booking", booking.id, booking.version)
 
     return booking
 
+#flights are loaded with the booking so the delete cascade does not lazy load them, their seats are freed after the commit
 @router.delete("/{booking_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_booking(account_id: int, booking_id: int, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+@statement_budget(5)
+def delete_booking(account_id: int, booking_id: int, db: Session = Depends(get_db), owned: Ownership = Depends(OwnedBooking(selectinload(models.Booking.flights)))):
     try:
-        validate_account_ownership(account_id, current_user.id)
-        
-        account = get_account_query(db, account_id).first()
-        validate_account_exists(account, account_id)
-        
-        booking = get_booking_for_account(db, account_id, booking_id).first()
-        validate_booking_exists(booking, booking_id)
-        
-        db.delete(booking)
+        seats = [flight_seat(flight) for flight in owned.booking.flights]
+        db.delete(owned.booking)
+        bump_versions(db, account_id)
         db.commit()
+
+        for seat in seats:
+            seat_inventory.release(*seat)
         return
     
     except HTTPException as http_error:
@@ -97,24 +177,19 @@ def delete_booking(account_id: int, booking_id: int, db: Session = Depends(get_d
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.put("/{booking_id}", response_model=BookingResponse)
-def put_booking(account_id: int, booking_id: int, booking: BookingPut, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
-    try:
-        validate_account_ownership(account_id, current_user.id)
-        
-        account = get_account_query(db, account_id).first()
-        validate_account_exists(account, account_id)
-        
-        booking_query = get_booking_for_account(db, account_id, booking_id)
-        existing_booking = booking_query.first()
-        validate_booking_exists(existing_booking, booking_id)
-
-        # Update fields manually
-        for key, value in booking.dict().items():
-            setattr(existing_booking, key, value)
+@statement_budget(4, returning=3)
+def put_booking(account_id: int, booking_id: int, booking: BookingPut, request: Request, response: Response, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+    validate_account_ownership(account_id, current_user.id)
+    versions = if_match_versions(request, "booking", booking_id)
 
+    try:
+        updated_booking = update_booking(db, current_user, account_id, booking_id, booking.dict(), versions)
+        references = booking_references(db, updated_booking)
+        flights = get_booking_flights(db, booking_id)
         db.commit()
-        db.refresh(existing_booking)  # refresh from DB to return updated version
-        return existing_booking
+
+        set_etag(response, "booking", updated_booking.id, updated_booking.version)
+        return booking_response(updated_booking, references, flights)
     
     except HTTPException as http_error:
         raise http_error
@@ -125,24 +200,19 @@ def put_booking(account_id: int, booking_id: int, booking: BookingPut, db: Sessi
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.patch("/{booking_id}", response_model=BookingResponse)
-def put_booking(account_id: int, booking_id: int, booking: BookingPatch, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
-    try:
-        validate_account_ownership(account_id, current_user.id)
-        
-        account = get_account_query(db, account_id).first()
-        validate_account_exists(account, account_id)
-        
-        booking_query = get_booking_for_account(db, account_id, booking_id)
-        existing_booking = booking_query.first()
-        validate_booking_exists(existing_booking, booking_id)
-
-        # Update fields manually
-        for key, value in booking.dict(exclude_unset=True).items():
-            setattr(existing_booking, key, value)
+@statement_budget(4, returning=3)
+def put_booking(account_id: int, booking_id: int, booking: BookingPatch, request: Request, response: Response, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+    validate_account_ownership(account_id, current_user.id)
+    versions = if_match_versions(request, "booking", booking_id)
 
+    try:
+        updated_booking = update_booking(db, current_user, account_id, booking_id, booking.dict(exclude_unset=True), versions)
+        references = booking_references(db, updated_booking)
+        flights = get_booking_flights(db, booking_id)
         db.commit()
-        db.refresh(existing_booking)  # refresh from DB to return updated version
-        return existing_booking
+
+        set_etag(response, "booking", updated_booking.id, updated_booking.version)
+        return booking_response(updated_booking, references, flights)
     
     except HTTPException as http_error:
         raise http_error
@@ -151,9 +221,29 @@ def put_booking(account_id: int, booking_id: int, booking: BookingPatch, db: Ses
         db.rollback()
         print(f"{e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
-    
-
 
+#one conditional UPDATE and no read before it, a missed row is only looked up to tell 404 from 412
+#returns the updated row, from RETURNING where the backend has it
+def update_booking(db: Session, current_user: TokenData, account_id: int, booking_id: int, values: dict, versions):
+    bump_versions(db, account_id)
+    updated_booking = update_returning(db, update_booking_statement(account_id, booking_id, values, versions), models.Booking, booking_id)
 
-
-        
\ No newline at end of file
+    if updated_booking is None:
+        db.rollback()
+        resolve_ownership(db, current_user, account_id, booking_id)
+        raise_precondition_failed()
+    return updated_booking
+
+#class and airports nested in a BookingResponse, served from the reference caches instead of joined to the write
+#looked up before the commit, so a booking pointing at a missing one is a 404 and is not written
+def booking_references(db: Session, booking: models.Booking):
+    return {
+        "class_type": json.loads(class_body(db, booking.class_id)),
+        "from_airport": json.loads(airport_body(db, booking.from_id)),
+        "to_airport": json.loads(airport_body(db, booking.to_id))
+    }
+
+#BookingResponse of a booking this request wrote, without loading its relationships
+def booking_response(booking: models.Booking, references: dict, flights=()):
+    columns = {column.key: getattr(booking, column.key) for column in models.Booking.__table__.columns}
+    return {**columns, **references, "flights": list(flights)}
@@ -7,27 +7,35 @@ from ..database import get_db
 from .. import models
 from typing import List
 from ..status_codes import validate_class_exists
-from ..queries import get_class_type_query
+from ..queries import get_class_type_query, update_by_id
+from ..cache import classes_cache, ALL, serialize, json_response, class_body
+from ..timing import TimedRoute, statement_budget
 
 router = APIRouter(
     prefix="/classes",
-    tags=["Classes"]
+    tags=["Classes"],
+    route_class=TimedRoute
 )
 
 
+#every GET here reads from the primary: a cache miss right after a write must not cache a lagging replica's rows
 @router.get("/", response_model=List[ClassTypeResponse])
 def get_all_airports(db: Session = Depends(get_db)):
-    classes = db.query(models.ClassType).all()
-    return classes
+    def load():
+        classes = db.query(models.ClassType).all()
+        return serialize(ClassTypeResponse, classes, many=True)
+
+    return json_response(classes_cache.get_or_load(ALL, load))
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=ClassTypeResponse)
+@statement_budget(1)
 def create_airport(classes: ClassType, db: Session = Depends(get_db)):
     try:
         created_class = models.ClassType(**classes.dict())
 
         db.add(created_class)
         db.commit()
-        db.refresh(created_class)
+        classes_cache.invalidate()
         return created_class
     
     except HTTPException as http_error:
@@ -39,12 +47,10 @@ def create_airport(classes: ClassType, db: Session = Depends(get_db)):
     
 @router.get("/{class_id}", response_model=ClassTypeResponse)
 def get_airport(class_id: int, db: Session = Depends(get_db)):
-    class_type = get_class_type_query(db, class_id).first()
-    validate_class_exists(class_type, class_id)
-
-    return class_type
+    return json_response(class_body(db, class_id))
 
 @router.delete("/{class_id}", status_code=status.HTTP_204_NO_CONTENT)
+@statement_budget(2)
 def delete_airport(class_id: int, db: Session = Depends(get_db)):
     try:
         class_query = get_class_type_query(db, class_id)
@@ -53,6 +59,7 @@ def delete_airport(class_id: int, db: Session = Depends(get_db)):
 
         class_query.delete(synchronize_session=False)
         db.commit()
+        classes_cache.invalidate()
         return
 
     except HTTPException as http_error:
@@ -63,16 +70,15 @@ def delete_airport(class_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @router.put("/{class_id}", response_model=ClassTypeResponse)
+@statement_budget(2, returning=1)
 def put_airport(class_id: int, classes: ClassTypePut, db: Session = Depends(get_db)):
     try:
-        class_query = get_class_type_query(db, class_id)
-        existing_class = class_query.first()
-        validate_class_exists(existing_class, class_id)
+        updated_class = update_by_id(db, models.ClassType, class_id, classes.dict())
+        validate_class_exists(updated_class, class_id)
 
-        class_query.update(classes.dict(), synchronize_session=False)
         db.commit()
-
-        return class_query.first()
+        classes_cache.invalidate()
+        return updated_class
     
     except HTTPException as http_error:
         raise http_error
@@ -82,16 +88,15 @@ def put_airport(class_id: int, classes: ClassTypePut, db: Session = Depends(get_
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @router.patch("/{class_id}", response_model=ClassTypeResponse)
+@statement_budget(2, returning=1)
 def patch_airport(class_id: int, classes: ClassTypePatch, db: Session = Depends(get_db)):
     try:
-        class_query = get_class_type_query(db, class_id)
-        existing_class = class_query.first()
-        validate_class_exists(existing_class, class_id)
+        updated_class = update_by_id(db, models.ClassType, class_id, classes.dict(exclude_unset=True))
+        validate_class_exists(updated_class, class_id)
 
-        class_query.update(classes.dict(exclude_unset=True), synchronize_session=False)
         db.commit()
-
-        return class_query.first()
+        classes_cache.invalidate()
+        return updated_class
     
     except HTTPException as http_error:
         raise http_error
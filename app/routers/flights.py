@@ -1,57 +1,67 @@
-from fastapi import APIRouter, status, HTTPException, Depends
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response
 from ..body import Flight, TokenData
 from ..response import FlightResponse
 from ..updates import FlightPut, FlightPatch
-from ..database import get_db
+from ..database import get_db, get_read_db
 from .. import models
 from typing import List
+from contextlib import contextmanager
 from sqlalchemy.orm import Session
 from ..oauth2 import get_current_user
-from ..status_codes import validate_account_exists, validate_account_ownership, validate_flight_exists, validate_booking_exists, validate_account_info_exists
-from ..queries import get_account_query, get_booking_for_account, get_flight_for_booking
+from ..status_codes import validate_account_ownership
+from ..dependencies import Ownership, OwnedBooking, OwnedFlight, resolve_ownership
+from ..queries import get_flight_for_booking, paginate, flight_loader_options, bump_versions, booking_version_statement, flight_version_statement, update_flight_returning
+from ..pagination import PageParams, set_next_cursor
+from ..etags import wants_revalidation, raise_if_not_modified, set_etag, if_match_versions, raise_precondition_failed
+from ..seats import seat_inventory, flight_seat
+from ..events import flight_events, flight_status_event
+from ..timing import TimedRoute, statement_budget
+
+#fields that decide which seat a flight holds
+SEAT_FIELDS = {"flight_number", "departure_date", "seat_number"}
 
 router = APIRouter(
     prefix="/accounts/{account_id}/bookings/{booking_id}/flights",
-    tags=["Flights"]
+    tags=["Flights"],
+    route_class=TimedRoute
 )
 
 @router.get("/", response_model=List[FlightResponse])
-def get_flights(account_id: int, booking_id: int, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+def get_flights(account_id: int, booking_id: int, request: Request, response: Response, page: PageParams = Depends(), db: Session = Depends(get_read_db), current_user: TokenData = Depends(get_current_user)):
     validate_account_ownership(account_id, current_user.id)
-    
-    account = get_account_query(db, account_id).first()
-    validate_account_exists(account, account_id)
-    
-    booking = get_booking_for_account(db, account_id, booking_id).first()
-    validate_booking_exists(booking, booking_id)
-    
-    flights = get_flight_for_booking(db, account_id, booking_id).all()
+
+    #flight writes bump the booking version, so it versions the whole list
+    if wants_revalidation(request):
+        raise_if_not_modified(request, "flights", db.execute(booking_version_statement(account_id, booking_id)).first(), page=page)
+
+    booking = resolve_ownership(db, current_user, account_id, booking_id).booking
+
+    flights_query = get_flight_for_booking(db, account_id, booking_id).options(*flight_loader_options())
+    flights, next_cursor = paginate(flights_query, models.Flight.id, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    set_etag(response, "flights", booking.id, booking.version, page=page)
 
     return flights
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=FlightResponse)
-def create_flight(account_id: int, booking_id: int, flight: Flight, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+@statement_budget(5, returning=4)
+def create_flight(account_id: int, booking_id: int, flight: Flight, db: Session = Depends(get_db), owned: Ownership = Depends(OwnedBooking(require_account_info=True))):
     try:
-        validate_account_ownership(account_id, current_user.id)
-        
-        account = get_account_query(db, account_id).first()
-        validate_account_exists(account, account_id)
-        
-        account_info = db.query(models.AccountInfo.id).filter(models.AccountInfo.account_id == account_id).scalar()
-        validate_account_info_exists(account_info)
-
-        booking = get_booking_for_account(db, account_id, booking_id).first()
-        validate_booking_exists(booking, booking_id)
-        
         flight_data = flight.dict()
         flight_data["booking_id"] = booking_id
-        flight_data["account_info_id"] = account_info
+        flight_data["account_info_id"] = owned.account_info.id
+        flight_data["departure_date"] = flight.departure_date or owned.booking.departure_date.date()
 
-        created_flight = models.Flight(**flight_data)
-        db.add(created_flight)
-        db.commit()
-        db.refresh(created_flight)
+        #the seat is held in the bitmap until the commit, a concurrent request for it gets 409
+        with seat_inventory.reserve(db, flight_data["flight_number"], flight_data["departure_date"], flight.seat_number) as seat_number:
+            flight_data["seat_number"] = seat_number
+            #the booking loaded for the ownership check is the response's nested booking
+            created_flight = models.Flight(**flight_data, booking=owned.booking)
+            db.add(created_flight)
+            bump_versions(db, account_id, booking_id)
+            db.commit()
 
+        flight_events.publish(account_id, flight_status_event(created_flight, created_flight.status))
         return created_flight
 
     except HTTPException as http_error:
@@ -63,41 +73,27 @@ def create_flight(account_id: int, booking_id: int, flight: Flight, db: Session
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.get("/{flight_id}", response_model=FlightResponse)
-def get_flight_by_id(account_id: int, booking_id: int, flight_id: int, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+def get_flight_by_id(account_id: int, booking_id: int, flight_id: int, request: Request, response: Response, db: Session = Depends(get_read_db), current_user: TokenData = Depends(get_current_user)):
     validate_account_ownership(account_id, current_user.id)
-        
-    account = get_account_query(db, account_id).first()
-    validate_account_exists(account, account_id)
-    
-    booking = get_booking_for_account(db, account_id, booking_id).first()
-    validate_booking_exists(booking, booking_id)
-
-    #SELECT * FROM flights
-    #JOIN accounts_info ON accounts_info.account_info = models.Flight.account_info_id
-    #WHERE accounts_info.account_id = account_id
-    #AND flights.booking_id = booking_id
-    #AND flights.id = flight_id
-    flight = get_flight_for_booking(db, account_id, booking_id, flight_id).first()
-    validate_flight_exists(flight, flight_id)
-    
-    return flight
+
+    if wants_revalidation(request):
+        raise_if_not_modified(request, "flight", db.execute(flight_version_statement(account_id, booking_id, flight_id)).first())
+
+    #flight.booking is filled from the booking columns of the same statement (contains_eager in ownership_statement)
+    owned = resolve_ownership(db, current_user, account_id, booking_id, flight_id)
+    set_etag(response, "flight", owned.flight.id, owned.flight.version, owned.booking.version)
+
+    return owned.flight
 
 @router.delete("/{flight_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_flight(account_id: int, booking_id: int, flight_id: int, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+@statement_budget(4)
+def delete_flight(account_id: int, booking_id: int, flight_id: int, db: Session = Depends(get_db), owned: Ownership = Depends(OwnedFlight())):
     try:
-        validate_account_ownership(account_id, current_user.id)
-        
-        account = get_account_query(db, account_id).first()
-        validate_account_exists(account, account_id)
-        
-        booking = get_booking_for_account(db, account_id, booking_id).first()
-        validate_booking_exists(booking, booking_id)
-        
-        flight = get_flight_for_booking(db, account_id, booking_id, flight_id).first()
-        validate_flight_exists(flight, flight_id)
-        
-        db.delete(flight)
+        seat = flight_seat(owned.flight)
+        db.delete(owned.flight)
+        bump_versions(db, account_id, booking_id)
         db.commit()
+        seat_inventory.release(*seat)
         return
 
     except HTTPException as http_error:
@@ -108,27 +104,26 @@ def delete_flight(account_id: int, booking_id: int, flight_id: int, db: Session
         print(f"{e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
+#PUT/PATCH budgets cover a seat move, which adds the read of the flight's current seat
 @router.put("/{flight_id}", response_model=FlightResponse)
-def put_flight(account_id: int, booking_id: int, flight_id: int, flight: FlightPut, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+@statement_budget(5, returning=4)
+def put_flight(account_id: int, booking_id: int, flight_id: int, flight: FlightPut, request: Request, response: Response, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+    validate_account_ownership(account_id, current_user.id)
+    versions = if_match_versions(request, "flight", flight_id)
+
     try:
-        validate_account_ownership(account_id, current_user.id)
-        
-        account = get_account_query(db, account_id).first()
-        validate_account_exists(account, account_id)
-        
-        booking = get_booking_for_account(db, account_id, booking_id).first()
-        validate_booking_exists(booking, booking_id)
-        
-        existing_flight = get_flight_for_booking(db, account_id, booking_id, flight_id).first()
-        validate_flight_exists(existing_flight, flight_id)
-        
-        # Update fields manually
-        for key, value in flight.dict().items():
-            setattr(existing_flight, key, value)
+        changes = flight.dict(exclude_none=True)
+        with seat_change(db, current_user, account_id, booking_id, flight_id, changes) as existing_flight:
+            #decided before the UPDATE, which refreshes existing_flight in place
+            announce = status_changed(existing_flight, changes)
+            updated_flight = update_flight(db, current_user, account_id, booking_id, flight_id, changes, versions or read_version(existing_flight))
+            db.commit()
 
-        db.commit()
-        db.refresh(existing_flight)
-        return existing_flight
+        if announce:
+            flight_events.publish(account_id, flight_status_event(updated_flight, updated_flight.status))
+
+        set_etag(response, "flight", updated_flight.id, updated_flight.version, updated_flight.booking.version)
+        return updated_flight
     
     except HTTPException as http_error:
         raise http_error
@@ -140,26 +135,24 @@ def put_flight(account_id: int, booking_id: int, flight_id: int, flight: FlightP
     
 
 @router.patch("/{flight_id}", response_model=FlightResponse)
-def put_flight(account_id: int, booking_id: int, flight_id: int, flight: FlightPatch, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+@statement_budget(5, returning=4)
+def put_flight(account_id: int, booking_id: int, flight_id: int, flight: FlightPatch, request: Request, response: Response, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+    validate_account_ownership(account_id, current_user.id)
+    versions = if_match_versions(request, "flight", flight_id)
+
     try:
-        validate_account_ownership(account_id, current_user.id)
-        
-        account = get_account_query(db, account_id).first()
-        validate_account_exists(account, account_id)
-        
-        booking = get_booking_for_account(db, account_id, booking_id).first()
-        validate_booking_exists(booking, booking_id)
-        
-        existing_flight = get_flight_for_booking(db, account_id, booking_id, flight_id).first()
-        validate_flight_exists(existing_flight, flight_id)
-        
-        # Update fields manually
-        for key, value in flight.dict(exclude_unset=True).items():
-            setattr(existing_flight, key, value)
+        changes = flight.dict(exclude_unset=True)
+        with seat_change(db, current_user, account_id, booking_id, flight_id, changes) as existing_flight:
+            #decided before the UPDATE, which refreshes existing_flight in place
+            announce = status_changed(existing_flight, changes)
+            updated_flight = update_flight(db, current_user, account_id, booking_id, flight_id, changes, versions or read_version(existing_flight))
+            db.commit()
 
-        db.commit()
-        db.refresh(existing_flight)
-        return existing_flight
+        if announce:
+            flight_events.publish(account_id, flight_status_event(updated_flight, updated_flight.status))
+
+        set_etag(response, "flight", updated_flight.id, updated_flight.version, updated_flight.booking.version)
+        return updated_flight
     
     except HTTPException as http_error:
         raise http_error
@@ -168,4 +161,43 @@ def put_flight(account_id: int, booking_id: int, flight_id: int, flight: FlightP
         db.rollback()
         print(f"{e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
-        
\ No newline at end of file
+
+#one conditional UPDATE, a missed row is only looked up to tell 404 from 412
+#the versions are bumped top-down first, the same order as every other flight write
+def update_flight(db: Session, current_user: TokenData, account_id: int, booking_id: int, flight_id: int, values: dict, versions):
+    updated_flight = update_flight_returning(db, account_id, booking_id, flight_id, values, versions)
+
+    if updated_flight is None:
+        db.rollback()
+        resolve_ownership(db, current_user, account_id, booking_id, flight_id)
+        raise_precondition_failed()
+    return updated_flight
+
+#status-only changes go straight to the UPDATE, a seat move reads the flight's current seat first
+#and holds the new one until the commit, the old one is freed after it
+#yields the flight that was read (None for status-only changes)
+@contextmanager
+def seat_change(db: Session, current_user: TokenData, account_id: int, booking_id: int, flight_id: int, changes: dict):
+    if not SEAT_FIELDS.intersection(changes):
+        yield None
+        return
+
+    existing_flight = resolve_ownership(db, current_user, account_id, booking_id, flight_id).flight
+    seat = flight_seat(existing_flight)
+    flight_number, departure_date, seat_number = flight_seat(existing_flight, changes)
+
+    with seat_inventory.reserve(db, flight_number, departure_date, seat_number, replaces=seat) as seat_number:
+        changes["seat_number"] = seat_number
+        yield existing_flight
+
+#the UPDATE of a seat move only applies to the version whose seat is being freed
+def read_version(existing_flight):
+    return [existing_flight.version] if existing_flight is not None else None
+
+#a PUT always sends the status, only a different one is announced
+#a status-only PATCH reads nothing before its UPDATE, the status it sets is announced as written
+def status_changed(existing_flight, changes: dict):
+    if "status" not in changes:
+        return False
+    return existing_flight is None or existing_flight.status != changes["status"]
+
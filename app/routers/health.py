@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from ..database import engine, async_engine
+from ..response import PoolStatusResponse
+from ..pool import pool_status
+from ..timing import TimedRoute
+
+router = APIRouter(
+    prefix="/health",
+    tags=["Health"],
+    route_class=TimedRoute
+)
+
+#connection pools of this worker - in use, overflow, checkout waits and timeouts
+#no database round trip, so it still answers when the pool is exhausted
+@router.get("/pool", response_model=PoolStatusResponse)
+def get_pool_status():
+    status = pool_status(engine.pool)
+    if async_engine is not None:
+        status["async_pool"] = pool_status(async_engine.sync_engine.pool)
+    return status
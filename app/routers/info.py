@@ -1,44 +1,48 @@
-from fastapi import APIRouter, status, HTTPException, Depends
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response
 from ..body import AccountInfo, TokenData
 from ..response import AccountInfoResponse
 from ..updates import AccountsInfoPut, AccountsInfoPatch
 from sqlalchemy.orm import Session
-from ..database import get_db
+from ..database import get_db, get_read_db
 from .. import models 
 from ..oauth2 import get_current_user
-from ..status_codes import validate_account_exists, validate_account_ownership, validate_account_info_exists
-from ..queries import get_account_query, get_account_info_query
+from ..status_codes import validate_account_ownership
+from ..dependencies import Ownership, OwnedAccount, resolve_ownership
+from ..queries import get_account_info_query, account_info_loader_options, account_info_version_statement
+from ..etags import wants_revalidation, raise_if_not_modified, set_etag
+from ..timing import TimedRoute, statement_budget
 
 router = APIRouter(
     prefix="/accounts/{account_id}/info",
-    tags=["Accounts Information"]
+    tags=["Accounts Information"],
+    route_class=TimedRoute
 )
 
 @router.get("/", response_model=AccountInfoResponse)
-def get_account_info(account_id: int, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+def get_account_info(account_id: int, request: Request, response: Response, db: Session = Depends(get_read_db), current_user: TokenData = Depends(get_current_user)):
     validate_account_ownership(account_id, current_user.id)
 
-    account = get_account_query(db, account_id).first()
-    validate_account_exists(account, account_id)
+    if wants_revalidation(request):
+        raise_if_not_modified(request, "info", db.execute(account_info_version_statement(account_id)).first())
 
-    accounts_info = db.query(models.AccountInfo).filter(models.AccountInfo.account_id == account_id).first()
-    return accounts_info
+    account_info = resolve_ownership(db, current_user, account_id, options=account_info_loader_options()).account_info
+    if account_info:
+        set_etag(response, "info", account_info.id, account_info.version)
+
+    return account_info
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=AccountInfoResponse)
-def create_account(account_id: int, account_info: AccountInfo, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+@statement_budget(3, returning=2)
+def create_account(account_id: int, account_info: AccountInfo, db: Session = Depends(get_db), owned: Ownership = Depends(OwnedAccount())):
     try:
-        validate_account_ownership(account_id, current_user.id)
-        
-        account = get_account_query(db, account_id).first()
-        validate_account_exists(account, account_id)
-
         account_info_data = account_info.dict()
         account_info_data["account_id"] = account_id
 
-        created_account_info = models.AccountInfo(**account_info_data)
+        #new info has no bookings or flights yet, the response needs nothing but the INSERT
+        created_account_info = models.AccountInfo(**account_info_data, bookings=[], flights=[])
         db.add(created_account_info)
         db.commit()
-        db.refresh(created_account_info)
+
         return created_account_info
     
     except HTTPException as http_error:
@@ -49,17 +53,10 @@ def create_account(account_id: int, account_info: AccountInfo, db: Session = Dep
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
-def delete_account(account_id: int, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+@statement_budget(2)
+def delete_account(account_id: int, db: Session = Depends(get_db), owned: Ownership = Depends(OwnedAccount(require_account_info=True))):
     try:
-        validate_account_ownership(account_id, current_user.id)
-        
-        account = get_account_query(db, account_id).first()
-        validate_account_exists(account, account_id)
-
         account_info_query = get_account_info_query(db, account_id)
-        existing_account_info = account_info_query.first()
-        validate_account_info_exists(existing_account_info)
-        
         account_info_query.delete(synchronize_session=False)
         db.commit()
         return
@@ -72,21 +69,16 @@ def delete_account(account_id: int, db: Session = Depends(get_db), current_user:
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @router.put("/", response_model=AccountInfoResponse)
-def put_account(account_id: int, account_info: AccountsInfoPut, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+@statement_budget(5)
+def put_account(account_id: int, account_info: AccountsInfoPut, db: Session = Depends(get_db), owned: Ownership = Depends(OwnedAccount(*account_info_loader_options(), require_account_info=True))):
     try:
-        validate_account_ownership(account_id, current_user.id)
-        
-        account = get_account_query(db, account_id).first()
-        validate_account_exists(account, account_id)
-
-        account_info_query = get_account_info_query(db, account_id)
-        existing_account_info = account_info_query.first()
-        validate_account_info_exists(existing_account_info)
-        
-        account_info_query.update(account_info.dict(), synchronize_session=False)
+        #the ownership lookup already loaded the info with everything the response nests, the commit writes the changes
+        for field, value in account_info.dict().items():
+            setattr(owned.account_info, field, value)
+        owned.account_info.version = models.AccountInfo.version + 1
         db.commit()
 
-        return account_info_query.first()
+        return owned.account_info
     
     except HTTPException as http_error:
         raise http_error
@@ -96,21 +88,16 @@ def put_account(account_id: int, account_info: AccountsInfoPut, db: Session = De
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
 @router.patch("/", response_model=AccountInfoResponse)
-def patch_account(account_id: int, account_info: AccountsInfoPatch, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+@statement_budget(5)
+def patch_account(account_id: int, account_info: AccountsInfoPatch, db: Session = Depends(get_db), owned: Ownership = Depends(OwnedAccount(*account_info_loader_options(), require_account_info=True))):
     try:
-        validate_account_ownership(account_id, current_user.id)
-        
-        account = get_account_query(db, account_id).first()
-        validate_account_exists(account, account_id)
-
-        account_info_query = get_account_info_query(db, account_id)
-        existing_account_info = account_info_query.first()
-        validate_account_info_exists(existing_account_info)
-        
-        account_info_query.update(account_info.dict(exclude_unset=True), synchronize_session=False)
+        #the ownership lookup already loaded the info with everything the response nests, the commit writes the changes
+        for field, value in account_info.dict(exclude_unset=True).items():
+            setattr(owned.account_info, field, value)
+        owned.account_info.version = models.AccountInfo.version + 1
         db.commit()
 
-        return account_info_query.first()
+        return owned.account_info
     
     except HTTPException as http_error:
         raise http_error
@@ -4,11 +4,13 @@ from sqlalchemy.orm import Session
 from ..database import get_db
 from ..body import Token
 from .. import models, oauth2
-from ..utils import verify
+from ..utils import verify_and_update
+from ..timing import TimedRoute
 
 router = APIRouter(
     prefix="/login",
-    tags=["Login"]
+    tags=["Login"],
+    route_class=TimedRoute
 )
 
 @router.post("/", response_model=Token)
@@ -22,10 +24,16 @@ def login(credentials: OAuth2PasswordRequestForm = Depends(), db: Session = Depe
                                 detail="Invalid credentials.")
         
         #verifies password of the email/user
-        if not verify(credentials.password, user.password):
+        verified, new_hash = verify_and_update(credentials.password, user.password)
+        if not verified:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                                 detail="Invalid credentials.")
 
+        #stored hash was made with a different bcrypt cost, replace it while we have the plain password
+        if new_hash:
+            user.password = new_hash
+            db.commit()
+
         #create a token from oauth2 using user id
         access_token = oauth2.create_token(data = {"user_id": user.id})
 
@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..database import engine, replica_engines, async_engine, async_replica_engines
+from ..metrics import render_metrics
+from ..pool import render_pool_metrics
+from ..oauth2 import render_token_cache_metrics
+from ..timing import TimedRoute
+
+router = APIRouter(
+    tags=["Metrics"],
+    route_class=TimedRoute
+)
+
+#prometheus scrape target, counters are per worker process
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    pools = [("primary", engine.pool)] + [(f"replica{i}", replica.pool) for i, replica in enumerate(replica_engines, 1)]
+    if async_engine is not None:
+        pools.append(("primary_async", async_engine.sync_engine.pool))
+    pools += [(f"replica{i}_async", replica.sync_engine.pool) for i, replica in enumerate(async_replica_engines, 1)]
+    lines = render_metrics() + render_pool_metrics(pools) + render_token_cache_metrics()
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
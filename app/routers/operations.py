@@ -0,0 +1,62 @@
+from fastapi import APIRouter, HTTPException, Depends, Response
+from sqlalchemy.orm import Session
+from datetime import date
+from ..database import get_db, get_read_db
+from ..response import BookingResponse, FlightStatusUpdateResponse
+from ..updates import FlightStatusUpdate
+from typing import List
+from .. import models
+from ..dependencies import require_operator
+from ..status_codes import validate_status_transition
+from ..queries import search_bookings_query, paginate, booking_loader_options, update_flight_day_status
+from ..pagination import PageParams, set_next_cursor
+from ..filters import BookingSearchParams
+from ..events import flight_events, flight_status_event
+from ..timing import TimedRoute, statement_budget
+
+#routes across every account, only for the accounts in OPERATOR_ACCOUNT_IDS
+router = APIRouter(
+    prefix="/operations",
+    tags=["Operations"],
+    dependencies=[Depends(require_operator)],
+    route_class=TimedRoute
+)
+
+#e.g. /operations/bookings?from_id=1&to_id=2&departure_from=2025-01-01&departure_to=2025-01-31&class_id=1
+@router.get("/bookings", response_model=List[BookingResponse])
+def search_bookings(response: Response, filters: BookingSearchParams = Depends(), page: PageParams = Depends(), db: Session = Depends(get_read_db)):
+    bookings_query = search_bookings_query(db, filters).options(*booking_loader_options())
+    bookings, next_cursor = paginate(bookings_query, models.Booking.id, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    return bookings
+
+#e.g. PATCH /operations/flights/PR102/2025-01-31 {"status": "delayed"}
+#flights whose current status may not change to the new one (FLIGHT_STATUS_TRANSITIONS) are left as they are
+#every changed flight is published to its account's event streams after the commit
+@router.patch("/flights/{flight_number}/{departure_date}", response_model=FlightStatusUpdateResponse)
+@statement_budget(4)
+def update_flight_status(flight_number: str, departure_date: date, status_update: FlightStatusUpdate, db: Session = Depends(get_db)):
+    previous_statuses = models.statuses_before(status_update.status)
+    validate_status_transition(previous_statuses, status_update.status)
+
+    try:
+        updated_flights = update_flight_day_status(db, flight_number, departure_date, status_update.status, previous_statuses)
+        db.commit()
+
+        for flight in updated_flights:
+            flight_events.publish(flight.account_id, flight_status_event(flight, status_update.status))
+
+        return {
+            "flight_number": flight_number,
+            "departure_date": departure_date,
+            "status": status_update.status,
+            "updated": len(updated_flights)
+        }
+
+    except HTTPException as http_error:
+        raise http_error
+
+    except Exception as e:
+        db.rollback()
+        print(f"{e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, status, HTTPException, Depends
+from datetime import date
+from sqlalchemy.orm import Session
+from ..body import TokenData
+from ..response import SeatMapResponse, SeatAvailabilityResponse
+from ..database import get_db
+from ..oauth2 import get_current_user
+from ..seats import seat_inventory
+from ..timing import TimedRoute
+
+router = APIRouter(
+    prefix="/flights/{flight_number}/{departure_date}/seats",
+    tags=["Seats"],
+    route_class=TimedRoute
+)
+
+
+#both routes answer from the worker's seat bitmap, the session only connects when the bitmap has to be (re)loaded
+#loads go to the primary, a seat map built from a lagging replica would offer seats that are already sold
+@router.get("/", response_model=SeatMapResponse)
+def get_seat_map(flight_number: str, departure_date: date, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+    layout = seat_inventory.layout
+    taken = seat_inventory.taken_seats(db, flight_number, departure_date)
+    taken_seats = layout.labels(taken)
+
+    return {
+        "flight_number": flight_number,
+        "departure_date": departure_date,
+        "capacity": layout.capacity,
+        "available": layout.capacity - len(taken_seats),
+        "taken": taken_seats
+    }
+
+@router.get("/{seat_number}", response_model=SeatAvailabilityResponse)
+def get_seat_availability(flight_number: str, departure_date: date, seat_number: str, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+    layout = seat_inventory.layout
+    try:
+        index = layout.index(seat_number)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    return {
+        "flight_number": flight_number,
+        "departure_date": departure_date,
+        "seat_number": layout.label(index),
+        "available": not seat_inventory.taken_seats(db, flight_number, departure_date) >> index & 1
+    }
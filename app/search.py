@@ -0,0 +1,193 @@
+import bisect
+import heapq
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from .config import settings
+
+SEARCH_FIELDS = ("name", "city", "country")
+
+#a hit on the airport name outranks the same hit on its city or country
+FIELD_WEIGHTS = {"name": 1.5, "city": 1.2, "country": 1.0}
+
+#fuzzy matches only look at the tokens sharing the most trigrams with the query term
+FUZZY_CANDIDATES = 20
+
+#lowercase, accents stripped, split on anything that is not a letter or digit
+def tokenize(text: str):
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode().lower()
+    return "".join(char if char.isalnum() else " " for char in text).split()
+
+#one space of padding each side, a fully padded "  x" gram would match every token starting with x
+def trigrams(token: str):
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+#levenshtein distance, gives up (returns max_distance + 1) once every cell of a row is over the bound
+def edit_distance(a: str, b: str, max_distance: int):
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+#in-memory airport search over name, city and country
+#tokens are kept sorted for prefix lookups (bisect) and in a trigram index for typo-tolerant lookups
+#built from the table on first use, then kept current by add/update/remove from the airport write routes
+#like the reference cache every worker has its own copy, a full rebuild after reference_cache_seconds
+#picks up writes made by other workers
+class AirportIndex:
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._built_at = None
+        self._records = {}
+        self._postings = defaultdict(dict)
+        self._tokens = []
+        self._trigrams = defaultdict(set)
+
+    def is_stale(self):
+        return self._built_at is None or time.monotonic() - self._built_at > self.ttl_seconds
+
+    #loader returns every airport row, it is only called when the index is missing or stale
+    def ensure_built(self, loader):
+        if not self.is_stale():
+            return
+
+        with self._lock:
+            if not self.is_stale():
+                return
+
+            self._records = {}
+            self._postings = defaultdict(dict)
+            self._tokens = []
+            self._trigrams = defaultdict(set)
+            for airport in loader():
+                self._add(airport, bulk=True)
+
+            #bulk adds skip the per-token sorted insert, sort once instead
+            self._tokens = sorted(self._postings)
+            self._built_at = time.monotonic()
+
+    #write hooks - no-ops until the first search builds the index
+    def add(self, airport):
+        with self._lock:
+            if self._built_at is not None:
+                self._add(airport)
+
+    def update(self, airport):
+        with self._lock:
+            if self._built_at is not None:
+                self._remove(airport.id)
+                self._add(airport)
+
+    def remove(self, airport_id: int):
+        with self._lock:
+            if self._built_at is not None:
+                self._remove(airport_id)
+
+    def _add(self, airport, bulk: bool = False):
+        record = {"id": airport.id, "name": airport.name, "country": airport.country, "city": airport.city}
+        self._records[airport.id] = record
+
+        for field in SEARCH_FIELDS:
+            for token in tokenize(record[field]):
+                postings = self._postings[token]
+                if not postings:
+                    if not bulk:
+                        bisect.insort(self._tokens, token)
+                    for trigram in trigrams(token):
+                        self._trigrams[trigram].add(token)
+                postings[airport.id] = max(postings.get(airport.id, 0), FIELD_WEIGHTS[field])
+
+    def _remove(self, airport_id: int):
+        record = self._records.pop(airport_id, None)
+        if record is None:
+            return
+
+        for field in SEARCH_FIELDS:
+            for token in tokenize(record[field]):
+                postings = self._postings.get(token)
+                if postings is None:
+                    continue
+
+                postings.pop(airport_id, None)
+                if not postings:
+                    del self._postings[token]
+                    del self._tokens[bisect.bisect_left(self._tokens, token)]
+                    for trigram in trigrams(token):
+                        self._trigrams[trigram].discard(token)
+
+    #token -> match quality for one query term: exact 1.0, prefix 0.8, typo 0.6 and below
+    def _term_matches(self, term: str):
+        matches = {}
+
+        #walked by index from the bisect point, a slice would copy the rest of the token list on every query
+        tokens = self._tokens
+        index = bisect.bisect_left(tokens, term)
+        while index < len(tokens) and tokens[index].startswith(term):
+            matches[tokens[index]] = 1.0 if tokens[index] == term else 0.8
+            index += 1
+
+        #typos are only looked for when the term is long enough to mean something and is not itself a known word
+        if len(term) >= 3 and term not in self._postings:
+            max_distance = 1 if len(term) <= 5 else 2
+            term_trigrams = trigrams(term)
+            shared = Counter()
+            for trigram in term_trigrams:
+                shared.update(self._trigrams.get(trigram, ()))
+
+            #an edit breaks at most 3 trigrams, plus the term's closing trigram when it is only a prefix
+            min_shared = len(term_trigrams) - 3 * max_distance - 1
+            for token, count in shared.most_common(FUZZY_CANDIDATES):
+                if count < min_shared:
+                    break
+                if token in matches:
+                    continue
+
+                #compare against the start of longer tokens too, so a typo in a prefix still matches
+                distance = min(
+                    edit_distance(term, token, max_distance),
+                    edit_distance(term, token[:len(term)], max_distance)
+                )
+                if distance <= max_distance:
+                    matches[token] = 0.6 - 0.1 * distance
+
+        return matches
+
+    #every query term has to match one of the airport's tokens, best match per term is summed
+    def search(self, query: str, limit: int):
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            scores = None
+            for term in terms:
+                term_scores = {}
+                #best quality first, so an airport keeps the score of its best matching token
+                for token, quality in sorted(self._term_matches(term).items(), key=lambda item: -item[1]):
+                    postings = self._postings[token]
+                    term_scores.update({airport_id: quality * weight for airport_id, weight in postings.items() if airport_id not in term_scores})
+
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {airport_id: scores[airport_id] + score for airport_id, score in term_scores.items() if airport_id in scores}
+
+                if not scores:
+                    return []
+
+            best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+            return [self._records[airport_id] for airport_id, _ in best]
+
+
+airport_index = AirportIndex(settings.reference_cache_seconds)
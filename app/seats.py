@@ -0,0 +1,245 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from .config import settings
+from . import models
+from .timing import outside_budget
+
+#"12A", "12a" and "012A" are the same seat, stored as "12A"
+SEAT_PATTERN = re.compile(r"^0*([1-9][0-9]*)([A-Za-z])$")
+
+class SeatTaken(ValueError):
+    pass
+
+#every flight has the same cabin: rows 1..rows, one letter per seat across the row
+#seat 1A is bit 0, 1B bit 1, ... so a flight's seats fit in one int
+class SeatLayout:
+    def __init__(self, rows: int, letters: str):
+        self.rows = rows
+        self.letters = letters.upper()
+        self.capacity = rows * len(self.letters)
+
+    #raises ValueError for a seat the layout does not have
+    def index(self, seat_number: str):
+        match = SEAT_PATTERN.match((seat_number or "").strip())
+        if match:
+            row, letter = int(match.group(1)), match.group(2).upper()
+            if row <= self.rows and letter in self.letters:
+                return (row - 1) * len(self.letters) + self.letters.index(letter)
+
+        raise ValueError(f"Seat {seat_number} does not exist, seats run from 1{self.letters[0]} to {self.rows}{self.letters[-1]}")
+
+    def label(self, index: int):
+        row, column = divmod(index, len(self.letters))
+        return f"{row + 1}{self.letters[column]}"
+
+    def labels(self, bits: int):
+        return [self.label(index) for index in range(self.capacity) if bits >> index & 1]
+
+#seats of one flight on one day
+#taken = rows in the database, held = reservations whose transaction has not committed yet
+#while loads are running, confirmed/released record the seats that changed since they started,
+#so a load that read the rows before a commit does not undo it
+class SeatMap:
+    __slots__ = ("taken", "held", "loaded_at", "loading", "confirmed", "released")
+
+    def __init__(self):
+        self.taken = 0
+        self.held = 0
+        self.loaded_at = None
+        self.loading = 0
+        self.confirmed = 0
+        self.released = 0
+
+    def confirm(self, index: int):
+        self.held &= ~(1 << index)
+        self.taken |= 1 << index
+        if self.loading:
+            self.confirmed |= 1 << index
+            self.released &= ~(1 << index)
+
+    def release(self, index: int):
+        self.taken &= ~(1 << index)
+        if self.loading:
+            self.released |= 1 << index
+            self.confirmed &= ~(1 << index)
+
+    #called under the lock once a load finished (taken = None when it failed)
+    def finish_load(self, taken):
+        if taken is not None:
+            self.taken = (taken & ~self.released) | self.confirmed
+            self.loaded_at = time.monotonic()
+
+        self.loading -= 1
+        if not self.loading:
+            self.confirmed = 0
+            self.released = 0
+
+#in-memory seat bitmaps keyed by (flight_number, departure_date), least recently used dropped past max_flights
+#a bitmap is loaded with one SELECT on the uq_flights_seat index the first time its flight is asked for,
+#and reloaded after ttl_seconds so seats sold by other workers show up
+#reservations are a check-and-set of one bit under the lock, the unique constraint stays the final guard:
+#a seat another worker sold since the last load fails the INSERT/UPDATE and comes back as 409
+#the SELECT runs outside the lock, the seats confirmed or released while it runs are merged into its result
+class SeatInventory:
+    def __init__(self, layout: SeatLayout, ttl_seconds: int, max_flights: int):
+        self.layout = layout
+        self.ttl_seconds = ttl_seconds
+        self.max_flights = max_flights
+        self._lock = threading.Lock()
+        self._maps = OrderedDict()
+
+    def _is_stale(self, seat_map: SeatMap):
+        return seat_map.loaded_at is None or time.monotonic() - seat_map.loaded_at > self.ttl_seconds
+
+    def _seat_map(self, db, flight_number: str, departure_date):
+        key = (flight_number, departure_date)
+        with self._lock:
+            seat_map = self._maps.get(key)
+            if seat_map is None:
+                seat_map = self._maps[key] = SeatMap()
+                while len(self._maps) > self.max_flights:
+                    self._maps.popitem(last=False)
+            else:
+                self._maps.move_to_end(key)
+
+            if not self._is_stale(seat_map):
+                return seat_map
+            seat_map.loading += 1
+
+        #the held bits are kept so reservations in flight survive a reload
+        #the load serves every request until the next one, it is not charged to this request's statement budget
+        taken = None
+        try:
+            with outside_budget():
+                seats = db.scalars(
+                    select(models.Flight.seat_number).where(
+                        models.Flight.flight_number == flight_number,
+                        models.Flight.departure_date == departure_date
+                    )
+                ).all()
+            taken = 0
+            for seat_number in seats:
+                try:
+                    taken |= 1 << self.layout.index(seat_number)
+                except ValueError:
+                    continue
+        finally:
+            with self._lock:
+                seat_map.finish_load(taken)
+        return seat_map
+
+    def taken_seats(self, db, flight_number: str, departure_date):
+        seat_map = self._seat_map(db, flight_number, departure_date)
+        with self._lock:
+            return seat_map.taken | seat_map.held
+
+    #holds the seat for a transaction that is about to write it, returns (key, index)
+    #raises SeatTaken if it is sold or held, ValueError if the layout has no such seat
+    def hold(self, db, flight_number: str, departure_date, seat_number: str):
+        index = self.layout.index(seat_number)
+        seat_map = self._seat_map(db, flight_number, departure_date)
+        with self._lock:
+            if (seat_map.taken | seat_map.held) >> index & 1:
+                raise SeatTaken(f"Seat {self.layout.label(index)} on flight {flight_number} on {departure_date} is already taken")
+            seat_map.held |= 1 << index
+        return (flight_number, departure_date), index
+
+    #after the commit: held seats become taken
+    def confirm(self, holds):
+        with self._lock:
+            for key, index in holds:
+                seat_map = self._maps.get(key)
+                if seat_map is not None:
+                    seat_map.confirm(index)
+
+    #after a rollback: held seats are freed, stale maps are reloaded on next use
+    def cancel(self, holds, stale: bool = False):
+        with self._lock:
+            for key, index in holds:
+                seat_map = self._maps.get(key)
+                if seat_map is not None:
+                    seat_map.held &= ~(1 << index)
+                    if stale:
+                        seat_map.loaded_at = None
+
+    #after a flight was deleted or moved to another seat
+    def release(self, flight_number: str, departure_date, seat_number: str):
+        try:
+            index = self.layout.index(seat_number)
+        except ValueError:
+            return
+
+        with self._lock:
+            seat_map = self._maps.get((flight_number, departure_date))
+            if seat_map is not None:
+                seat_map.release(index)
+
+    #wraps the write of one flight's seat, yields the normalized seat number to store
+    #replaces = (flight_number, departure_date, seat_number) the flight held before, freed once the new seat commits
+    #422 for a seat the layout does not have, 409 for a taken seat, before or at commit
+    @contextmanager
+    def reserve(self, db, flight_number: str, departure_date, seat_number: str, replaces=None):
+        #the flight keeps the seat it already holds
+        if replaces is not None and self._same_seat(replaces, flight_number, departure_date, seat_number):
+            yield self.layout.label(self.layout.index(seat_number))
+            return
+
+        try:
+            key, index = self.hold(db, flight_number, departure_date, seat_number)
+        except SeatTaken as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+        try:
+            yield self.layout.label(index)
+        except IntegrityError as e:
+            #any other constraint (a missing booking, a NULL) is not about the seat
+            if not is_seat_conflict(e):
+                self.cancel([(key, index)])
+                raise
+
+            db.rollback()
+            self.cancel([(key, index)], stale=True)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Seat {self.layout.label(index)} on flight {flight_number} on {departure_date} is already taken"
+            )
+        except BaseException:
+            self.cancel([(key, index)])
+            raise
+
+        self.confirm([(key, index)])
+        if replaces is not None:
+            self.release(*replaces)
+
+    def _same_seat(self, replaces, flight_number: str, departure_date, seat_number: str):
+        old_flight_number, old_departure_date, old_seat_number = replaces
+        try:
+            return (old_flight_number, old_departure_date) == (flight_number, departure_date) and \
+                self.layout.index(old_seat_number) == self.layout.index(seat_number)
+        except ValueError:
+            return False
+
+#MySQL names the violated key, SQLite lists its columns
+def is_seat_conflict(error: IntegrityError):
+    message = str(error.orig)
+    return "uq_flights_seat" in message or "flights.flight_number, flights.departure_date, flights.seat_number" in message
+
+#(flight_number, departure_date, seat_number) of a flight, with changes applied on top
+def flight_seat(flight: models.Flight, changes=None):
+    changes = changes or {}
+    return (
+        changes.get("flight_number") or flight.flight_number,
+        changes.get("departure_date") or flight.departure_date,
+        changes.get("seat_number") or flight.seat_number
+    )
+
+
+seat_inventory = SeatInventory(SeatLayout(settings.seat_rows, settings.seat_letters), settings.seat_map_seconds, settings.seat_map_flights)
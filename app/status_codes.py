@@ -12,6 +12,30 @@ def validate_account_ownership(account_id: int, current_user_id: int):
             detail="Not authorized to perform this action"
         )
 
+#check if the logged in account is one of the configured operators
+def validate_operator(current_user_id: int, operator_ids):
+    if current_user_id not in operator_ids:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, 
+            detail="Not authorized to perform this action"
+        )
+
+#check that some status may move to new_status before updating every flight of a day
+def validate_status_transition(previous_statuses, new_status):
+    if not previous_statuses:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"No flight status can change to {new_status.value}"
+        )
+
+#check the size of a bulk request before touching the database
+def validate_bulk_size(items, max_items: int):
+    if len(items) > max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {max_items} items can be sent in one request"
+        )
+
 #check if account exists in database
 def validate_account_exists(account, account_id: int = None):
     if not account:
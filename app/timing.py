@@ -0,0 +1,216 @@
+import inspect
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from .config import settings
+
+#one JSON object per line on stderr, uvicorn does not configure a handler for app loggers
+logger = logging.getLogger("app.timing")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+if not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
+
+#per-request counters, set by TimingMiddleware on sampled requests only
+#the object is shared with the threadpool and greenlets the request runs in, so they add to the same counters
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.endpoint_finished = None
+
+current_timings: ContextVar = ContextVar("current_timings", default=None)
+
+#the route template once routing ran, e.g. /accounts/{account_id}/bookings/{booking_id}
+def route_template(scope):
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path", "")
+
+
+#SQL
+#statement count and time, on every sync engine (the async engine's sync_engine included)
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_timings.get() is not None:
+        context._timing_start = time.perf_counter()
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = current_timings.get()
+    start = getattr(context, "_timing_start", None)
+    if timings is not None and start is not None:
+        timings.statements += 1
+        timings.db_seconds += time.perf_counter() - start
+
+    budget = current_budget.get()
+    if budget is not None and not budget.paused:
+        budget.statements += 1
+        budget.returning = conn.dialect.update_returning
+
+
+#STATEMENT BUDGETS
+#write routes declare the most statements a successful request may run, with @statement_budget(n, returning=m)
+#when the backend has UPDATE ... RETURNING the lower one applies
+#with strict_statements on, a response over budget is logged as a warning, so a refresh or a lazy load that
+#creeps back into a write path shows up in development instead of quietly costing a round trip per request
+#the write is already committed by then, the response itself is left alone
+#so the warning only points at a regression, the exact counts per route in tests/test_statement_budgets.py are what enforce the budgets
+class StatementBudget:
+    def __init__(self, limit: int, returning_limit: int):
+        self.limit = limit
+        self.returning_limit = returning_limit
+        self.statements = 0
+        self.paused = 0
+        self.returning = False
+
+    def exceeded(self):
+        return self.statements > (self.returning_limit if self.returning else self.limit)
+
+current_budget: ContextVar = ContextVar("current_budget", default=None)
+
+def statement_budget(limit: int, returning: int = None):
+    def decorate(endpoint):
+        endpoint._statement_budget = (limit, limit if returning is None else returning)
+        return endpoint
+    return decorate
+
+#cache fills (seat maps, reference data) are shared by many requests and not charged to the one that ran them
+@contextmanager
+def outside_budget():
+    budget = current_budget.get()
+    if budget is None:
+        yield
+        return
+
+    budget.paused += 1
+    try:
+        yield
+    finally:
+        budget.paused -= 1
+
+
+#SERIALIZATION
+#FastAPI validates and encodes the response_model right after the endpoint returns, so the time from the
+#endpoint's return to the finished response is the serialization time
+#routers opt in with APIRouter(route_class=TimedRoute), which also enforces the statement budgets
+class TimedRoute(APIRoute):
+    def get_route_handler(self):
+        self.dependant.call = mark_endpoint_finished(self.dependant.call)
+        handler = super().get_route_handler()
+        limits = getattr(self.endpoint, "_statement_budget", None) if settings.strict_statements else None
+
+        async def timed_handler(request):
+            budget = StatementBudget(*limits) if limits else None
+            token = current_budget.set(budget)
+            try:
+                response = await handler(request)
+            finally:
+                current_budget.reset(token)
+
+            timings = current_timings.get()
+            if timings is not None and timings.endpoint_finished is not None:
+                timings.serialize_seconds += time.perf_counter() - timings.endpoint_finished
+
+            if budget is not None and response.status_code < 400 and budget.exceeded():
+                log_over_budget(request.method, self.path, budget)
+            return response
+
+        return timed_handler
+
+def log_over_budget(method: str, path: str, budget: StatementBudget):
+    logger.warning(json.dumps({
+        "method": method,
+        "route": path,
+        "statements": budget.statements,
+        "statement_budget": budget.returning_limit if budget.returning else budget.limit,
+    }))
+
+def mark_endpoint_finished(call):
+    if getattr(call, "_marks_finish", False):
+        return call
+
+    def mark():
+        timings = current_timings.get()
+        if timings is not None:
+            timings.endpoint_finished = time.perf_counter()
+
+    #FastAPI picks threadpool or await from the callable, so keep the endpoint's kind
+    if inspect.iscoroutinefunction(call):
+        @wraps(call)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                mark()
+    else:
+        @wraps(call)
+        def wrapper(*args, **kwargs):
+            try:
+                return call(*args, **kwargs)
+            finally:
+                mark()
+
+    wrapper._marks_finish = True
+    return wrapper
+
+
+#MIDDLEWARE
+#plain ASGI so unsampled requests cost one random() call
+#sampled requests get a Server-Timing header and one JSON log line
+class TimingMiddleware:
+    def __init__(self, app, sample_rate: float = None):
+        self.app = app
+        self.sample_rate = settings.timing_sample_rate if sample_rate is None else sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(timings).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
+            log_request(scope, status_code, timings)
+
+def server_timing(timings: RequestTimings):
+    total = time.perf_counter() - timings.start
+    return (
+        f'db;dur={timings.db_seconds * 1000:.2f};desc="{timings.statements} statements", '
+        f"serialize;dur={timings.serialize_seconds * 1000:.2f}, "
+        f"total;dur={total * 1000:.2f}"
+    )
+
+def log_request(scope, status_code: int, timings: RequestTimings):
+    logger.info(json.dumps({
+        "method": scope["method"],
+        "route": route_template(scope),
+        "status": status_code,
+        "total_ms": round((time.perf_counter() - timings.start) * 1000, 2),
+        "db_ms": round(timings.db_seconds * 1000, 2),
+        "statements": timings.statements,
+        "serialize_ms": round(timings.serialize_seconds * 1000, 2),
+    }))
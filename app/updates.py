@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, date
 from .models import ClassEnum, FlightStatus
 
 #accounts
@@ -64,8 +64,15 @@ class FlightPut(BaseModel):
     flight_number: str
     seat_number: str
     status: FlightStatus
+    #left out = the flight keeps its day
+    departure_date: Optional[date] = None
 
 class FlightPatch(BaseModel):
     flight_number: Optional[str] = None
     seat_number: Optional[str] = None
     status: Optional[FlightStatus] = None
+    departure_date: Optional[date] = None
+
+#every flight of one flight number and day, /operations only
+class FlightStatusUpdate(BaseModel):
+    status: FlightStatus
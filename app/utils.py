@@ -1,9 +1,69 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from .config import settings
+from .metrics import password_hash_duration
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+#hashes with any other cost are flagged by needs_update and rehashed on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"], 
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds
+)
 
-def hash(password: str):
+#bcrypt runs in its own processes so a login burst cannot starve the request threads,
+#slots caps running + queued hashes and anything past that is rejected with 503 straight away
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(settings.hash_workers + settings.hash_queue_depth)
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=settings.hash_workers, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+def _run_hashing(fn, *args):
+    #hash_workers = 0 hashes in the calling thread (local runs)
+    if settings.hash_workers <= 0:
+        return fn(*args)
+
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, 
+                            detail="Server is busy, please try again",
+                            headers={"Retry-After": "1"})
+
+    try:
+        future = _get_executor().submit(fn, *args)
+    except Exception:
+        _slots.release()
+        raise
+
+    future.add_done_callback(lambda _: _slots.release())
+    return future.result()
+
+#run inside the hashing processes
+def _hash(password: str):
     return pwd_context.hash(password)
 
+def _verify_and_update(plain_pw, hashed_pw):
+    return pwd_context.verify_and_update(plain_pw, hashed_pw)
+
+
+def hash(password: str):
+    with password_hash_duration.time(("hash",)):
+        return _run_hashing(_hash, password)
+
 def verify(plain_pw, hashed_pw):
-    return pwd_context.verify(plain_pw, hashed_pw)
\ No newline at end of file
+    verified, _ = verify_and_update(plain_pw, hashed_pw)
+    return verified
+
+#returns (verified, new_hash) - new_hash is set when the stored hash uses a different cost
+def verify_and_update(plain_pw, hashed_pw):
+    with password_hash_duration.time(("verify",)):
+        return _run_hashing(_verify_and_update, plain_pw, hashed_pw)
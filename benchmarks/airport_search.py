@@ -0,0 +1,60 @@
+#latency of AirportIndex.search over synthetic airports, no database involved
+#usage: python -m benchmarks.airport_search [--airports 50000] [--runs 200]
+import argparse
+import os
+import random
+import statistics
+import string
+import time
+from types import SimpleNamespace
+
+from benchmarks.async_db import BENCH_ENV
+
+WORDS = ["International", "Regional", "Municipal", "Airport", "Airfield", "County", "North", "South", "Air Base"]
+QUERIES = ["manila", "mnila", "tok", "tokyo intl", "philipines", "internat", "regional north", "hnaeda"]
+
+
+def synthetic_airports(count: int):
+    rng = random.Random(42)
+    yield SimpleNamespace(id=1, name="Ninoy Aquino International", city="Manila", country="Philippines")
+    yield SimpleNamespace(id=2, name="Haneda", city="Tokyo", country="Japan")
+    yield SimpleNamespace(id=3, name="Narita International", city="Tokyo", country="Japan")
+
+    countries = ["".join(rng.choices(string.ascii_lowercase, k=8)).title() for _ in range(200)]
+    for i in range(4, count + 1):
+        name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 9))).title()
+        city = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))).title()
+        yield SimpleNamespace(id=i, name=f"{name} {rng.choice(WORDS)}", city=city, country=rng.choice(countries))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--airports", type=int, default=50000)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+
+    from app.search import AirportIndex
+
+    index = AirportIndex(ttl_seconds=3600)
+    start = time.perf_counter()
+    index.ensure_built(lambda: synthetic_airports(args.airports))
+    print(f"build {args.airports} airports: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    print(f"{'query':<16} {'p50 us':>10} {'p99 us':>10}  top match")
+    for query in QUERIES:
+        latencies = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            results = index.search(query, 10)
+            latencies.append(time.perf_counter() - start)
+
+        latencies.sort()
+        top = results[0]["name"] if results else "-"
+        print(f"{query:<16} {statistics.median(latencies) * 1e6:>10.1f} {latencies[int(len(latencies) * 0.99) - 1] * 1e6:>10.1f}  {top}")
+
+
+if __name__ == "__main__":
+    main()
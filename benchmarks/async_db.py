@@ -0,0 +1,129 @@
+#throughput of GET /accounts/{id}/bookings/ served by the sync routes (threadpool + Session)
+#and by the async routes (AsyncSession), at 50/200/1000 concurrent clients
+#a SQLite file is the local database stand-in, each run boots the app in a fresh process
+#so the database_async setting is read at import like in production
+#
+#usage: python -m benchmarks.async_db [--bookings 200] [--requests 3000] [--clients 50 200 1000]
+#needs aiosqlite and httpx on top of requirements.txt
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BENCH_ENV = {
+    "DATABASE_HOSTNAME": "localhost",
+    "DATABASE_PASSWORD": "",
+    "DATABASE_PORT": "0",
+    "DATABASE_USER": "bench",
+    "DATABASE_NAME": "bench",
+    "SECRET_KEY": "benchmark-secret",
+    "ALGORITHM": "HS256",
+    "TOKEN_MINUTES": "60",
+}
+
+
+def configure(db_path: str, mode: str):
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}?check_same_thread=false"
+    os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ["DATABASE_ASYNC"] = "true" if mode == "async" else "false"
+
+
+def seed(db_path: str, bookings: int):
+    configure(db_path, "sync")
+    from app.database import engine, SessionLocal
+    from app import models
+
+    models.Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+
+    db = SessionLocal()
+    db.add(models.Account(id=1, email="bench@example.com", password="x", created_at=now))
+    db.add(models.AccountInfo(id=1, account_id=1, first_name="Bench", last_name="User", created_at=now))
+    db.add(models.ClassType(id=1, type=models.ClassEnum.economy))
+    db.add_all([
+        models.Airport(id=1, name="NAIA", country="Philippines", city="Manila"),
+        models.Airport(id=2, name="Haneda", country="Japan", city="Tokyo"),
+    ])
+    db.flush()
+
+    for i in range(1, bookings + 1):
+        db.add(models.Booking(id=i, account_info_id=1, class_id=1, from_id=1, to_id=2,
+                              departure_date=now + timedelta(days=i), created_at=now))
+        db.add(models.Flight(booking_id=i, account_info_id=1, flight_number=f"PR{i:04d}", departure_date=(now + timedelta(days=i)).date(),
+                             seat_number="12A", status=models.FlightStatus.pending, created_at=now))
+    db.commit()
+    db.close()
+
+
+def run(mode: str, db_path: str, clients: int, requests: int, results):
+    configure(db_path, mode)
+    import httpx
+    from app.main import app
+    from app.oauth2 import create_token
+
+    headers = {"Authorization": f"Bearer {create_token({'user_id': 1})}"}
+
+    async def drive():
+        latencies = []
+        remaining = iter(range(requests))
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            async def worker():
+                for _ in remaining:
+                    start = time.perf_counter()
+                    response = await client.get("/accounts/1/bookings/", params={"limit": 50}, headers=headers)
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(clients)))
+            elapsed = time.perf_counter() - start
+
+        return elapsed, latencies
+
+    elapsed, latencies = asyncio.run(drive())
+    latencies.sort()
+    results.put({
+        "mode": mode,
+        "clients": clients,
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200, 1000])
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        seeder = context.Process(target=seed, args=(db_path, args.bookings))
+        seeder.start()
+        seeder.join()
+
+        print(f"{'mode':<6} {'clients':>8} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+        for clients in args.clients:
+            for mode in ("sync", "async"):
+                process = context.Process(target=run, args=(mode, db_path, clients, args.requests, results))
+                process.start()
+                result = results.get()
+                process.join()
+                print(f"{result['mode']:<6} {result['clients']:>8} {result['rps']:>10.1f} {result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
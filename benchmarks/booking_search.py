@@ -0,0 +1,125 @@
+#query plans and latency of the operator booking search on a million bookings
+#every query runs with the composite indexes from models.py, then again after they are dropped
+#usage: python -m benchmarks.booking_search [--bookings 1000000] [--airports 200] [--runs 20]
+#seeding a million rows into the SQLite file takes about a minute
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from benchmarks.async_db import configure
+
+INDEXES = ["ix_bookings_route_departure", "ix_bookings_class_departure", "ix_bookings_departure", "ix_flights_booking_status"]
+
+
+def seed(bookings: int, airports: int):
+    from sqlalchemy import insert
+    from app.database import engine
+    from app import models
+
+    models.Base.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    now = datetime(2025, 1, 1)
+    statuses = list(models.FlightStatus)
+
+    with engine.begin() as connection:
+        connection.execute(insert(models.Account), [
+            {"id": i, "email": f"user{i}@example.com", "password": "x", "created_at": now} for i in range(1, 1001)
+        ])
+        connection.execute(insert(models.AccountInfo), [
+            {"id": i, "account_id": i, "first_name": "Bench", "last_name": "User", "created_at": now} for i in range(1, 1001)
+        ])
+        connection.execute(insert(models.ClassType), [
+            {"id": i, "type": class_type} for i, class_type in enumerate(models.ClassEnum, 1)
+        ])
+        connection.execute(insert(models.Airport), [
+            {"id": i, "name": f"Airport {i}", "country": "Country", "city": f"City {i}"} for i in range(1, airports + 1)
+        ])
+
+        batch = 50000
+        for start in range(1, bookings + 1, batch):
+            booking_rows, flight_rows = [], []
+            for booking_id in range(start, min(start + batch, bookings + 1)):
+                from_id = rng.randint(1, airports)
+                to_id = rng.randint(1, airports - 1)
+                to_id += to_id >= from_id
+                booking_rows.append({
+                    "id": booking_id, "account_info_id": rng.randint(1, 1000), "class_id": rng.randint(1, 4),
+                    "from_id": from_id, "to_id": to_id, "created_at": now,
+                    "departure_date": now + timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+                })
+                flight_rows.append({
+                    "booking_id": booking_id, "account_info_id": booking_rows[-1]["account_info_id"],
+                    "flight_number": f"PR{booking_id:07d}", "seat_number": "12A",
+                    "departure_date": booking_rows[-1]["departure_date"].date(),
+                    "status": rng.choice(statuses), "created_at": now,
+                })
+            connection.execute(insert(models.Booking), booking_rows)
+            connection.execute(insert(models.Flight), flight_rows)
+
+        connection.exec_driver_sql("ANALYZE")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--airports", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure(os.path.join(directory, "bench.db"), "sync")
+
+        start = time.perf_counter()
+        seed(args.bookings, args.airports)
+        print(f"seeded {args.bookings} bookings in {time.perf_counter() - start:.0f} s")
+
+        from app.database import SessionLocal
+        from app.models import FlightStatus
+        from app.queries import search_bookings_query, paginate
+        from app import models
+
+        month = (datetime(2025, 3, 1), datetime(2025, 3, 31))
+        searches = {
+            "route + month": dict(from_id=1, to_id=2, departure_from=month[0], departure_to=month[1]),
+            "route + month + class": dict(from_id=1, to_id=2, class_id=2, departure_from=month[0], departure_to=month[1]),
+            "class + week": dict(class_id=3, departure_from=month[0], departure_to=month[0] + timedelta(days=7)),
+            "one day": dict(departure_from=month[0], departure_to=month[0] + timedelta(days=1)),
+            "route + delayed": dict(from_id=1, to_id=2, status=FlightStatus.delayed),
+        }
+        fields = ["from_id", "to_id", "class_id", "departure_from", "departure_to", "status"]
+
+        db = SessionLocal()
+        for label in ("with indexes", "without indexes"):
+            print(f"\n== {label}")
+            for name, values in searches.items():
+                filters = SimpleNamespace(**{field: values.get(field) for field in fields})
+                query = search_bookings_query(db, filters)
+
+                statement = query.filter(models.Booking.id > 0).order_by(models.Booking.id).limit(51).statement
+                compiled = statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+                plan = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").all()
+
+                latencies = []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    paginate(search_bookings_query(db, filters), models.Booking.id, None, 50)
+                    latencies.append(time.perf_counter() - start)
+                db.expunge_all()
+
+                print(f"{name:<24} p50 {statistics.median(latencies) * 1000:8.2f} ms")
+                for row in plan:
+                    print(f"    {row[-1]}")
+
+            for index in INDEXES:
+                db.connection().exec_driver_sql(f"DROP INDEX {index}")
+            db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
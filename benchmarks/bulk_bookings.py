@@ -0,0 +1,59 @@
+#wall time of creating N bookings one POST at a time vs one POST /bulk
+#usage: python -m benchmarks.bulk_bookings [--bookings 100] [--rounds 5]
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.async_db import configure, seed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        seed(db_path, 0)
+        configure(db_path, "sync")
+
+        import httpx
+        from app.main import app
+        from app.oauth2 import create_token
+
+        headers = {"Authorization": f"Bearer {create_token({'user_id': 1})}"}
+        departure = datetime.utcnow() + timedelta(days=30)
+        bookings = [
+            {"class_id": 1, "from_id": 1, "to_id": 2, "departure_date": (departure + timedelta(hours=i)).isoformat()}
+            for i in range(args.bookings)
+        ]
+
+        async def drive():
+            loop_times, bulk_times = [], []
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+                for _ in range(args.rounds):
+                    start = time.perf_counter()
+                    for booking in bookings:
+                        (await client.post("/accounts/1/bookings/", json=booking, headers=headers)).raise_for_status()
+                    loop_times.append(time.perf_counter() - start)
+
+                    start = time.perf_counter()
+                    (await client.post("/accounts/1/bookings/bulk", json=bookings, headers=headers)).raise_for_status()
+                    bulk_times.append(time.perf_counter() - start)
+
+            return statistics.median(loop_times), statistics.median(bulk_times)
+
+        loop_seconds, bulk_seconds = asyncio.run(drive())
+
+    print(f"{args.bookings} x POST /bookings/ : {loop_seconds * 1000:10.1f} ms")
+    print(f"1 x POST /bookings/bulk  : {bulk_seconds * 1000:10.1f} ms")
+    print(f"speedup                  : {loop_seconds / bulk_seconds:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
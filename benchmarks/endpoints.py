@@ -0,0 +1,361 @@
+#end-to-end benchmark of every router against a seeded SQLite file
+#each scenario runs --requests requests at --concurrency concurrent clients through the ASGI app and reports
+#throughput, p50/p95/p99 latency and SQL statements per request
+#
+#usage: python -m benchmarks.endpoints [--accounts 1000] [--requests 500] [--concurrency 32] [--only bookings]
+#                                      [--output results.json] [--baseline baseline.json] [--threshold 10]
+#with --baseline the run is compared scenario by scenario and exits with 1 when throughput drops or p95 grows
+#by more than --threshold percent
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.async_db import configure
+
+PASSWORD = "benchmark-password"
+
+
+def seed(accounts: int, airports: int, rng: random.Random):
+    from sqlalchemy import insert
+    from app.database import engine
+    from app.utils import pwd_context
+    from app.seats import seat_inventory
+    from app import models
+
+    models.Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    statuses = list(models.FlightStatus)
+
+    #one bcrypt hash shared by every account
+    password = pwd_context.hash(PASSWORD)
+    bookings_by_account, flights_by_booking = {}, {}
+    booking_rows, flight_rows = [], []
+    seats_sold = {}
+
+    for account_id in range(1, accounts + 1):
+        bookings_by_account[account_id] = []
+        #a few accounts book a lot, most book a little
+        for _ in range(min(int(rng.paretovariate(1.5)) * 3, 200)):
+            booking_id = len(booking_rows) + 1
+            from_id = rng.randint(1, airports)
+            to_id = rng.randint(1, airports - 1)
+            to_id += to_id >= from_id
+            booking_rows.append({
+                "id": booking_id, "account_info_id": account_id, "class_id": rng.randint(1, 4),
+                "from_id": from_id, "to_id": to_id, "created_at": now,
+                "departure_date": now + timedelta(hours=rng.randint(1, 24 * 365)),
+            })
+            bookings_by_account[account_id].append(booking_id)
+            flights_by_booking[booking_id] = []
+
+            #seats in order per flight and day, uq_flights_seat allows each once
+            for _ in range(rng.randint(1, 3)):
+                flight_id = len(flight_rows) + 1
+                flight_number, day = f"PR{rng.randint(1, 500):03d}", booking_rows[-1]["departure_date"].date()
+                seats_sold[flight_number, day] = seats_sold.get((flight_number, day), 0) + 1
+                flight_rows.append({
+                    "id": flight_id, "booking_id": booking_id, "account_info_id": account_id,
+                    "flight_number": flight_number, "departure_date": day, "seat_number": seat_inventory.layout.label(seats_sold[flight_number, day] - 1),
+                    "status": rng.choice(statuses), "created_at": now,
+                })
+                flights_by_booking[booking_id].append(flight_id)
+
+    with engine.begin() as connection:
+        connection.execute(insert(models.Account), [
+            {"id": i, "email": f"user{i}@example.com", "password": password, "created_at": now} for i in range(1, accounts + 1)
+        ])
+        connection.execute(insert(models.AccountInfo), [
+            {"id": i, "account_id": i, "first_name": "Bench", "last_name": f"User {i}", "created_at": now} for i in range(1, accounts + 1)
+        ])
+        connection.execute(insert(models.ClassType), [{"id": i, "type": t} for i, t in enumerate(models.ClassEnum, 1)])
+        connection.execute(insert(models.Airport), [
+            {"id": i, "name": f"Airport {i}", "country": f"Country {i % 30}", "city": f"City {i}"} for i in range(1, airports + 1)
+        ])
+        connection.execute(insert(models.Booking), booking_rows)
+        connection.execute(insert(models.Flight), flight_rows)
+
+    return bookings_by_account, flights_by_booking
+
+
+#(name, method, request builder) - a builder takes a random.Random and returns (account_id, path, request kwargs)
+def build_scenarios(accounts: int, airports: int, bookings_by_account, flights_by_booking):
+    with_bookings = [account_id for account_id, bookings in bookings_by_account.items() if bookings]
+    departure = (datetime.utcnow() + timedelta(days=30)).isoformat()
+
+    def any_account(rng):
+        return rng.randint(1, accounts)
+
+    def booking_of(rng):
+        account_id = rng.choice(with_bookings)
+        return account_id, rng.choice(bookings_by_account[account_id])
+
+    def flight_of(rng):
+        account_id, booking_id = booking_of(rng)
+        return account_id, booking_id, rng.choice(flights_by_booking[booking_id])
+
+    def login(rng):
+        account_id = any_account(rng)
+        return account_id, "/login/", {"data": {"username": f"user{account_id}@example.com", "password": PASSWORD}}
+
+    def accounts_list(rng):
+        return 1, "/accounts/", {"params": {"limit": 50}}
+
+    def accounts_get(rng):
+        account_id = any_account(rng)
+        return account_id, f"/accounts/{account_id}", {}
+
+    def accounts_patch(rng):
+        account_id = any_account(rng)
+        return account_id, f"/accounts/{account_id}", {"json": {"email": f"user{account_id}@example.com"}}
+
+    def info_get(rng):
+        account_id = any_account(rng)
+        return account_id, f"/accounts/{account_id}/info/", {}
+
+    def info_patch(rng):
+        account_id = any_account(rng)
+        return account_id, f"/accounts/{account_id}/info/", {"json": {"first_name": "Bench"}}
+
+    def airports_list(rng):
+        return 1, "/airports/", {}
+
+    def airports_get(rng):
+        return 1, f"/airports/{rng.randint(1, airports)}", {}
+
+    def airports_search(rng):
+        return 1, "/airports/search", {"params": {"q": f"city {rng.randint(1, airports)}"}}
+
+    def classes_list(rng):
+        return 1, "/classes/", {}
+
+    def classes_get(rng):
+        return 1, f"/classes/{rng.randint(1, 4)}", {}
+
+    def bookings_list(rng):
+        account_id = rng.choice(with_bookings)
+        return account_id, f"/accounts/{account_id}/bookings/", {"params": {"limit": 50}}
+
+    def bookings_get(rng):
+        account_id, booking_id = booking_of(rng)
+        return account_id, f"/accounts/{account_id}/bookings/{booking_id}", {}
+
+    def bookings_create(rng):
+        account_id = any_account(rng)
+        from_id = rng.randint(1, airports - 1)
+        body = {"class_id": rng.randint(1, 4), "from_id": from_id, "to_id": from_id + 1, "departure_date": departure}
+        return account_id, f"/accounts/{account_id}/bookings/", {"json": body}
+
+    def bookings_patch(rng):
+        account_id, booking_id = booking_of(rng)
+        return account_id, f"/accounts/{account_id}/bookings/{booking_id}", {"json": {"class_id": rng.randint(1, 4)}}
+
+    def bookings_export(rng):
+        account_id = rng.choice(with_bookings)
+        return account_id, f"/accounts/{account_id}/bookings/export", {}
+
+    def flights_list(rng):
+        account_id, booking_id = booking_of(rng)
+        return account_id, f"/accounts/{account_id}/bookings/{booking_id}/flights/", {}
+
+    def flights_get(rng):
+        account_id, booking_id, flight_id = flight_of(rng)
+        return account_id, f"/accounts/{account_id}/bookings/{booking_id}/flights/{flight_id}", {}
+
+    #a flight number of its own per request, so every create gets its seat
+    created_flights = itertools.count(1)
+
+    def flights_create(rng):
+        account_id, booking_id = booking_of(rng)
+        body = {"flight_number": f"BX{next(created_flights)}", "seat_number": "1A", "status": "pending"}
+        return account_id, f"/accounts/{account_id}/bookings/{booking_id}/flights/", {"json": body}
+
+    def seat_flight(rng):
+        return f"PR{rng.randint(1, 500):03d}", (datetime.utcnow() + timedelta(hours=rng.randint(1, 24 * 365))).date().isoformat()
+
+    def seats_map(rng):
+        flight_number, day = seat_flight(rng)
+        return 1, f"/flights/{flight_number}/{day}/seats/", {}
+
+    def seats_get(rng):
+        flight_number, day = seat_flight(rng)
+        return 1, f"/flights/{flight_number}/{day}/seats/{rng.randint(1, 60)}{rng.choice('ABCDEF')}", {}
+
+    def flights_patch(rng):
+        account_id, booking_id, flight_id = flight_of(rng)
+        return account_id, f"/accounts/{account_id}/bookings/{booking_id}/flights/{flight_id}", {"json": {"status": "boarding"}}
+
+    #one request changes every passenger of a seeded flight day, account 1 is the operator
+    def operations_flight_status(rng):
+        flight_number, day = seat_flight(rng)
+        return 1, f"/operations/flights/{flight_number}/{day}", {"json": {"status": rng.choice(["delayed", "on_time"])}}
+
+    scenarios = [
+        ("login", "POST", login),
+        ("accounts.list", "GET", accounts_list),
+        ("accounts.get", "GET", accounts_get),
+        ("accounts.patch", "PATCH", accounts_patch),
+        ("info.get", "GET", info_get),
+        ("info.patch", "PATCH", info_patch),
+        ("airports.list", "GET", airports_list),
+        ("airports.get", "GET", airports_get),
+        ("airports.search", "GET", airports_search),
+        ("classes.list", "GET", classes_list),
+        ("classes.get", "GET", classes_get),
+        ("bookings.list", "GET", bookings_list),
+        ("bookings.get", "GET", bookings_get),
+        ("bookings.create", "POST", bookings_create),
+        ("bookings.patch", "PATCH", bookings_patch),
+        ("bookings.export", "GET", bookings_export),
+        ("flights.list", "GET", flights_list),
+        ("flights.get", "GET", flights_get),
+        ("flights.create", "POST", flights_create),
+        ("flights.patch", "PATCH", flights_patch),
+        ("seats.map", "GET", seats_map),
+        ("seats.get", "GET", seats_get),
+        ("operations.flight_status", "PATCH", operations_flight_status),
+    ]
+    return scenarios
+
+
+def percentile(sorted_values, fraction: float):
+    index = max(int(round(fraction * len(sorted_values))) - 1, 0)
+    return sorted_values[index]
+
+
+async def run_scenario(client, tokens, method, builder, requests: int, concurrency: int, seed_value: int, statements):
+    rng = random.Random(seed_value)
+    calls = [builder(rng) for _ in range(requests)]
+    pending = iter(calls)
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        for account_id, path, kwargs in pending:
+            start = time.perf_counter()
+            response = await client.request(method, path, headers={"Authorization": f"Bearer {tokens[account_id]}"}, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code >= 400
+
+    statements_before = statements[0]
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "statements_per_request": round((statements[0] - statements_before) / requests, 2),
+    }
+
+
+def compare(results, baseline, threshold: float):
+    regressions = []
+    print(f"\n{'scenario':<18} {'req/s':>16} {'p95 ms':>18}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+
+        rps_change = (result["rps"] - before["rps"]) / before["rps"] * 100
+        p95_change = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        regressed = rps_change < -threshold or p95_change > threshold
+        if regressed:
+            regressions.append(name)
+
+        print(f"{name:<18} {before['rps']:>7.1f} {rps_change:>+7.1f}% {before['p95_ms']:>8.2f} {p95_change:>+7.1f}%{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--airports", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--only", nargs="+", help="run scenarios whose name starts with any of these, e.g. bookings login")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure(os.path.join(directory, "bench.db"), "sync")
+        os.environ["TIMING_SAMPLE_RATE"] = "0"
+        os.environ["OPERATOR_ACCOUNT_IDS"] = "[1]"
+
+        rng = random.Random(args.seed)
+        bookings_by_account, flights_by_booking = seed(args.accounts, args.airports, rng)
+
+        import httpx
+        from sqlalchemy import event
+        from app.main import app
+        from app.database import engine
+        from app.oauth2 import create_token
+
+        #endpoints run on threadpool threads, so the counter is only touched under a lock
+        statements = [0]
+        statements_lock = threading.Lock()
+
+        def count_statement(*_):
+            with statements_lock:
+                statements[0] += 1
+
+        event.listen(engine, "after_cursor_execute", count_statement)
+
+        tokens = {account_id: create_token({"user_id": account_id}) for account_id in range(1, args.accounts + 1)}
+        scenarios = build_scenarios(args.accounts, args.airports, bookings_by_account, flights_by_booking)
+        if args.only:
+            scenarios = [scenario for scenario in scenarios if scenario[0].startswith(tuple(args.only))]
+
+        async def drive():
+            results = {}
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+                print(f"{'scenario':<18} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'stmts/req':>10} {'errors':>7}")
+                for i, (name, method, builder) in enumerate(scenarios):
+                    #bcrypt makes logins ~1000x slower than everything else, run fewer of them
+                    requests = max(args.requests // 25, args.concurrency) if name == "login" else args.requests
+                    result = await run_scenario(client, tokens, method, builder, requests, args.concurrency, args.seed + i, statements)
+                    results[name] = result
+                    print(f"{name:<18} {result['rps']:>9.1f} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+                          f"{result['statements_per_request']:>10.2f} {result['errors']:>7}")
+            return results
+
+        results = asyncio.run(drive())
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({
+                "meta": {
+                    "created_at": datetime.utcnow().isoformat(), "python": platform.python_version(),
+                    "accounts": args.accounts, "requests": args.requests, "concurrency": args.concurrency, "seed": args.seed,
+                },
+                "scenarios": results,
+            }, output, indent=2)
+        print(f"\nresults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["scenarios"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} scenario(s) regressed by more than {args.threshold}%: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#idle flight status streams held by one worker's event hub, and the cost of publishing into them
+#opens --streams subscriptions spread over --accounts accounts, reports memory per idle stream, then publishes
+#--events status writes from a thread (as the sync handlers do) and times until every stream has drained them
+#usage: python -m benchmarks.flight_events [--streams 10000] [--accounts 5000] [--events 1000]
+import argparse
+import asyncio
+import os
+import threading
+import time
+import tracemalloc
+from datetime import date
+from types import SimpleNamespace
+
+from benchmarks.async_db import BENCH_ENV
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streams", type=int, default=10000)
+    parser.add_argument("--accounts", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=1000)
+    args = parser.parse_args()
+
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+    os.environ["FLIGHT_EVENTS_MAX_STREAMS"] = str(args.streams)
+
+    from app.events import flight_events, flight_status_event
+    from app.models import FlightStatus
+
+    flight = SimpleNamespace(id=1, booking_id=1, flight_number="PR001", departure_date=date.today())
+
+    async def drive():
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+
+        received = [0]
+        streams = []
+
+        async def consume(stream):
+            async for frame in stream:
+                if frame.startswith("id:"):
+                    received[0] += 1
+
+        for i in range(args.streams):
+            subscription = flight_events.subscribe(i % args.accounts + 1)
+            streams.append(asyncio.create_task(consume(flight_events.stream(subscription))))
+
+        #let every stream reach its first wait
+        await asyncio.sleep(0.5)
+        idle_bytes = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        print(f"{args.streams} idle streams: {idle_bytes / args.streams:8.0f} bytes/stream, {idle_bytes / 2**20:.1f} MiB total")
+
+        def publish():
+            for i in range(args.events):
+                flight_events.publish(i % args.accounts + 1, flight_status_event(flight, FlightStatus.delayed))
+
+        subscribers_per_account = [0] * args.accounts
+        for i in range(args.streams):
+            subscribers_per_account[i % args.accounts] += 1
+        expected = sum(subscribers_per_account[i % args.accounts] for i in range(args.events))
+
+        start = time.perf_counter()
+        publisher = threading.Thread(target=publish)
+        publisher.start()
+        await asyncio.to_thread(publisher.join)
+        publish_seconds = time.perf_counter() - start
+
+        while received[0] < expected:
+            await asyncio.sleep(0.001)
+        delivered_seconds = time.perf_counter() - start
+
+        print(f"publish {args.events} events: {publish_seconds / args.events * 1e6:8.2f} us/event")
+        print(f"delivered {expected} frames : {delivered_seconds * 1e3:8.1f} ms")
+
+        for task in streams:
+            task.cancel()
+        await asyncio.gather(*streams, return_exceptions=True)
+
+    asyncio.run(drive())
+
+
+if __name__ == "__main__":
+    main()
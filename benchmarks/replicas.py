@@ -0,0 +1,64 @@
+#local check of read-replica routing with SQLite files standing in for the primary and two replicas
+#the replicas are copies of the primary taken before the write, so they stay stale like a lagging replica would
+#usage: python -m benchmarks.replicas [--reads 20]
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+
+from benchmarks.async_db import configure, seed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reads", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        primary = os.path.join(directory, "primary.db")
+        seed(primary, 10)
+
+        replicas = []
+        for i in (1, 2):
+            replicas.append(os.path.join(directory, f"replica{i}.db"))
+            shutil.copy(primary, replicas[-1])
+
+        configure(primary, "sync")
+        os.environ["REPLICA_URLS"] = json.dumps([f"sqlite:///{path}?check_same_thread=false" for path in replicas])
+
+        import httpx
+        from app.main import app
+        from app.oauth2 import create_token
+        from app.database import engine, replica_engines
+
+        headers = {"Authorization": f"Bearer {create_token({'user_id': 1})}"}
+
+        def checkouts():
+            return [engine.pool.stats.checkouts] + [replica.pool.stats.checkouts for replica in replica_engines]
+
+        async def drive():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+                before = checkouts()
+                for _ in range(args.reads):
+                    (await client.get("/accounts/1/bookings/", headers=headers)).raise_for_status()
+                after = checkouts()
+                print(f"{args.reads} GETs, checkouts per engine (primary, replica1, replica2): {[b - a for a, b in zip(before, after)]}")
+
+                response = await client.patch("/accounts/1/info/", json={"first_name": "Updated"}, headers=headers)
+                response.raise_for_status()
+                print(f"PATCH set cookie: {response.headers.get('set-cookie')}")
+
+                pinned = await client.get("/accounts/1/info/", headers=headers)
+                print(f"GET with the cookie    -> first_name {pinned.json()['first_name']!r} (primary)")
+
+                client.cookies.clear()
+                replica = await client.get("/accounts/1/info/", headers=headers)
+                print(f"GET without the cookie -> first_name {replica.json()['first_name']!r} (stale replica)")
+
+        asyncio.run(drive())
+
+
+if __name__ == "__main__":
+    main()
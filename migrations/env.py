@@ -0,0 +1,37 @@
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.models import Base
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+#lets `alembic revision --autogenerate` diff the models against the database
+target_metadata = Base.metadata
+
+#alembic upgrade head --sql: print the DDL instead of running it
+def run_migrations_offline():
+    context.configure(url=SQLALCHEMY_DATABASE_URL, target_metadata=target_metadata, literal_binds=True)
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+    engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
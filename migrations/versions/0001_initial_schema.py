@@ -0,0 +1,82 @@
+"""initial schema
+
+The six tables as Base.metadata.create_all created them before migrations.
+Databases created that way are brought under migrations with
+`python -m app.migrate --stamp 0001` followed by `python -m app.migrate`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+CLASS_TYPES = ("economy", "premium", "business", "first")
+FLIGHT_STATUSES = ("pending", "boarding", "on_time", "delayed", "cancelled")
+
+
+def upgrade():
+    op.create_table(
+        "accounts",
+        sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+        sa.Column("email", sa.String(64), nullable=False, unique=True),
+        sa.Column("password", sa.String(120), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_table(
+        "accounts_info",
+        sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+        sa.Column("account_id", sa.Integer(), sa.ForeignKey("accounts.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False, unique=True),
+        sa.Column("first_name", sa.String(32), nullable=False),
+        sa.Column("last_name", sa.String(32), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_table(
+        "airports",
+        sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+        sa.Column("name", sa.String(32), nullable=False),
+        sa.Column("country", sa.String(32), nullable=False),
+        sa.Column("city", sa.String(32), nullable=False),
+    )
+    op.create_table(
+        "classes",
+        sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+        sa.Column("type", sa.Enum(*CLASS_TYPES, name="type_name", create_constraint=True), nullable=False, unique=True),
+    )
+    op.create_table(
+        "bookings",
+        sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+        sa.Column("account_info_id", sa.Integer(), sa.ForeignKey("accounts_info.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False),
+        sa.Column("class_id", sa.Integer(), sa.ForeignKey("classes.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False),
+        sa.Column("from_id", sa.Integer(), sa.ForeignKey("airports.id"), nullable=False),
+        sa.Column("to_id", sa.Integer(), sa.ForeignKey("airports.id"), nullable=False),
+        sa.Column("departure_date", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("return_date", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.CheckConstraint("from_id <> to_id", name="different_locations"),
+    )
+    op.create_table(
+        "flights",
+        sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+        sa.Column("booking_id", sa.Integer(), sa.ForeignKey("bookings.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False),
+        sa.Column("account_info_id", sa.Integer(), sa.ForeignKey("accounts_info.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False),
+        sa.Column("flight_number", sa.String(32), nullable=False),
+        sa.Column("seat_number", sa.String(32), nullable=False),
+        sa.Column("status", sa.Enum(*FLIGHT_STATUSES, name="flight_status", create_constraint=True), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table("flights")
+    op.drop_table("bookings")
+    op.drop_table("classes")
+    op.drop_table("airports")
+    op.drop_table("accounts_info")
+    op.drop_table("accounts")
@@ -0,0 +1,26 @@
+"""row versions for conditional GETs
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+TABLES = ("accounts_info", "bookings", "flights")
+
+
+def upgrade():
+    for table in TABLES:
+        op.add_column(table, sa.Column("version", sa.Integer(), nullable=False, server_default=sa.text("1")))
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_column(table, "version")
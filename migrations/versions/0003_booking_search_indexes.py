@@ -0,0 +1,27 @@
+"""composite indexes for the operator booking search
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_bookings_route_departure", "bookings", ["from_id", "to_id", "departure_date"])
+    op.create_index("ix_bookings_class_departure", "bookings", ["class_id", "departure_date"])
+    op.create_index("ix_bookings_departure", "bookings", ["departure_date"])
+    op.create_index("ix_flights_booking_status", "flights", ["booking_id", "status"])
+
+
+def downgrade():
+    op.drop_index("ix_flights_booking_status", table_name="flights")
+    op.drop_index("ix_bookings_departure", table_name="bookings")
+    op.drop_index("ix_bookings_class_departure", table_name="bookings")
+    op.drop_index("ix_bookings_route_departure", table_name="bookings")
@@ -0,0 +1,65 @@
+"""flight departure dates and one seat per flight number and day
+
+Existing flights take the day of their booking's departure_date, and their seat
+numbers are stored the way the app writes them ("012A" and "12a" become "12A"),
+otherwise the same seat could be sold again under another spelling. The upgrade
+stops on the unique constraint if two flights then share a seat on the same
+flight and day, those have to be moved to other seats first:
+
+    SELECT flight_number, departure_date, seat_number, COUNT(*) FROM flights
+    GROUP BY flight_number, departure_date, seat_number HAVING COUNT(*) > 1
+
+The downgrade keeps the normalized seat numbers.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+import re
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+#same rule as app/seats.py, copied so the migration does not change if the app does
+SEAT_PATTERN = re.compile(r"^0*([1-9][0-9]*)([A-Za-z])$")
+
+
+def normalize_seat(seat_number):
+    seat_number = seat_number.strip()
+    match = SEAT_PATTERN.match(seat_number)
+    if match is None:
+        return seat_number.upper()
+    return f"{int(match.group(1))}{match.group(2).upper()}"
+
+
+def upgrade():
+    op.add_column("flights", sa.Column("departure_date", sa.Date(), nullable=True))
+    op.execute(
+        "UPDATE flights SET departure_date = "
+        "(SELECT DATE(bookings.departure_date) FROM bookings WHERE bookings.id = flights.booking_id)"
+    )
+
+    connection = op.get_bind()
+    changes = [
+        {"id": flight_id, "seat_number": normalize_seat(seat_number)}
+        for flight_id, seat_number in connection.execute(sa.text("SELECT id, seat_number FROM flights"))
+        if seat_number is not None and normalize_seat(seat_number) != seat_number
+    ]
+    if changes:
+        connection.execute(sa.text("UPDATE flights SET seat_number = :seat_number WHERE id = :id"), changes)
+
+    #batch mode so SQLite, which cannot ALTER a column, copies the table instead
+    with op.batch_alter_table("flights") as batch:
+        batch.alter_column("departure_date", existing_type=sa.Date(), nullable=False)
+        batch.create_unique_constraint("uq_flights_seat", ["flight_number", "departure_date", "seat_number"])
+
+
+def downgrade():
+    with op.batch_alter_table("flights") as batch:
+        batch.drop_constraint("uq_flights_seat", type_="unique")
+        batch.drop_column("departure_date")
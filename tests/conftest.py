@@ -0,0 +1,95 @@
+#the app reads its settings at import, so the environment is set before anything imports app
+#every test runs against a fresh SQLite file with strict loading on, a relationship a route did not plan to load fails it
+#strict statements is on too, so write routes count their statements against their budgets
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+_directory = tempfile.mkdtemp(prefix="airport-booking-tests-")
+DATABASE_PATH = os.path.join(_directory, "test.db")
+
+os.environ.update({
+    "DATABASE_HOSTNAME": "localhost",
+    "DATABASE_PASSWORD": "",
+    "DATABASE_PORT": "0",
+    "DATABASE_USER": "test",
+    "DATABASE_NAME": "test",
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "TOKEN_MINUTES": "60",
+    "DATABASE_URL": f"sqlite:///{DATABASE_PATH}?check_same_thread=false",
+    "STRICT_LOADING": "true",
+    "STRICT_STATEMENTS": "true",
+    "TIMING_SAMPLE_RATE": "0",
+    "HASH_WORKERS": "0",
+    "BCRYPT_ROUNDS": "4",
+    "OPERATOR_ACCOUNT_IDS": "[1]",
+})
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import engine, SessionLocal
+from app.main import app
+from app.oauth2 import create_token
+from app.utils import pwd_context
+from app.cache import airports_cache, classes_cache
+from app.search import airport_index
+from app.seats import seat_inventory
+
+PASSWORD = "test-password"
+
+
+@pytest.fixture(autouse=True)
+def database():
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+
+    #in-memory state of the worker, kept between requests in production
+    airports_cache.invalidate()
+    classes_cache.invalidate()
+    airport_index._built_at = None
+    seat_inventory._maps.clear()
+    yield
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def auth(account_id: int):
+    return {"Authorization": f"Bearer {create_token({'user_id': account_id})}"}
+
+
+#three accounts (1 is an operator, 3 has no info yet), two airports, a class, and for account 1 a booking with one flight
+@pytest.fixture
+def seeded():
+    now = datetime.utcnow()
+    departure = now + timedelta(days=30)
+    password = pwd_context.hash(PASSWORD)
+
+    db = SessionLocal()
+    try:
+        for account_id in (1, 2, 3):
+            db.add(models.Account(id=account_id, email=f"user{account_id}@example.com", password=password))
+        for account_id in (1, 2):
+            db.add(models.AccountInfo(id=account_id, account_id=account_id, first_name="Test", last_name=f"User {account_id}"))
+        db.add(models.ClassType(id=1, type=models.ClassEnum.economy))
+        db.add_all([
+            models.Airport(id=1, name="NAIA", country="Philippines", city="Manila"),
+            models.Airport(id=2, name="Haneda", country="Japan", city="Tokyo"),
+        ])
+        db.flush()
+
+        db.add(models.Booking(id=1, account_info_id=1, class_id=1, from_id=1, to_id=2, departure_date=departure))
+        db.flush()
+        db.add(models.Flight(id=1, booking_id=1, account_info_id=1, flight_number="PR100", departure_date=departure.date(),
+                             seat_number="1A", status=models.FlightStatus.pending))
+        db.commit()
+    finally:
+        db.close()
+
+    return {"account_id": 1, "booking_id": 1, "flight_id": 1, "flight_number": "PR100", "departure_date": departure.date().isoformat()}
@@ -0,0 +1,76 @@
+#one request per route of the app, run against the seeded database of conftest.py
+#(method, path, request kwargs, expected status) - paths are the route templates, filled in by fill()
+import json
+
+FLIGHT = {"flight_number": "PR200", "seat_number": "2B", "status": "pending"}
+BOOKING = {"class_id": 1, "from_id": 1, "to_id": 2, "departure_date": "2030-01-31T10:00:00"}
+
+ROUTES = [
+    ("POST", "/login/", {"data": {"username": "user1@example.com", "password": "test-password"}}, 200),
+
+    ("GET", "/accounts/", {}, 200),
+    ("POST", "/accounts/", {"json": {"email": "new@example.com", "password": "new-password"}}, 201),
+    ("GET", "/accounts/{account_id}", {}, 200),
+    ("PUT", "/accounts/{account_id}", {"json": {"email": "renamed@example.com", "password": "other-password"}}, 200),
+    ("PATCH", "/accounts/{account_id}", {"json": {"email": "renamed@example.com"}}, 200),
+    ("DELETE", "/accounts/{account_id}", {}, 204),
+
+    ("GET", "/accounts/{account_id}/info/", {}, 200),
+    ("POST", "/accounts/{account_id}/info/", {"json": {"first_name": "New", "last_name": "Info"}, "account_id": 3}, 201),
+    ("PUT", "/accounts/{account_id}/info/", {"json": {"first_name": "Renamed", "last_name": "User"}}, 200),
+    ("PATCH", "/accounts/{account_id}/info/", {"json": {"first_name": "Renamed"}}, 200),
+    ("DELETE", "/accounts/{account_id}/info/", {}, 204),
+
+    ("GET", "/airports/", {}, 200),
+    ("POST", "/airports/", {"json": {"name": "Changi", "country": "Singapore", "city": "Singapore"}}, 201),
+    ("GET", "/airports/search", {"params": {"q": "manila"}}, 200),
+    ("GET", "/airports/{airport_id}", {}, 200),
+    ("PUT", "/airports/{airport_id}", {"json": {"name": "NAIA 3", "country": "Philippines", "city": "Pasay"}}, 200),
+    ("PATCH", "/airports/{airport_id}", {"json": {"city": "Pasay"}}, 200),
+    ("DELETE", "/airports/{airport_id}", {}, 204),
+
+    ("GET", "/classes/", {}, 200),
+    ("POST", "/classes/", {"json": {"type": "business"}}, 201),
+    ("GET", "/classes/{class_id}", {}, 200),
+    ("PUT", "/classes/{class_id}", {"json": {"type": "premium"}}, 200),
+    ("PATCH", "/classes/{class_id}", {"json": {"type": "first"}}, 200),
+    ("DELETE", "/classes/{class_id}", {}, 204),
+
+    ("GET", "/accounts/{account_id}/bookings/", {}, 200),
+    ("POST", "/accounts/{account_id}/bookings/", {"json": BOOKING}, 201),
+    ("POST", "/accounts/{account_id}/bookings/bulk", {"json": [BOOKING, {**BOOKING, "class_id": 99}]}, 207),
+    ("GET", "/accounts/{account_id}/bookings/export", {}, 200),
+    ("GET", "/accounts/{account_id}/bookings/{booking_id}", {}, 200),
+    ("PUT", "/accounts/{account_id}/bookings/{booking_id}", {"json": BOOKING}, 200),
+    ("PATCH", "/accounts/{account_id}/bookings/{booking_id}", {"json": {"to_id": 1, "from_id": 2}}, 200),
+    ("DELETE", "/accounts/{account_id}/bookings/{booking_id}", {}, 204),
+
+    ("GET", "/accounts/{account_id}/bookings/{booking_id}/flights/", {}, 200),
+    ("POST", "/accounts/{account_id}/bookings/{booking_id}/flights/", {"json": FLIGHT}, 201),
+    ("GET", "/accounts/{account_id}/bookings/{booking_id}/flights/{flight_id}", {}, 200),
+    ("PUT", "/accounts/{account_id}/bookings/{booking_id}/flights/{flight_id}", {"json": FLIGHT}, 200),
+    ("PATCH", "/accounts/{account_id}/bookings/{booking_id}/flights/{flight_id}", {"json": {"status": "delayed"}}, 200),
+    ("DELETE", "/accounts/{account_id}/bookings/{booking_id}/flights/{flight_id}", {}, 204),
+
+    ("POST", "/accounts/{account_id}/flights/import", {"content": json.dumps({**FLIGHT, "booking_id": 1}) + "\n"}, 200),
+
+    ("GET", "/flights/{flight_number}/{departure_date}/seats/", {}, 200),
+    ("GET", "/flights/{flight_number}/{departure_date}/seats/{seat_number}", {}, 200),
+
+    ("GET", "/operations/bookings", {"params": {"status": "pending"}}, 200),
+    ("PATCH", "/operations/flights/{flight_number}/{departure_date}", {"json": {"status": "delayed"}}, 200),
+
+    ("GET", "/health/pool", {}, 200),
+]
+
+#the event stream never ends and reads nothing from the database
+STREAMING = {("GET", "/accounts/{account_id}/flights/events")}
+
+#returns (url, request kwargs, account to authenticate as), an "account_id" kwarg runs the request for another account
+def fill(path: str, seeded: dict, kwargs: dict):
+    ids = {"airport_id": 1, "class_id": 1, "seat_number": "2B", **seeded}
+    ids["account_id"] = kwargs.get("account_id", ids["account_id"])
+    return path.format(**ids), {key: value for key, value in kwargs.items() if key != "account_id"}, ids["account_id"]
+
+def route_id(route):
+    return f"{route[0]} {route[1]}"
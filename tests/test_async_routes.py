@@ -0,0 +1,23 @@
+import inspect
+import pytest
+from app.routers.aio import accounts, bookings, flights, info
+
+#FastAPI calls a plain def or a class dependency in the threadpool, which the async routes are there to avoid
+def runs_on_event_loop(call):
+    if inspect.isclass(call):
+        return False
+    if not inspect.isfunction(call):
+        call = call.__call__
+    return inspect.iscoroutinefunction(call) or inspect.isasyncgenfunction(call)
+
+def dependencies(dependant):
+    for dependency in dependant.dependencies:
+        yield dependency
+        yield from dependencies(dependency)
+
+
+@pytest.mark.parametrize("route", [route for module in (accounts, bookings, flights, info) for route in module.router.routes],
+                         ids=lambda route: f"{sorted(route.methods)[0]} {route.path}")
+def test_async_route_has_no_threadpool_dependency(route):
+    assert runs_on_event_loop(route.endpoint)
+    assert [dependency.call for dependency in dependencies(route.dependant) if not runs_on_event_loop(dependency.call)] == []
@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import event
+from app.database import engine
+from conftest import auth
+from routes import FLIGHT
+
+LISTS = ["/accounts/1/bookings/", "/accounts/1/bookings/1/flights/"]
+PARENTS = ["/accounts/1/bookings/1", "/accounts/1/bookings/", "/accounts/1/bookings/1/flights/"]
+
+
+def get(client, url, etag=None, **params):
+    headers = {**auth(1), **({"If-None-Match": etag} if etag else {})}
+    return client.get(url, headers=headers, params=params)
+
+def statements_of(call):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "after_cursor_execute", listener)
+    try:
+        response = call()
+    finally:
+        event.remove(engine, "after_cursor_execute", listener)
+    return response, statements
+
+
+#a matching If-None-Match is answered from the version-only query, no rows are loaded
+@pytest.mark.parametrize("url", PARENTS + ["/accounts/1/bookings/1/flights/1"])
+def test_not_modified_runs_only_the_version_query(client, seeded, url):
+    etag = get(client, url).headers["ETag"]
+
+    response, statements = statements_of(lambda: get(client, url, etag))
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert len(statements) == 1
+
+
+#a flight write bumps the versions of its booking and account info, so every list and row above it changes
+@pytest.mark.parametrize("url", PARENTS)
+def test_nested_write_changes_the_parent_etag(client, seeded, url):
+    etag = get(client, url).headers["ETag"]
+    assert client.post("/accounts/1/bookings/1/flights/", headers=auth(1), json=FLIGHT).status_code == 201
+
+    response = get(client, url, etag)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.parametrize("url", LISTS)
+def test_every_page_has_its_own_etag(client, seeded, url):
+    first_page = get(client, url, limit=1).headers["ETag"]
+    assert get(client, url).headers["ETag"] != first_page
+    assert get(client, url, cursor=1, limit=1).headers["ETag"] != first_page
+
+    assert get(client, url, first_page, limit=1).status_code == 304
+    assert get(client, url, first_page, limit=2).status_code == 200
+    assert get(client, url, first_page, cursor=1, limit=1).status_code == 200
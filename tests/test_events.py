@@ -0,0 +1,91 @@
+import asyncio
+import json
+import threading
+from app.events import FlightEvents, flight_events
+from conftest import auth
+from routes import FLIGHT
+
+
+def event(flight_id: int):
+    return {"flight_id": flight_id, "booking_id": 1, "flight_number": "PR100", "departure_date": "2030-01-31", "status": "delayed"}
+
+def frame_data(frame: str):
+    return json.loads(frame.split("data: ", 1)[1])
+
+
+#a write on a threadpool thread reaches the stream's event loop
+def test_published_event_is_streamed():
+    events = FlightEvents(buffer_size=10, keepalive_seconds=60, max_streams=10)
+
+    async def drive():
+        subscription = events.subscribe(1)
+        stream = events.stream(subscription)
+        publisher = threading.Thread(target=events.publish, args=(1, event(7)))
+        publisher.start()
+        frame = await asyncio.wait_for(stream.__anext__(), 5)
+        publisher.join()
+        await stream.aclose()
+        return frame
+
+    frame = asyncio.run(drive())
+    assert frame.startswith("id: ") and "event: flight_status" in frame
+    assert frame_data(frame)["flight_id"] == 7
+    assert events._streams == 0
+
+
+def test_other_accounts_events_are_not_streamed():
+    events = FlightEvents(buffer_size=10, keepalive_seconds=60, max_streams=10)
+
+    async def drive():
+        subscription = events.subscribe(1)
+        events.publish(2, event(7))
+        return list(subscription.frames)
+
+    assert asyncio.run(drive()) == []
+
+
+#a stream further behind than buffer_size loses the oldest frames and is told to resync
+def test_overflowing_stream_gets_a_resync():
+    events = FlightEvents(buffer_size=2, keepalive_seconds=60, max_streams=10)
+
+    async def drive():
+        subscription = events.subscribe(1)
+        for flight_id in (1, 2, 3):
+            events.publish(1, event(flight_id))
+
+        stream = events.stream(subscription)
+        frames = [await asyncio.wait_for(stream.__anext__(), 5) for _ in range(3)]
+        await stream.aclose()
+        return frames
+
+    resync, *frames = asyncio.run(drive())
+    assert resync.startswith("event: resync")
+    assert [frame_data(frame)["flight_id"] for frame in frames] == [2, 3]
+
+
+def published(monkeypatch):
+    calls = []
+    monkeypatch.setattr(flight_events, "publish", lambda account_id, payload: calls.append((account_id, payload)))
+    return calls
+
+
+def test_put_with_the_same_status_is_not_announced(client, seeded, monkeypatch):
+    calls = published(monkeypatch)
+    url = f"/accounts/1/bookings/1/flights/{seeded['flight_id']}"
+
+    assert client.put(url, headers=auth(1), json={**FLIGHT, "status": "pending"}).status_code == 200
+    assert calls == []
+
+    assert client.put(url, headers=auth(1), json={**FLIGHT, "status": "delayed"}).status_code == 200
+    assert [(account_id, payload["status"]) for account_id, payload in calls] == [(1, "delayed")]
+
+
+def test_imported_flights_are_announced(client, seeded, monkeypatch):
+    calls = published(monkeypatch)
+    lines = [json.dumps({**FLIGHT, "booking_id": 1, "seat_number": seat}) for seat in ("3A", "3B")]
+
+    response = client.post("/accounts/1/flights/import", headers=auth(1), content="\n".join(lines))
+    assert response.json()["accepted"] == 2
+
+    flights = {flight["seat_number"]: flight["id"] for flight in client.get("/accounts/1/bookings/1/flights/", headers=auth(1)).json()}
+    assert sorted((payload["flight_id"], payload["status"]) for _, payload in calls) == [(flights["3A"], "pending"), (flights["3B"], "pending")]
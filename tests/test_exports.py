@@ -0,0 +1,70 @@
+import json
+from datetime import datetime, timedelta
+from app import models
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.exports import iter_booking_export
+from app.routers import bookings
+from conftest import auth
+
+
+def add_bookings(count: int):
+    departure = datetime.utcnow() + timedelta(days=60)
+    db = SessionLocal()
+    try:
+        for i in range(count):
+            booking = models.Booking(account_info_id=1, class_id=1, from_id=1, to_id=2, departure_date=departure)
+            db.add(booking)
+            db.flush()
+            db.add(models.Flight(booking_id=booking.id, account_info_id=1, flight_number="PR300", departure_date=departure.date(),
+                                 seat_number=f"{i + 1}C", status=models.FlightStatus.pending))
+        db.commit()
+    finally:
+        db.close()
+
+
+#seven bookings in pages of three - two full pages and a short one, every line once and in id order
+def test_export_pages_through_every_booking(client, seeded, monkeypatch):
+    add_bookings(6)
+    monkeypatch.setattr(settings, "export_batch_size", 3)
+
+    response = client.get("/accounts/1/bookings/export", headers=auth(1))
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [line["id"] for line in lines] == list(range(1, 8))
+    assert all(len(line["flights"]) == 1 for line in lines)
+    assert lines[0]["flights"][0]["flight_number"] == "PR100"
+    assert lines[0]["from_airport"]["name"] == "NAIA"
+
+
+#an exact multiple of the page size ends on the empty page after it
+def test_export_ends_on_a_full_page(client, seeded, monkeypatch):
+    add_bookings(3)
+    monkeypatch.setattr(settings, "export_batch_size", 2)
+
+    response = client.get("/accounts/1/bookings/export", headers=auth(1))
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [1, 2, 3, 4]
+
+
+def test_export_without_account_info_is_empty(client, seeded):
+    response = client.get("/accounts/3/bookings/export", headers=auth(3))
+    assert response.status_code == 200
+    assert response.text == ""
+
+
+#the route's own session and every page session are closed whenever a page is handed to the client
+def test_export_holds_no_connection_while_streaming(client, seeded, monkeypatch):
+    add_bookings(4)
+    monkeypatch.setattr(settings, "export_batch_size", 2)
+    checked_out = []
+
+    def recording_export(*args):
+        for body in iter_booking_export(*args):
+            checked_out.append(engine.pool.checkedout())
+            yield body
+
+    monkeypatch.setattr(bookings, "iter_booking_export", recording_export)
+    response = client.get("/accounts/1/bookings/export", headers=auth(1))
+    assert len(response.text.splitlines()) == 5
+    assert checked_out == [0, 0, 0]
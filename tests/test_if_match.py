@@ -0,0 +1,58 @@
+import pytest
+from app.config import settings
+from conftest import auth
+from routes import BOOKING, FLIGHT
+
+BOOKING_URL = "/accounts/1/bookings/1"
+FLIGHT_URL = "/accounts/1/bookings/1/flights/1"
+
+#(url, PUT body, PATCH body) of the two routes that take If-Match
+ROWS = {
+    "booking": (BOOKING_URL, BOOKING, {"to_id": 1, "from_id": 2}),
+    "flight": (FLIGHT_URL, FLIGHT, {"status": "delayed"}),
+}
+WRITES = [(kind, method) for kind in ROWS for method in ("PUT", "PATCH")]
+
+
+#W/"booking-1.2" and W/"flight-1.2.1" (the booking's version last) -> 2
+def version(client, kind: str):
+    return int(client.get(ROWS[kind][0], headers=auth(1)).headers["ETag"].strip('W/"').split(".")[1])
+
+def write(client, kind: str, method: str, url=None, headers=None):
+    row_url, put_body, patch_body = ROWS[kind]
+    return client.request(method, url or row_url, headers={**auth(1), **(headers or {})}, json=put_body if method == "PUT" else patch_body)
+
+
+@pytest.mark.parametrize("kind,method", WRITES)
+def test_matching_version_updates_and_bumps_it(client, seeded, kind, method):
+    etag = client.get(ROWS[kind][0], headers=auth(1)).headers["ETag"]
+
+    response = write(client, kind, method, headers={"If-Match": etag})
+    assert response.status_code == 200, response.text
+    assert response.headers["ETag"] != etag
+    assert version(client, kind) == 2
+    assert client.get(ROWS[kind][0], headers=auth(1)).headers["ETag"] == response.headers["ETag"]
+
+
+@pytest.mark.parametrize("kind,method", WRITES)
+def test_stale_version_is_412(client, seeded, kind, method):
+    etag = client.get(ROWS[kind][0], headers=auth(1)).headers["ETag"]
+    assert write(client, kind, method).status_code == 200
+
+    response = write(client, kind, method, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert version(client, kind) == 2
+
+
+@pytest.mark.parametrize("kind,method", WRITES)
+def test_missing_row_is_404_not_412(client, seeded, kind, method):
+    url = {"booking": "/accounts/1/bookings/99", "flight": "/accounts/1/bookings/1/flights/99"}[kind]
+    response = write(client, kind, method, url=url, headers={"If-Match": f'W/"{kind}-99.1"'})
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("kind,method", WRITES)
+def test_required_if_match_without_the_header_is_428(client, seeded, monkeypatch, kind, method):
+    monkeypatch.setattr(settings, "require_if_match", True)
+    assert write(client, kind, method).status_code == 428
+    assert version(client, kind) == 1
@@ -0,0 +1,59 @@
+import json
+from datetime import date
+from app import models
+from app.config import settings
+from app.database import SessionLocal, engine
+from conftest import auth
+
+
+def flight_line(seat_number: str):
+    return json.dumps({"booking_id": 1, "flight_number": "PR300", "seat_number": seat_number, "status": "pending"})
+
+
+def test_import_summary(client, seeded, monkeypatch):
+    monkeypatch.setattr(settings, "import_chunk_size", 2)
+    body = "\n".join([flight_line("1A"), "not json", flight_line("1B"), flight_line("1A"), flight_line("2A")]) + "\n"
+
+    response = client.post("/accounts/1/flights/import", headers=auth(1), content=body)
+    assert response.status_code == 200, response.text
+    summary = response.json()
+    assert (summary["accepted"], summary["rejected"]) == (3, 2)
+    assert [error["line"] for error in summary["errors"]] == [2, 4]
+    #no session of the import is left holding a connection
+    assert engine.pool.checkedout() == 0
+
+
+#the long line is never finished, so it is still being buffered when it passes the limit
+def test_line_too_long_keeps_the_lines_before_it(client, seeded, monkeypatch):
+    monkeypatch.setattr(settings, "import_chunk_size", 2)
+    monkeypatch.setattr(settings, "import_max_line_bytes", 200)
+    body = "\n".join([flight_line("1A"), flight_line("1B"), flight_line("1C"), "x" * 500])
+
+    response = client.post("/accounts/1/flights/import", headers=auth(1), content=body)
+    assert response.status_code == 413
+    detail = response.json()["detail"]
+    assert (detail["accepted"], detail["rejected"], detail["resume_at_line"]) == (3, 0, 4)
+
+    flights = client.get("/accounts/1/bookings/1/flights/", headers=auth(1)).json()
+    assert sorted(flight["seat_number"] for flight in flights if flight["flight_number"] == "PR300") == ["1A", "1B", "1C"]
+
+
+#3A was sold behind this worker's seat map, only its line is rejected, the rest of the chunk is saved on the retry
+def test_seat_sold_by_another_worker_rejects_only_its_line(client, seeded):
+    headers = auth(1)
+    day = date.fromisoformat(seeded["departure_date"])
+    assert client.get(f"/flights/PR300/{day.isoformat()}/seats/", headers=headers).json()["taken"] == []
+
+    db = SessionLocal()
+    try:
+        db.add(models.Flight(booking_id=1, account_info_id=1, flight_number="PR300", departure_date=day,
+                             seat_number="3A", status=models.FlightStatus.pending))
+        db.commit()
+    finally:
+        db.close()
+
+    body = "\n".join(flight_line(seat) for seat in ("3A", "3B", "3C"))
+    summary = client.post("/accounts/1/flights/import", headers=headers, content=body).json()
+    assert (summary["accepted"], summary["rejected"]) == (2, 1)
+    assert summary["errors"][0]["line"] == 1
+    assert "already taken" in summary["errors"][0]["detail"]
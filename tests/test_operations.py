@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+import pytest
+from app import models
+from app.database import SessionLocal
+from conftest import auth
+
+S = models.FlightStatus
+DAY = date(2030, 3, 1)
+
+#one flight in every status on PR500 that day, seats 1A.., and the same flight number on the next day
+SEATS = {"1A": S.pending, "1B": S.on_time, "1C": S.delayed, "1D": S.boarding, "1E": S.cancelled}
+
+
+@pytest.fixture
+def flight_day(seeded):
+    db = SessionLocal()
+    try:
+        for seat_number, flight_status in SEATS.items():
+            db.add(models.Flight(booking_id=1, account_info_id=1, flight_number="PR500", departure_date=DAY,
+                                 seat_number=seat_number, status=flight_status))
+        db.add(models.Flight(booking_id=1, account_info_id=1, flight_number="PR500", departure_date=DAY + timedelta(days=1),
+                             seat_number="1A", status=S.pending))
+        db.commit()
+    finally:
+        db.close()
+
+def statuses():
+    db = SessionLocal()
+    try:
+        return {(flight.departure_date, flight.seat_number): flight.status
+                for flight in db.query(models.Flight).filter(models.Flight.flight_number == "PR500")}
+    finally:
+        db.close()
+
+def update(client, new_status: str, account_id: int = 1):
+    return client.patch(f"/operations/flights/PR500/{DAY.isoformat()}", headers=auth(account_id), json={"status": new_status})
+
+
+#seats that move, by the transitions each status allows
+@pytest.mark.parametrize("new_status,moved", [
+    (S.boarding, {"1A", "1B", "1C"}),
+    (S.on_time, {"1A", "1C"}),
+    (S.delayed, {"1A", "1B", "1D"}),
+    (S.cancelled, {"1A", "1B", "1C", "1D"}),
+])
+def test_only_flights_allowed_to_move_are_updated(client, flight_day, new_status, moved):
+    response = update(client, new_status.value)
+    assert response.status_code == 200, response.text
+    assert response.json()["updated"] == len(moved)
+
+    after = statuses()
+    for seat_number, before in SEATS.items():
+        assert after[(DAY, seat_number)] == (new_status if seat_number in moved else before)
+    #other days of the flight number are left alone
+    assert after[(DAY + timedelta(days=1), "1A")] == S.pending
+
+
+def test_no_flight_can_move_back_to_pending(client, flight_day):
+    assert update(client, "pending").status_code == 422
+    assert {key: value for key, value in statuses().items() if key[0] == DAY} == {(DAY, seat): status for seat, status in SEATS.items()}
+
+
+def test_second_update_changes_nothing(client, flight_day):
+    assert update(client, "cancelled").json()["updated"] == 4
+    assert update(client, "cancelled").json()["updated"] == 0
+
+
+def test_operators_only(client, flight_day):
+    assert update(client, "delayed", account_id=2).status_code == 403
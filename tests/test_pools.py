@@ -0,0 +1,42 @@
+import asyncio
+from sqlalchemy import text
+from app.config import settings
+from app.database import build_async_engine
+from app.pool import InstrumentedAsyncQueuePool, pool_status
+from app.routers import health, metrics
+from conftest import DATABASE_PATH, auth
+
+
+def test_async_engine_uses_the_pool_settings(monkeypatch):
+    monkeypatch.setattr(settings, "pool_size", 3)
+    monkeypatch.setattr(settings, "pool_max_overflow", 4)
+    monkeypatch.setattr(settings, "pool_timeout", 7)
+    async_engine = build_async_engine(f"sqlite+aiosqlite:///{DATABASE_PATH}")
+
+    async def query():
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        await async_engine.dispose()
+
+    asyncio.run(query())
+    pool = async_engine.sync_engine.pool
+    assert isinstance(pool, InstrumentedAsyncQueuePool)
+    status = pool_status(pool)
+    assert (status["size"], status["max_overflow"], status["timeout_seconds"]) == (3, 4, 7)
+    assert status["checkouts"] == 1
+
+
+def test_async_pool_is_reported(client, monkeypatch):
+    async_engine = build_async_engine(f"sqlite+aiosqlite:///{DATABASE_PATH}")
+    monkeypatch.setattr(health, "async_engine", async_engine)
+    monkeypatch.setattr(metrics, "async_engine", async_engine)
+
+    response = client.get("/health/pool", headers=auth(1))
+    assert response.status_code == 200
+    assert response.json()["async_pool"]["size"] == settings.pool_size
+
+    assert 'db_pool_size{engine="primary_async"}' in client.get("/metrics").text
+
+
+def test_sync_only_pool_status(client):
+    assert client.get("/health/pool", headers=auth(1)).json()["async_pool"] is None
@@ -0,0 +1,36 @@
+from conftest import auth
+
+
+def test_airports_list_and_get(client, seeded):
+    response = client.get("/airports/")
+    assert response.status_code == 200
+    assert [airport["name"] for airport in response.json()] == ["NAIA", "Haneda"]
+
+    response = client.get("/airports/2")
+    assert response.status_code == 200
+    assert response.json() == {"id": 2, "name": "Haneda", "country": "Japan", "city": "Tokyo"}
+
+    assert client.get("/airports/99").status_code == 404
+
+
+def test_classes_list_and_get(client, seeded):
+    response = client.get("/classes/")
+    assert response.status_code == 200
+    assert response.json() == [{"id": 1, "type": "economy"}]
+
+    response = client.get("/classes/1")
+    assert response.status_code == 200
+    assert response.json() == {"id": 1, "type": "economy"}
+
+    assert client.get("/classes/99").status_code == 404
+
+
+def test_airport_write_clears_cached_body(client, seeded):
+    assert client.get("/airports/1").json()["city"] == "Manila"
+
+    response = client.patch("/airports/1", json={"city": "Pasay"})
+    assert response.status_code == 200
+    assert response.json()["city"] == "Pasay"
+
+    assert client.get("/airports/1").json()["city"] == "Pasay"
+    assert [airport["city"] for airport in client.get("/airports/").json()] == ["Pasay", "Tokyo"]
@@ -0,0 +1,58 @@
+import asyncio
+import itertools
+import pytest
+from starlette.requests import Request
+from app import database
+
+
+#stands in for an async_sessionmaker, the "session" is the factory's name
+class SessionFactory:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self.name
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+def request(headers=None):
+    return Request({"type": "http", "headers": [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()]})
+
+def read_from(request):
+    async def session():
+        async for db in database.get_async_read_db(request):
+            return db
+    return asyncio.run(session())
+
+
+@pytest.fixture
+def async_replicas(monkeypatch):
+    replicas = [SessionFactory("replica1"), SessionFactory("replica2")]
+    monkeypatch.setattr(database, "AsyncSessionLocal", SessionFactory("primary"))
+    monkeypatch.setattr(database, "AsyncReplicaSessions", replicas)
+    monkeypatch.setattr(database, "_next_async_replica", itertools.cycle(replicas))
+
+
+def test_async_reads_go_to_the_replicas_in_turn(async_replicas):
+    assert [read_from(request()) for _ in range(3)] == ["replica1", "replica2", "replica1"]
+
+
+def test_async_reads_after_a_write_go_to_the_primary(async_replicas):
+    assert read_from(request({database.PRIMARY_HEADER: "1"})) == "primary"
+    assert read_from(request({"cookie": f"{database.PRIMARY_COOKIE}=1"})) == "primary"
+
+
+def test_async_reads_without_replicas_go_to_the_primary(monkeypatch):
+    monkeypatch.setattr(database, "AsyncSessionLocal", SessionFactory("primary"))
+    assert read_from(request()) == "primary"
+
+
+def test_async_mode_needs_the_async_replica_urls():
+    with pytest.raises(RuntimeError):
+        database.validate_async_replicas(["mysql+pymysql://replica1/db"], [])
+    database.validate_async_replicas(["mysql+pymysql://replica1/db"], ["mysql+aiomysql://replica1/db"])
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+from app.search import AirportIndex
+
+AIRPORTS = [
+    SimpleNamespace(id=1, name="Ninoy Aquino International", city="Manila", country="Philippines"),
+    SimpleNamespace(id=2, name="Haneda", city="Tokyo", country="Japan"),
+    SimpleNamespace(id=3, name="Narita International", city="Tokyo", country="Japan"),
+    SimpleNamespace(id=4, name="Manchester", city="Manchester", country="United Kingdom"),
+    SimpleNamespace(id=5, name="Clark International", city="Angeles", country="Philippines"),
+]
+
+
+def index(airports=AIRPORTS):
+    airport_index = AirportIndex(ttl_seconds=3600)
+    airport_index.ensure_built(lambda: list(airports))
+    return airport_index
+
+def ids(airport_index, query: str, limit: int = 10):
+    return [record["id"] for record in airport_index.search(query, limit)]
+
+
+def test_exact_match_outranks_prefix():
+    #"manila" is a whole token of 1, a prefix of nothing else; "man" is a prefix of both
+    assert ids(index(), "manila") == [1]
+    assert ids(index(), "man") == [4, 1]
+
+
+def test_name_outranks_city_and_country():
+    #Narita has Tokyo as its city only, like Haneda - both tie, lower id first
+    assert ids(index(), "tokyo") == [2, 3]
+    #"international" is in three names, "philippines" narrows it to two
+    assert ids(index(), "international philippines") == [1, 5]
+
+
+def test_typos_rank_below_exact_and_prefix():
+    airport_index = index()
+    #one typo from haneda, two from manila
+    assert ids(airport_index, "hanida") == [2, 1]
+    assert ids(airport_index, "narrita") == [3]
+    #one typo in a prefix of a longer token
+    assert ids(airport_index, "manchestr") == [4]
+
+
+def test_every_term_has_to_match():
+    assert ids(index(), "tokyo philippines") == []
+    assert ids(index(), "") == []
+
+
+#the walk from the bisect point takes every token with the prefix and nothing after them
+def test_prefix_walk_takes_only_tokens_with_the_prefix():
+    airport_index = index()
+    assert airport_index._term_matches("ja") == {"japan": 0.8}
+    assert airport_index._term_matches("n") == {"narita": 0.8, "ninoy": 0.8}
+    assert airport_index._term_matches("zz") == {}
+    assert ids(airport_index, "phil") == [1, 5]
+
+
+def test_incremental_writes_keep_the_index_in_sync():
+    airport_index = index()
+
+    airport_index.add(SimpleNamespace(id=6, name="Changi", city="Singapore", country="Singapore"))
+    assert ids(airport_index, "changi") == [6]
+
+    airport_index.update(SimpleNamespace(id=2, name="Tokyo International", city="Tokyo", country="Japan"))
+    assert ids(airport_index, "haneda") == []
+    assert ids(airport_index, "tokyo international") == [2, 3]
+
+    airport_index.remove(4)
+    assert ids(airport_index, "manchester") == []
+    assert ids(airport_index, "man") == [1]
+
+    #the index holds what a rebuild from the same rows would
+    rebuilt = index([airport for airport in AIRPORTS if airport.id not in (2, 4)] + [
+        SimpleNamespace(id=2, name="Tokyo International", city="Tokyo", country="Japan"),
+        SimpleNamespace(id=6, name="Changi", city="Singapore", country="Singapore"),
+    ])
+    assert airport_index._tokens == rebuilt._tokens
+    assert dict(airport_index._postings) == dict(rebuilt._postings)
+
+
+def test_writes_before_the_first_search_are_ignored():
+    airport_index = AirportIndex(ttl_seconds=3600)
+    airport_index.add(AIRPORTS[0])
+    assert airport_index._tokens == []
@@ -0,0 +1,95 @@
+from datetime import date
+import pytest
+from sqlalchemy.exc import IntegrityError
+from app import models
+from app.database import SessionLocal
+from app.seats import SeatInventory, SeatLayout
+from conftest import auth
+from routes import FLIGHT
+
+DAY = date(2030, 1, 31)
+
+
+#stands in for the session of a seat map load, runs during() between the SELECT and its result
+class LoadingSession:
+    def __init__(self, seats, during=None):
+        self.seats = seats
+        self.during = during
+
+    def scalars(self, statement):
+        if self.during is not None:
+            self.during()
+        return self
+
+    def all(self):
+        return list(self.seats)
+
+    def rollback(self):
+        pass
+
+
+def inventory():
+    return SeatInventory(SeatLayout(2, "AB"), ttl_seconds=0, max_flights=10)
+
+
+def test_seat_confirmed_during_a_reload_stays_taken():
+    seats = inventory()
+    seats.taken_seats(LoadingSession([]), "PR1", DAY)
+    key, index = seats.hold(LoadingSession([]), "PR1", DAY, "1B")
+
+    #the reload read the rows before the 1B commit
+    seats.taken_seats(LoadingSession(["1A"], during=lambda: seats.confirm([(key, index)])), "PR1", DAY)
+    assert seats.layout.labels(seats._maps[("PR1", DAY)].taken) == ["1A", "1B"]
+
+
+def test_seat_released_during_a_reload_is_free():
+    seats = inventory()
+    seats.taken_seats(LoadingSession(["1A"]), "PR1", DAY)
+
+    #the reload read the rows before the 1A delete
+    taken = seats.taken_seats(LoadingSession(["1A"], during=lambda: seats.release("PR1", DAY, "1A")), "PR1", DAY)
+    assert taken == 0
+
+
+def test_failed_reload_keeps_the_old_map():
+    seats = inventory()
+    seats.taken_seats(LoadingSession(["1A"]), "PR1", DAY)
+
+    def fail():
+        raise RuntimeError("connection lost")
+
+    with pytest.raises(RuntimeError):
+        seats.taken_seats(LoadingSession([], during=fail), "PR1", DAY)
+    seat_map = seats._maps[("PR1", DAY)]
+    assert seats.layout.labels(seat_map.taken) == ["1A"]
+    assert seat_map.loading == 0
+
+
+def test_other_integrity_errors_are_not_a_taken_seat():
+    seats = inventory()
+    db = LoadingSession([])
+    error = IntegrityError("INSERT INTO flights", {}, Exception("FOREIGN KEY constraint failed"))
+
+    with pytest.raises(IntegrityError):
+        with seats.reserve(db, "PR1", DAY, "2A"):
+            raise error
+    #the hold is given back
+    assert seats.taken_seats(db, "PR1", DAY) == 0
+
+
+def test_seat_sold_by_another_worker_is_409(client, seeded):
+    headers = auth(1)
+    path = f"/flights/PR200/{seeded['departure_date']}/seats/"
+    assert "2B" not in client.get(path, headers=headers).json()["taken"]
+
+    #written behind this worker's seat map
+    db = SessionLocal()
+    try:
+        db.add(models.Flight(booking_id=1, account_info_id=1, flight_number="PR200", departure_date=date.fromisoformat(seeded["departure_date"]),
+                             seat_number="2B", status=models.FlightStatus.pending))
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.post("/accounts/1/bookings/1/flights/", headers=headers, json=FLIGHT)
+    assert response.status_code == 409, response.text
@@ -0,0 +1,103 @@
+import pytest
+from sqlalchemy import event
+from app.database import engine
+from app.timing import current_budget
+from conftest import auth
+from routes import ROUTES, fill, route_id
+
+#statements each write route runs on SQLite, which has RETURNING, so the returning budget of the route applies
+#counted by the route's own StatementBudget, cache fills are not charged to it
+STATEMENTS = {
+    ("POST", "/accounts/"): 1,
+    ("PUT", "/accounts/{account_id}"): 5,
+    ("PATCH", "/accounts/{account_id}"): 5,
+    ("DELETE", "/accounts/{account_id}"): 2,
+
+    ("POST", "/accounts/{account_id}/info/"): 2,
+    ("PUT", "/accounts/{account_id}/info/"): 5,
+    ("PATCH", "/accounts/{account_id}/info/"): 5,
+    ("DELETE", "/accounts/{account_id}/info/"): 2,
+
+    ("POST", "/airports/"): 1,
+    ("PUT", "/airports/{airport_id}"): 1,
+    ("PATCH", "/airports/{airport_id}"): 1,
+    ("DELETE", "/airports/{airport_id}"): 2,
+
+    ("POST", "/classes/"): 1,
+    ("PUT", "/classes/{class_id}"): 1,
+    ("PATCH", "/classes/{class_id}"): 1,
+    ("DELETE", "/classes/{class_id}"): 2,
+
+    ("POST", "/accounts/{account_id}/bookings/"): 3,
+    ("POST", "/accounts/{account_id}/bookings/bulk"): 4,
+    ("PUT", "/accounts/{account_id}/bookings/{booking_id}"): 3,
+    ("PATCH", "/accounts/{account_id}/bookings/{booking_id}"): 3,
+    ("DELETE", "/accounts/{account_id}/bookings/{booking_id}"): 5,
+
+    ("POST", "/accounts/{account_id}/bookings/{booking_id}/flights/"): 4,
+    ("PUT", "/accounts/{account_id}/bookings/{booking_id}/flights/{flight_id}"): 4,
+    #a status-only change skips the read of the current seat
+    ("PATCH", "/accounts/{account_id}/bookings/{booking_id}/flights/{flight_id}"): 3,
+    ("DELETE", "/accounts/{account_id}/bookings/{booking_id}/flights/{flight_id}"): 4,
+
+    ("PATCH", "/operations/flights/{flight_number}/{departure_date}"): 4,
+}
+
+#writes without a budget - the login rehash is rare, the import commits per chunk
+UNBUDGETED = {("POST", "/login/"), ("POST", "/accounts/{account_id}/flights/import")}
+
+WRITES = [route for route in ROUTES if route[0] != "GET"]
+
+
+def test_every_write_route_has_a_count():
+    assert {(method, path) for method, path, _, _ in WRITES} - UNBUDGETED == set(STATEMENTS)
+
+
+@pytest.mark.parametrize("route", WRITES, ids=route_id)
+def test_write_route_statements(client, seeded, route):
+    method, path, kwargs, expected_status = route
+    url, kwargs, account_id = fill(path, seeded, kwargs)
+    headers = auth(account_id)
+
+    #reference caches and seat maps filled beforehand, as in a warm worker
+    client.get("/airports/", headers=headers)
+    client.get("/classes/", headers=headers)
+
+    budgets = []
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        budget = current_budget.get()
+        if budget is not None and budget not in budgets:
+            budgets.append(budget)
+
+    event.listen(engine, "after_cursor_execute", collect)
+    try:
+        response = client.request(method, url, headers=headers, **kwargs)
+    finally:
+        event.remove(engine, "after_cursor_execute", collect)
+    assert response.status_code == expected_status, response.text
+
+    if (method, path) in UNBUDGETED:
+        assert budgets == []
+        return
+
+    [budget] = budgets
+    assert budget.returning
+    assert budget.statements == STATEMENTS[(method, path)]
+    assert not budget.exceeded()
+
+
+#the account PUT/PATCH load the tree in fewer SELECTs than GET, the response must not lose anything for it
+@pytest.mark.parametrize("method, body", [("PUT", {"email": "renamed@example.com", "password": "other-password"}),
+                                          ("PATCH", {"email": "renamed@example.com"})])
+def test_account_write_answers_the_full_tree(client, seeded, method, body):
+    headers = auth(seeded["account_id"])
+    url = f"/accounts/{seeded['account_id']}"
+    client.post(f"{url}/bookings/{seeded['booking_id']}/flights/", headers=headers, json={
+        "flight_number": seeded["flight_number"], "departure_date": seeded["departure_date"], "seat_number": "1B", "status": "pending"
+    })
+
+    written = client.request(method, url, headers=headers, json=body)
+    assert written.status_code == 200, written.text
+    assert written.json() == client.get(url, headers=headers).json()
+    assert len(written.json()["account_info"]["bookings"][0]["flights"]) == 2
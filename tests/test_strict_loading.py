@@ -0,0 +1,21 @@
+import pytest
+from app.main import app
+from conftest import auth
+from routes import ROUTES, STREAMING, fill, route_id
+
+#conftest.py turns STRICT_LOADING on, a relationship a route did not plan to load raises instead of lazy loading
+
+
+def test_every_route_is_covered():
+    documented = {(method.upper(), path) for path, methods in app.openapi()["paths"].items() for method in methods}
+    covered = {(method, path) for method, path, _, _ in ROUTES} | STREAMING
+    assert documented - covered == set()
+
+
+@pytest.mark.parametrize("route", ROUTES, ids=route_id)
+def test_route_runs_with_strict_loading(client, seeded, route):
+    method, path, kwargs, expected_status = route
+    url, kwargs, account_id = fill(path, seeded, kwargs)
+
+    response = client.request(method, url, headers=auth(account_id), **kwargs)
+    assert response.status_code == expected_status, response.text
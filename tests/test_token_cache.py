@@ -0,0 +1,57 @@
+import pytest
+from app import oauth2
+from conftest import auth
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    oauth2.clear_token_cache()
+    yield
+    oauth2.clear_token_cache()
+
+def verify(token: str):
+    return oauth2.verify_token(token, Exception("invalid token"))
+
+def counts():
+    info = oauth2.token_cache_info()
+    return info["hits"], info["misses"]
+
+
+def test_cached_token_is_served_until_its_exp(monkeypatch):
+    token = oauth2.create_token({"user_id": 1})
+    verify(token)
+    verify(token)
+    assert counts() == (1, 1)
+
+    #past the token's exp the entry is dropped and the signature checked again
+    expires_at = next(iter(oauth2._token_cache.values()))[1]
+    monkeypatch.setattr(oauth2.time, "time", lambda: expires_at + 1)
+    verify(token)
+    assert counts() == (1, 2)
+
+
+def test_least_recently_used_token_is_evicted(monkeypatch):
+    monkeypatch.setattr(oauth2, "TOKEN_CACHE_SIZE", 2)
+    first, second, third = (oauth2.create_token({"user_id": user_id}) for user_id in (1, 2, 3))
+
+    verify(first)
+    verify(second)
+    #first is used again, so second is now the least recently used
+    verify(first)
+    verify(third)
+    assert oauth2.token_cache_info()["size"] == 2
+
+    verify(first)
+    assert counts() == (2, 3)
+    verify(second)
+    assert counts() == (2, 4)
+
+
+def test_counters_are_exported(client, seeded):
+    client.get("/accounts/1", headers=auth(1))
+    client.get("/accounts/1", headers=auth(1))
+
+    metrics = client.get("/metrics").text
+    assert "token_cache_hits_total 1" in metrics
+    assert "token_cache_misses_total 1" in metrics
+    assert "token_cache_size 1" in metrics